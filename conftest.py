@@ -1,4 +1,5 @@
 import os
+import sys
 import pytest
 from pathlib import Path
 from slugify import slugify
@@ -11,6 +12,10 @@ from dotenv import load_dotenv
 load_dotenv()
 FAIL_FAST_FLAG = "_fail_fast_triggered"
 
+# Distribuição por duração histórica (--shards/--shard-id, --lpt-groups)
+# gravação/reprodução de tráfego (--har record|replay) e benchmarks (--benchmark)
+pytest_plugins = ["utils.pytest_sharding", "utils.pytest_har", "utils.pytest_benchmarks"]
+
 # ====================================================
 # 🔐 Login credentials (generic names for public repo)
 # ====================================================
@@ -25,6 +30,243 @@ def credentials():
         raise RuntimeError(f"Define the environment variables: {', '.join(missing)}")
     return {"username": username, "password": password}
 
+# ====================================================
+# 🗃️ Dados compartilhados entre testes (booking, proposta...)
+# ====================================================
+
+_DATA_STORE = pytest.StashKey()
+
+
+def _data_store_da_sessao(config):
+    """Store da sessão, criado uma vez (também usado pelo hook que registra falhas de produtores)."""
+    if _DATA_STORE not in config.stash:
+        from utils.data_store import TestDataStore
+
+        workerinput = getattr(config, "workerinput", None)
+        run_id = os.getenv("TEST_RUN_ID") or (workerinput or {}).get("testrunuid")
+        # Em paralelo o produtor pode estar rodando em outro worker: espera por ele
+        # (a espera termina antes se o produtor, marcado com @pytest.mark.produz, falhar)
+        espera_padrao = float(os.getenv("DATA_STORE_WAIT") or ("300" if workerinput else "0"))
+
+        store = TestDataStore(run_id=run_id, espera_padrao=espera_padrao)
+        store.importar_json("dados.json")
+        config.stash[_DATA_STORE] = store
+    return config.stash[_DATA_STORE]
+
+
+@pytest.fixture(scope="session")
+def data_store(request):
+    """Store transacional de artefatos, seguro para execução em paralelo (pytest-xdist)."""
+    return _data_store_da_sessao(request.config)
+
+# ====================================================
+# ⏱️ Spans das ações dos page objects (TRACE_SPANS=true)
+# ====================================================
+
+@pytest.fixture(autouse=True)
+def spans_do_teste(request):
+    """Coleta os spans do teste e os grava em JSONL no teardown (um arquivo por worker)."""
+    from utils.spans import recorder
+
+    if not recorder.habilitado:
+        yield
+        return
+
+    recorder.iniciar_teste(request.node.nodeid)
+    yield
+    worker = os.getenv("PYTEST_XDIST_WORKER", "master")
+    destino = os.getenv("SPANS_FILE") or os.path.join(
+        request.config.getoption("output", default="test-results"), f"spans-{worker}.jsonl"
+    )
+    recorder.finalizar_teste(destino)
+
+# ====================================================
+# ⏳ Esperas por estabilização da página (aguardar_estabilizar)
+# ====================================================
+
+@pytest.fixture(autouse=True)
+def estabilizacao_do_teste(request):
+    """Registra no relatório as medições de `aguardar_estabilizar` feitas na página do teste."""
+    if "page" not in request.fixturenames:
+        yield
+        return
+
+    from pages.base_page import medicoes_da_pagina
+
+    page = request.getfixturevalue("page")
+    medicoes_da_pagina(page, limpar=True)  # página do pool pode trazer medições de outro teste
+    yield
+    medicoes = medicoes_da_pagina(page, limpar=True)
+    if not medicoes:
+        return
+
+    instaveis = [m["rotulo"] for m in medicoes if not m["estabilizou"]]
+    request.node.user_properties.append(("estabilizacao", medicoes))
+    print(
+        f"Estabilização: {len(medicoes)} esperas, {sum(m['duracao'] for m in medicoes):.2f}s no total"
+        + (f", sem estabilizar: {', '.join(instaveis)}" if instaveis else "")
+    )
+
+# ====================================================
+# ♻️ Pool de contextos aquecidos por worker (CONTEXT_POOL=true)
+# ====================================================
+
+def _pool_de_contextos_habilitado(config) -> bool:
+    enabled = os.getenv("CONTEXT_POOL", "false").lower() in ("1", "true", "yes")
+    # A gravação de HAR só é escrita quando o contexto fecha: com --har, contexto novo por teste
+    return enabled and not config.getoption("har")
+
+
+@pytest.fixture(scope="session")
+def context_pool(request, browser, browser_context_args):
+    """Contextos já criados e semeados com as sessões salvas, reaproveitados entre os testes do worker."""
+    from utils.context_pool import ContextPool
+
+    context_args = dict(browser_context_args)
+    if request.config.getoption("video", default="off") != "off":
+        # Cada empréstimo usa uma página nova: o vídeo de cada teste é o da sua página
+        context_args["record_video_dir"] = str(Path(request.config.getoption("output", default="test-results")) / ".videos-pool")
+
+    pool = ContextPool(browser, context_args=context_args).aquecer()
+    yield pool
+    stats = pool.estatisticas
+    print(
+        f"Pool de contextos: {stats['emprestados']} empréstimos, {stats['reaproveitados']} reaproveitados, "
+        f"{stats['criados']} criados, {stats['descartados']} descartados"
+    )
+    pool.encerrar()
+
+
+def _manter_artefato(opcao: str, falhou: bool) -> bool:
+    """Interpreta --tracing/--video/--screenshot do pytest-playwright (on, off, *-on-failure)."""
+    return opcao == "on" or (opcao in ("retain-on-failure", "only-on-failure") and falhou)
+
+
+@pytest.fixture
+def page(request, browser_name):
+    """Página do teste: emprestada do pool (CONTEXT_POOL=true) ou de um contexto novo do pytest-playwright.
+
+    `browser_name` fica na assinatura para que os testes continuem parametrizados
+    por navegador (`[chromium]`, `--browser firefox`...) com ou sem o pool.
+    """
+    if not _pool_de_contextos_habilitado(request.config):
+        yield request.getfixturevalue("context").new_page()
+        return
+
+    # Sem a fixture `context`, trace, screenshot e vídeo do pytest-playwright são feitos aqui,
+    # por empréstimo, na mesma pasta (--output/<teste>)
+    config = request.config
+    tracing = config.getoption("tracing", default="off")
+    screenshot = config.getoption("screenshot", default="off")
+    video = config.getoption("video", default="off")
+    pasta = Path(config.getoption("output", default="test-results")) / slugify(request.node.nodeid)
+
+    pool = request.getfixturevalue("context_pool")
+    pagina = pool.emprestar()
+    if tracing != "off":
+        pagina.context.tracing.start(title=request.node.nodeid, screenshots=True, snapshots=True, sources=True)
+    yield pagina
+
+    falhou = any(getattr(getattr(request.node, f"rep_{fase}", None), "failed", False) for fase in ("setup", "call"))
+    try:
+        if _manter_artefato(screenshot, falhou) and not pagina.is_closed():
+            pasta.mkdir(parents=True, exist_ok=True)
+            pagina.screenshot(path=str(pasta / "test-finished-1.png"),
+                              full_page=config.getoption("full_page_screenshot", default=False))
+        if tracing != "off":
+            if _manter_artefato(tracing, falhou):
+                pasta.mkdir(parents=True, exist_ok=True)
+                pagina.context.tracing.stop(path=str(pasta / "trace.zip"))
+            else:
+                pagina.context.tracing.stop()
+    except Exception as e:
+        print(f"Aviso: falha ao salvar os artefatos do teste: {e}")
+
+    # Contexto de teste que falhou pode ter ficado em estado inesperado: não volta ao pool
+    pool.devolver(pagina, reutilizar=not falhou)
+
+    if pagina.video:
+        try:
+            if _manter_artefato(video, falhou):
+                pasta.mkdir(parents=True, exist_ok=True)
+                pagina.video.save_as(str(pasta / "video.webm"))
+            pagina.video.delete()
+        except Exception as e:
+            print(f"Aviso: falha ao salvar o vídeo do teste: {e}")
+
+# ====================================================
+# 🌐 Bloqueio de recursos e cache de estáticos (NETWORK_CACHE=true)
+# ====================================================
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "produz(*tipos): o teste publica esses tipos no data store; se falhar, os consumidores param de esperar",
+    )
+    config.addinivalue_line(
+        "markers",
+        "rede(bloquear_tipos=None, bloquear_padroes=None): sobrepõe os recursos bloqueados pelo cache de rede no teste",
+    )
+
+
+@pytest.fixture(scope="session")
+def network_cache():
+    """Cache de estáticos em disco compartilhado por todos os testes da sessão."""
+    from utils.network_cache import NetworkCache
+    return NetworkCache()
+
+
+@pytest.fixture(autouse=True)
+def cache_de_rede(request):
+    """Instala o bloqueio/cache de rede no contexto do teste e registra a economia obtida."""
+    enabled = os.getenv("NETWORK_CACHE", "false").lower() in ("1", "true", "yes")
+    # Com --har, o tráfego é gravado/servido pelo HAR: o cache não deve interceptá-lo
+    if not enabled or "page" not in request.fixturenames or request.config.getoption("har"):
+        yield None
+        return
+
+    cache = request.getfixturevalue("network_cache")
+    original = (cache.bloquear_tipos, cache.bloquear_padroes)
+    marker = request.node.get_closest_marker("rede")
+    if marker:
+        if marker.kwargs.get("bloquear_tipos") is not None:
+            cache.bloquear_tipos = set(marker.kwargs["bloquear_tipos"])
+        if marker.kwargs.get("bloquear_padroes") is not None:
+            cache.bloquear_padroes = list(marker.kwargs["bloquear_padroes"])
+
+    cache.reiniciar_contadores()
+    cache.instalar(request.getfixturevalue("page").context)
+    yield cache
+
+    cache.bloquear_tipos, cache.bloquear_padroes = original
+    stats = cache.estatisticas
+    request.node.user_properties.append(("rede", stats))
+    print(
+        f"Rede: {stats['requisicoes_economizadas']} requisições e "
+        f"{stats['bytes_economizados'] / 1024:.0f} KiB economizados "
+        f"({stats['bloqueadas']} bloqueadas, {stats['servidas_do_cache']} do cache, "
+        f"{stats['revalidadas']} revalidadas, {stats['baixadas']} baixadas)"
+    )
+
+# ====================================================
+# 🧪 Portal local (estruturas de UI dos portais, sem rede)
+# ====================================================
+
+@pytest.fixture(scope="session")
+def _portal_local_servidor():
+    from utils.portal_local import PortalLocal
+
+    portal = PortalLocal().iniciar()
+    yield portal
+    portal.parar()
+
+
+@pytest.fixture
+def portal_local(_portal_local_servidor):
+    """Servidor local com iframe, overlay, modais e selects em cascata; reiniciado a cada teste."""
+    _portal_local_servidor.reiniciar()
+    return _portal_local_servidor
+
 # ====================================================
 # 🚨 Fail-Fast Controlado (após última tentativa)
 # ====================================================
@@ -52,6 +294,7 @@ def pytest_runtest_makereport(item, call):
     outcome = yield
     report = outcome.get_result()
     extra = getattr(report, "extra", [])
+    setattr(item, f"rep_{report.when}", report)
 
     # Apenas na fase principal de execução
     if report.when == "call":
@@ -78,4 +321,45 @@ def pytest_runtest_makereport(item, call):
             setattr(item.session, FAIL_FAST_FLAG, True)
             print("Falha definitiva detectada. Ativando fail-fast.")
 
+    # Produtor que falhou em definitivo ou foi pulado não vai publicar nada: avisa os
+    # consumidores (em outros workers) para não esperarem (rerun tem outcome "rerun")
+    if report.when in ("setup", "call") and (report.failed or report.skipped):
+        _registrar_falha_do_produtor(item)
+
     report.extra = extra
+
+
+def _registrar_falha_do_produtor(item):
+    # Não depende da fixture: o produtor pode ter sido pulado (fail-fast) antes de pedi-la
+    marker = item.get_closest_marker("produz")
+    if marker is None or not marker.args:
+        return
+    store = _data_store_da_sessao(item.config)
+    for tipo in marker.args:
+        store.registrar_falha(tipo)
+
+
+# ====================================================
+# 🚢 Pré-busca de containers e encerramento do banco
+# ====================================================
+
+def pytest_sessionstart(session):
+    """Inicia a pré-busca de containers válidos em segundo plano (apenas nos processos que executam testes)."""
+    config = session.config
+    is_xdist_controller = getattr(config.option, "numprocesses", None) and not hasattr(config, "workerinput")
+    prefetch_enabled = os.getenv("CONTAINER_PREFETCH", "true").lower() in ("1", "true", "yes")
+    db_configured = os.getenv("DB1_SERVER") and os.getenv("DB2_SERVER")
+    if prefetch_enabled and db_configured and not is_xdist_controller:
+        from utils.container_provider import ContainerProvider
+        ContainerProvider.compartilhado().iniciar()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Para a pré-busca e fecha as conexões do banco mantidas em pool, se foram usadas."""
+    container_provider = sys.modules.get("utils.container_provider")
+    if container_provider is not None:
+        container_provider.ContainerProvider.encerrar_compartilhado()
+
+    db_utils = sys.modules.get("utils.utils")
+    if db_utils is not None:
+        db_utils.close_all_pools()
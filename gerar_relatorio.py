@@ -1,31 +1,95 @@
 # gerar_relatorio.py (versão modificada para usar caminho da imagem)
 
 import base64
+import glob
+import heapq
+import html
+import json
 import mimetypes
 import os
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from slugify import slugify
 
+from utils.artifact_store import ArtifactStore
 
-def get_screenshot_path(test_name, class_name, execution_path, screenshot_sources):
-    """Localiza o caminho absoluto do screenshot associado a um teste."""
-    try:
-        if not screenshot_sources:
-            return None
 
-        if isinstance(screenshot_sources, (str, bytes, os.PathLike)):
+class ScreenshotIndex:
+    """Índice dos screenshots de uma execução, montado com uma única varredura.
+
+    Para cada diretório de origem (em ordem de prioridade), lista uma vez as
+    entradas com `os.scandir`: subdiretórios com PNG (saída do Playwright) são
+    indexados por todos os prefixos delimitados por hífen do seu nome, e PNGs
+    soltos pelo nome sem extensão. Cada teste é resolvido por consulta direta.
+    """
+
+    def __init__(self, screenshot_sources):
+        if not screenshot_sources:
+            screenshot_sources = []
+        elif isinstance(screenshot_sources, (str, bytes, os.PathLike)):
             screenshot_sources = [screenshot_sources]
 
-        normalized_sources = []
+        self.sources = []
         for source in screenshot_sources:
             if not source:
                 continue
             abs_source = os.path.abspath(source)
-            if os.path.exists(abs_source) and abs_source not in normalized_sources:
-                normalized_sources.append(abs_source)
+            if os.path.isdir(abs_source) and abs_source not in [src for src, _, _ in self.sources]:
+                dir_prefixes, files = self._scan(abs_source)
+                self.sources.append((abs_source, dir_prefixes, files))
+
+    @staticmethod
+    def _scan(base_dir):
+        dir_prefixes = {}
+        files = {}
+        try:
+            with os.scandir(base_dir) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            return dir_prefixes, files
+
+        for entry in entries:
+            if entry.is_dir():
+                try:
+                    with os.scandir(entry.path) as children:
+                        png_files = sorted(
+                            child.name for child in children
+                            if child.is_file() and child.name.lower().endswith('.png')
+                        )
+                except OSError:
+                    continue
+                if not png_files:
+                    continue
+                png_path = os.path.join(entry.path, png_files[0])
+                parts = entry.name.split('-')
+                for size in range(1, len(parts) + 1):
+                    dir_prefixes.setdefault('-'.join(parts[:size]), png_path)
+            elif entry.is_file() and entry.name.lower().endswith('.png'):
+                files.setdefault(entry.name[:-4], entry.path)
+
+        return dir_prefixes, files
+
+    def lookup(self, directory_prefixes, file_candidates):
+        for _, dir_prefixes, files in self.sources:
+            for prefix in directory_prefixes:
+                if prefix in dir_prefixes:
+                    return dir_prefixes[prefix]
+            for slug in file_candidates:
+                if slug in files:
+                    return files[slug]
+        return None
+
+
+def get_screenshot_path(test_name, class_name, execution_path, screenshot_sources, index=None):
+    """Localiza o caminho absoluto do screenshot associado a um teste.
 
-        if not normalized_sources:
+    Passe um `ScreenshotIndex` já montado em `index` para evitar varrer os
+    diretórios a cada teste.
+    """
+    try:
+        if index is None:
+            index = ScreenshotIndex(screenshot_sources)
+        if not index.sources:
             return None
 
         file_slug = ""
@@ -52,33 +116,7 @@ def get_screenshot_path(test_name, class_name, execution_path, screenshot_source
         elif full_test_slug:
             file_candidates.append(full_test_slug)
 
-        for base_dir in normalized_sources:
-            try:
-                base_entries = os.listdir(base_dir)
-            except OSError:
-                continue
-
-            for prefix in directory_prefixes:
-                for entry in base_entries:
-                    entry_path = os.path.join(base_dir, entry)
-                    if os.path.isdir(entry_path) and entry.startswith(prefix):
-                        try:
-                            png_files = sorted(
-                                file_name
-                                for file_name in os.listdir(entry_path)
-                                if file_name.lower().endswith('.png')
-                            )
-                        except OSError:
-                            continue
-                        if png_files:
-                            return os.path.join(entry_path, png_files[0])
-
-            for slug in file_candidates:
-                png_path = os.path.join(base_dir, f"{slug}.png")
-                if os.path.isfile(png_path):
-                    return png_path
-
-        return None
+        return index.lookup(directory_prefixes, file_candidates)
     except Exception as exc:
         print(f"Erro ao processar screenshot para {test_name}: {exc}")
         return None
@@ -98,76 +136,135 @@ def build_data_uri(image_path):
         return None
 
 
-def parse_test_results(xml_input_file, screenshot_sources, execution_path=None):
+def _iter_testcases(xml_input_file, on_suite_start=None):
+    """Percorre os <testcase> do JUnit com iterparse, sem manter a árvore em memória.
+
+    Gera dicionários simples (nome, classe, tempo, falha, pulado). Cada elemento
+    é descartado logo após ser lido, então o consumo de memória não cresce com
+    o número de testes.
+    """
+    suite = None
+    for event, elem in ET.iterparse(xml_input_file, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == 'testsuite':
+                suite = elem
+                if on_suite_start:
+                    on_suite_start(elem.attrib)
+            continue
+
+        if elem.tag != 'testcase':
+            continue
+
+        failure = elem.find('failure')
+        if failure is None:
+            failure = elem.find('error')
+        yield {
+            'name': elem.get('name'),
+            'classname': elem.get('classname'),
+            'time': float(elem.get('time', 0)),
+            'failure': failure.text if failure is not None else None,
+            'failed': failure is not None,
+            'skipped': elem.find('skipped') is not None,
+        }
+
+        elem.clear()
+        if suite is not None and len(suite) and suite[-1] is elem:
+            suite.remove(elem)
+
+
+def _screenshot_links(screenshot_abs, artifact_store, self_contained):
+    """Retorna `(src, href)` do screenshot: miniatura e original no artifact store.
+
+    Sem store, embute a imagem original como data URI (comportamento antigo).
+    No modo autônomo, embute a miniatura e o original como data URIs, sem
+    gravar nada em `artifacts/`.
+    """
+    if artifact_store is None:
+        data_uri = build_data_uri(screenshot_abs)
+        return data_uri, data_uri
+
+    artifact = artifact_store.embed(screenshot_abs) if self_contained else artifact_store.add(screenshot_abs)
+    if not artifact:
+        return None, None
+    return artifact['thumbnail'], artifact['original']
+
+
+def _build_result(case, summary, execution_base, screenshot_index, used_screenshots,
+                  artifact_store=None, self_contained=False):
+    """Converte um testcase em linha do relatório e atualiza o resumo."""
+    summary['total'] += 1
+    result = {
+        'name': case['name'],
+        'status': '✅ Passou',
+        'details': '',
+        'screenshot_src': None,
+        'screenshot_href': None,
+        'time': f"{case['time']:.2f}s"
+    }
+
+    if case['failed']:
+        summary['failed'] += 1
+        result['status'] = '❌ Falhou'
+        result['details'] = case['failure']
+        screenshot_abs = get_screenshot_path(
+            case['name'], case['classname'], execution_base, None, index=screenshot_index
+        )
+        if screenshot_abs:
+            src, href = _screenshot_links(screenshot_abs, artifact_store, self_contained)
+            if src:
+                result['screenshot_src'] = src
+                result['screenshot_href'] = href
+                used_screenshots.append(screenshot_abs)
+    elif case['skipped']:
+        summary['skipped'] += 1
+        result['status'] = '⚠️ Pulou'
+    else:
+        summary['passed'] += 1
+
+    return result
+
+
+def _new_summary():
+    return {'total': 0, 'passed': 0, 'failed': 0, 'skipped': 0, 'duration': 0.0}
+
+
+def parse_test_results(xml_input_file, screenshot_sources, execution_path=None,
+                       artifact_store=None, self_contained=False):
     """Lê o arquivo XML e extrai os dados de cada teste, agrupando por arquivo."""
-    tree = ET.parse(xml_input_file)
-    root = tree.getroot()
     execution_base = os.path.abspath(execution_path or os.path.dirname(xml_input_file))
     test_results_by_file = {}
-    summary = {
-        'total': 0,
-        'passed': 0,
-        'failed': 0,
-        'skipped': 0,
-        'duration': float(root.find('testsuite').get('time', 0))
-    }
+    summary = _new_summary()
     used_screenshots = []
+    screenshot_index = ScreenshotIndex(screenshot_sources)
 
-    for testcase in root.findall('.//testcase'):
-        summary['total'] += 1
-        name = testcase.get('name')
-        class_name = testcase.get('classname')
-        time_spent = float(testcase.get('time', 0))
-
-        result = {
-            'name': name,
-            'status': '✅ Passou',
-            'details': '',
-            'screenshot_data_uri': None,
-            'time': f"{time_spent:.2f}s"
-        }
+    def on_suite_start(attrib):
+        if not summary['duration']:
+            summary['duration'] = float(attrib.get('time', 0))
 
-        failure = testcase.find('failure')
-        if failure is not None:
-            summary['failed'] += 1
-            result['status'] = '❌ Falhou'
-            result['details'] = failure.text
-            screenshot_abs = get_screenshot_path(name, class_name, execution_base, screenshot_sources)
-            if screenshot_abs:
-                data_uri = build_data_uri(screenshot_abs)
-                if data_uri:
-                    result['screenshot_data_uri'] = data_uri
-                    used_screenshots.append(screenshot_abs)
-        elif testcase.find('skipped') is not None:
-            summary['skipped'] += 1
-            result['status'] = '⚠️ Pulou'
-        else:
-            summary['passed'] += 1
-
-        test_results_by_file.setdefault(class_name, []).append(result)
+    for case in _iter_testcases(xml_input_file, on_suite_start):
+        result = _build_result(
+            case, summary, execution_base, screenshot_index, used_screenshots, artifact_store, self_contained
+        )
+        test_results_by_file.setdefault(case['classname'], []).append(result)
 
     return summary, test_results_by_file, used_screenshots
 
 
-def generate_html_report(summary, results_by_file, html_output_file):
-    """Gera o arquivo HTML final a partir dos dados processados."""
-    tables = []
-    for file_name, results in results_by_file.items():
-        rows = []
-        for res in results:
-            screenshot_html = ''
-            if res['screenshot_data_uri']:
-                screenshot_html = (
-                    '<h4>Screenshot:</h4>'
-                    f'<img class="screenshot" src="{res["screenshot_data_uri"]}" alt="Screenshot">'
-                )
+def _render_row(res):
+    screenshot_html = ''
+    if res['screenshot_src']:
+        screenshot_html = (
+            '<h4>Screenshot:</h4>'
+            f'<a href="{res["screenshot_href"]}" target="_blank">'
+            f'<img class="screenshot" loading="lazy" src="{res["screenshot_src"]}" alt="Screenshot"></a>'
+        )
 
-            details_toggle = (
-                '<span class="details-toggle" onclick="toggleDetails(this)">Mostrar</span>'
-                if res['details'] else 'N/A'
-            )
+    details_toggle = (
+        '<span class="details-toggle" onclick="toggleDetails(this)">Mostrar</span>'
+        if res['details'] else 'N/A'
+    )
 
-            row_html = f"""
+    return f"""
                 <tr>
                     <td>{res['name']}</td>
                     <td class="status-{res['status'].split(' ')[1].lower()}">{res['status']}</td>
@@ -181,47 +278,54 @@ def generate_html_report(summary, results_by_file, html_output_file):
                     </td>
                 </tr>
             """
-            rows.append(row_html)
 
-        table_html = f"""
-        <h3>Arquivo: {file_name.replace('.', '/')}.py</h3>
+
+def _render_table_start(file_name):
+    return f"""
+        <h3>Arquivo: {(file_name or '').replace('.', '/')}.py</h3>
         <table>
             <thead><tr><th>Teste</th><th>Status</th><th>Duração</th><th>Detalhes</th></tr></thead>
             <tbody>
-                {''.join(rows)}
+    """
+
+
+_TABLE_END = """
             </tbody>
         </table>
         """
-        tables.append(table_html)
 
-    tables_html = ''.join(tables)
 
-    html_template = f"""
+_STYLE = """
+        <style>
+            body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; margin: 0; background-color: #f4f7f9; color: #333; }
+            .container { max-width: 1200px; margin: 20px auto; padding: 20px; background-color: #fff; box-shadow: 0 2px 10px rgba(0,0,0,0.1); border-radius: 8px; }
+            h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }
+            h2, h3 { color: #2c3e50; }
+            h3 { margin-top: 30px; border-bottom: 1px solid #ccc; padding-bottom: 5px; }
+            .summary { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 20px; margin-bottom: 30px; }
+            .card { background-color: #ecf0f1; padding: 20px; border-radius: 8px; text-align: center; }
+            .card .number { font-size: 2.5em; font-weight: bold; }
+            .card.passed .number { color: #2ecc71; } .card.failed .number { color: #e74c3c; } .card.total .number { color: #3498db; } .card.duration .number { color: #f39c12; }
+            .card .label { font-size: 1em; color: #7f8c8d; }
+            table { width: 100%; border-collapse: collapse; margin-bottom: 20px; } th, td { padding: 12px 15px; text-align: left; border-bottom: 1px solid #ddd; }
+            th { background-color: #34495e; color: #fff; } tr:nth-child(even) { background-color: #f2f2f2; }
+            .status-passou { color: #27ae60; font-weight: bold; } .status-falhou { color: #c0392b; font-weight: bold; } .status-pulou { color: #7f8c8d; font-weight: bold; }
+            .details-toggle { cursor: pointer; color: #3498db; text-decoration: underline; }
+            .details-content { display: none; background-color: #fdfdfd; padding: 15px; margin-top: 10px; border-left: 4px solid #3498db; }
+            .details-content pre { white-space: pre-wrap; word-wrap: break-word; background-color: #ecf0f1; padding: 10px; border-radius: 4px; }
+            .screenshot { max-width: 100%; border: 1px solid #ddd; border-radius: 4px; margin-top: 10px; }
+            footer { text-align: center; margin-top: 20px; padding: 10px; font-size: 0.9em; color: #95a5a6; }
+        </style>
+"""
+
+
+def _render_document_start(summary):
+    return f"""
     <!DOCTYPE html>
     <html lang="pt-BR">
     <head>
         <meta charset="UTF-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><title>Relatório de Testes</title>
-        <style>
-            body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; margin: 0; background-color: #f4f7f9; color: #333; }}
-            .container {{ max-width: 1200px; margin: 20px auto; padding: 20px; background-color: #fff; box-shadow: 0 2px 10px rgba(0,0,0,0.1); border-radius: 8px; }}
-            h1 {{ color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }}
-            h2, h3 {{ color: #2c3e50; }}
-            h3 {{ margin-top: 30px; border-bottom: 1px solid #ccc; padding-bottom: 5px; }}
-            .summary {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 20px; margin-bottom: 30px; }}
-            .card {{ background-color: #ecf0f1; padding: 20px; border-radius: 8px; text-align: center; }}
-            .card .number {{ font-size: 2.5em; font-weight: bold; }}
-            .card.passed .number {{ color: #2ecc71; }} .card.failed .number {{ color: #e74c3c; }} .card.total .number {{ color: #3498db; }} .card.duration .number {{ color: #f39c12; }}
-            .card .label {{ font-size: 1em; color: #7f8c8d; }}
-            table {{ width: 100%; border-collapse: collapse; margin-bottom: 20px; }} th, td {{ padding: 12px 15px; text-align: left; border-bottom: 1px solid #ddd; }}
-            th {{ background-color: #34495e; color: #fff; }} tr:nth-child(even) {{ background-color: #f2f2f2; }}
-            .status-passou {{ color: #27ae60; font-weight: bold; }} .status-falhou {{ color: #c0392b; font-weight: bold; }} .status-pulou {{ color: #7f8c8d; font-weight: bold; }}
-            .details-toggle {{ cursor: pointer; color: #3498db; text-decoration: underline; }}
-            .details-content {{ display: none; background-color: #fdfdfd; padding: 15px; margin-top: 10px; border-left: 4px solid #3498db; }}
-            .details-content pre {{ white-space: pre-wrap; word-wrap: break-word; background-color: #ecf0f1; padding: 10px; border-radius: 4px; }}
-            .screenshot {{ max-width: 100%; border: 1px solid #ddd; border-radius: 4px; margin-top: 10px; }}
-            footer {{ text-align: center; margin-top: 20px; padding: 10px; font-size: 0.9em; color: #95a5a6; }}
-        </style>
-    </head>
+{_STYLE}    </head>
     <body>
         <div class="container">
             <h1>Relatório de Testes Automatizados</h1><p>Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
@@ -232,22 +336,173 @@ def generate_html_report(summary, results_by_file, html_output_file):
                 <div class="card duration"><div class="number">{summary['duration']:.2f}s</div><div class="label">Duração</div></div>
             </div>
             <h2>Resultados Detalhados</h2>
-            {tables_html}
+    """
+
+
+_DOCUMENT_END = """
         </div>
         <footer>Relatório gerado nativamente com Python.</footer>
         <script>
-            function toggleDetails(element) {{
+            function toggleDetails(element) {
                 const content = element.nextElementSibling;
-                if (content.style.display === "block") {{ content.style.display = "none"; element.textContent = "Mostrar"; }}
-                else {{ content.style.display = "block"; element.textContent = "Esconder"; }}
-            }}
+                if (content.style.display === "block") { content.style.display = "none"; element.textContent = "Mostrar"; }
+                else { content.style.display = "block"; element.textContent = "Esconder"; }
+            }
         </script>
     </body>
     </html>
     """
+
+
+def find_span_files(execution_path):
+    """Arquivos JSONL de spans gravados pelo conftest (TRACE_SPANS=true) na execução."""
+    patterns = [
+        os.path.join(execution_path, 'spans*.jsonl'),
+        os.path.join(execution_path, 'test-results', 'spans*.jsonl'),
+    ]
+    return sorted(path for pattern in patterns for path in glob.glob(pattern))
+
+
+def summarize_spans(span_files, limit=20):
+    """Lê os spans em streaming e retorna `(mais_lentos, por_nome)`.
+
+    `mais_lentos` são os `limit` spans individuais de maior duração;
+    `por_nome` agrega quantidade, total e máximo por nome de ação, do maior
+    total para o menor.
+    """
+    slowest = []
+    by_name = {}
+    for span_file in span_files:
+        try:
+            with open(span_file, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        span = json.loads(line)
+                        duration = float(span['duracao'])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    entry = (duration, span.get('nome', ''), span.get('alvo', ''),
+                             span.get('teste', ''), span.get('resultado', ''))
+                    if len(slowest) < limit:
+                        heapq.heappush(slowest, entry)
+                    else:
+                        heapq.heappushpop(slowest, entry)
+
+                    stats = by_name.setdefault(entry[1], {'count': 0, 'total': 0.0, 'max': 0.0})
+                    stats['count'] += 1
+                    stats['total'] += duration
+                    stats['max'] = max(stats['max'], duration)
+        except OSError as exc:
+            print(f"Aviso: não foi possível ler os spans em {span_file}: {exc}")
+
+    aggregated = sorted(by_name.items(), key=lambda item: item[1]['total'], reverse=True)[:limit]
+    return sorted(slowest, reverse=True), aggregated
+
+
+def _render_slowest_steps(slowest, aggregated):
+    if not slowest:
+        return ''
+
+    rows = ''.join(
+        f"<tr><td>{html.escape(name)}</td><td><code>{html.escape(target)}</code></td>"
+        f"<td>{html.escape(test or '')}</td><td>{html.escape(outcome)}</td><td>{duration:.2f}s</td></tr>"
+        for duration, name, target, test, outcome in slowest
+    )
+    aggregated_rows = ''.join(
+        f"<tr><td>{html.escape(name)}</td><td>{stats['count']}</td><td>{stats['total']:.2f}s</td>"
+        f"<td>{stats['total'] / stats['count']:.2f}s</td><td>{stats['max']:.2f}s</td></tr>"
+        for name, stats in aggregated
+    )
+    return f"""
+        <h2>Etapas Mais Lentas</h2>
+        <table>
+            <thead><tr><th>Ação</th><th>Alvo</th><th>Teste</th><th>Resultado</th><th>Duração</th></tr></thead>
+            <tbody>{rows}</tbody>
+        </table>
+        <h3>Tempo Acumulado por Ação</h3>
+        <table>
+            <thead><tr><th>Ação</th><th>Chamadas</th><th>Total</th><th>Média</th><th>Máximo</th></tr></thead>
+            <tbody>{aggregated_rows}</tbody>
+        </table>
+        """
+
+
+def generate_html_report(summary, results_by_file, html_output_file):
+    """Gera o arquivo HTML final a partir dos dados processados."""
     with open(html_output_file, 'w', encoding='utf-8') as f:
-        f.write(html_template)
+        f.write(_render_document_start(summary))
+        for file_name, results in results_by_file.items():
+            f.write(_render_table_start(file_name))
+            for res in results:
+                f.write(_render_row(res))
+            f.write(_TABLE_END)
+        f.write(_DOCUMENT_END)
+    print(f"Relatório gerado com sucesso em: {html_output_file}")
+
+
+def generate_html_report_streaming(xml_input_file, screenshot_sources, html_output_file, execution_path=None,
+                                   artifact_store=None, self_contained=False, span_files=None):
+    """Lê o JUnit e escreve o relatório em uma única passada, com memória constante por teste.
+
+    As linhas são gravadas num arquivo temporário à medida que os testes são
+    lidos, guardando apenas a posição de cada trecho por arquivo de teste; o
+    resumo é calculado na mesma passada. Ao final, o cabeçalho é escrito e os
+    trechos são copiados agrupados, uma tabela por arquivo (com pytest-xdist
+    os testes de arquivos diferentes chegam intercalados no JUnit). Com
+    `span_files`, acrescenta a seção de etapas mais lentas.
+    Retorna `(summary, used_screenshots)`.
+    """
+    execution_base = os.path.abspath(execution_path or os.path.dirname(xml_input_file))
+    summary = _new_summary()
+    used_screenshots = []
+    screenshot_index = ScreenshotIndex(screenshot_sources)
+
+    def on_suite_start(attrib):
+        if not summary['duration']:
+            summary['duration'] = float(attrib.get('time', 0))
+
+    rows_file = f"{html_output_file}.rows.tmp"
+    # arquivo de teste -> trechos [início, tamanho] no arquivo temporário (ordem da primeira aparição)
+    segments_by_file = {}
+    try:
+        with open(rows_file, 'w+b') as rows:
+            for case in _iter_testcases(xml_input_file, on_suite_start):
+                result = _build_result(
+                    case, summary, execution_base, screenshot_index, used_screenshots, artifact_store, self_contained
+                )
+                data = _render_row(result).encode('utf-8')
+                offset = rows.tell()
+                segments = segments_by_file.setdefault(case['classname'], [])
+                if segments and segments[-1][0] + segments[-1][1] == offset:
+                    segments[-1][1] += len(data)  # continua o trecho anterior do mesmo arquivo
+                else:
+                    segments.append([offset, len(data)])
+                rows.write(data)
+
+            with open(html_output_file, 'wb') as f:
+                f.write(_render_document_start(summary).encode('utf-8'))
+                for file_name, segments in segments_by_file.items():
+                    f.write(_render_table_start(file_name).encode('utf-8'))
+                    for offset, length in segments:
+                        rows.seek(offset)
+                        while length > 0:
+                            chunk = rows.read(min(length, 1024 * 1024))
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            length -= len(chunk)
+                    f.write(_TABLE_END.encode('utf-8'))
+                if span_files:
+                    f.write(_render_slowest_steps(*summarize_spans(span_files)).encode('utf-8'))
+                f.write(_DOCUMENT_END.encode('utf-8'))
+    finally:
+        try:
+            os.remove(rows_file)
+        except OSError:
+            pass
+
     print(f"Relatório gerado com sucesso em: {html_output_file}")
+    return summary, used_screenshots
 
 
 def cleanup_screenshots(file_paths):
@@ -292,9 +547,16 @@ def main(execution_path):
         os.path.join(project_root, 'screenshots'),
     ]
 
-    summary, results_by_file, used_screenshots = parse_test_results(xml_file, screenshot_sources, execution_path)
-    generate_html_report(summary, results_by_file, html_output_file)
+    # Screenshots vão para o artifact store da execução (deduplicados e com miniatura);
+    # REPORT_SELF_CONTAINED=true embute as miniaturas e gera um HTML único.
+    self_contained = os.getenv("REPORT_SELF_CONTAINED", "false").lower() in ("1", "true", "yes")
+    artifact_store = ArtifactStore(execution_path)
+
+    summary, used_screenshots = generate_html_report_streaming(
+        xml_file, screenshot_sources, html_output_file, execution_path, artifact_store, self_contained,
+        span_files=find_span_files(execution_path),
+    )
     removed = cleanup_screenshots(used_screenshots)
     if removed:
-        print(f"Screenshots removidos após embutir no relatório: {removed}")
+        print(f"Screenshots removidos após copiar para o artifact store: {removed}")
 
@@ -1,24 +1,128 @@
+import argparse
 import json
 import base64
-import re
+import hashlib
+import os
 from pathlib import Path
 from bs4 import BeautifulSoup
 from datetime import datetime
 import requests
 
+from utils.artifact_store import ArtifactStore
+
 # --- Constantes para o Bootstrap (para um relatório autônomo) ---
 BOOTSTRAP_CSS_URL = "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css"
 BOOTSTRAP_JS_URL = "https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js"
 
-def get_embedded_assets():
-    """Busca o CSS e JS do Bootstrap para embutir no relatório."""
+# Hashes SRI publicados pelo Bootstrap 5.3.2: conferem o conteúdo baixado e o do cache
+ASSET_INTEGRITY = {
+    BOOTSTRAP_CSS_URL: "sha384-T3c6CoIi6uLrA9TneNEoa7RxnatzjcDSCmG1MXxSR1GAsXEV/Dwwykc2MPK8M2HN",
+    BOOTSTRAP_JS_URL: "sha384-C6RzsynM9kWDrMNeT87bh95OGNyZPhcTNXj1NW7RuBCsyN/o0jlpcV8Qyq46cDfL",
+}
+
+# Cache local dos assets (versionado para uso em CI sem internet; popule-o
+# com `python modificador_relatorio.py --baixar-assets`)
+ASSET_CACHE_DIR = Path(os.getenv("REPORT_ASSET_CACHE", Path(__file__).resolve().parent / "assets" / "vendor"))
+ASSET_TIMEOUT = float(os.getenv("REPORT_ASSET_TIMEOUT", "10"))
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "false").lower() in ("1", "true", "yes")
+
+
+def _integrity(content: bytes, algorithm: str = "sha384") -> str:
+    digest = hashlib.new(algorithm, content).digest()
+    return f"{algorithm}-{base64.b64encode(digest).decode('ascii')}"
+
+
+def _asset_cache_path(url: str) -> Path:
+    url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    return ASSET_CACHE_DIR / f"{url_hash}-{url.rsplit('/', 1)[-1]}"
+
+
+def load_asset(url: str, offline: bool = False) -> str:
+    """Retorna o conteúdo do asset a partir do cache local, baixando-o uma única vez.
+
+    O arquivo em cache é identificado pela URL e validado pelo hash do conteúdo
+    (SRI conhecido ou gravado no momento do download). Em modo offline nunca
+    acessa a rede e levanta RuntimeError se o asset não estiver no cache.
+    """
+    path = _asset_cache_path(url)
+    integrity_path = path.with_name(path.name + ".integrity")
+    expected = ASSET_INTEGRITY.get(url)
+
+    if path.is_file():
+        content = path.read_bytes()
+        if expected is None and integrity_path.is_file():
+            expected = integrity_path.read_text(encoding="utf-8").strip()
+        if expected is None or _integrity(content, expected.split("-", 1)[0]) == expected:
+            return content.decode("utf-8")
+        print(f"Aviso: checksum do asset em cache não confere ({path}). Descartando.")
+        path.unlink()
+
+    if offline:
+        raise RuntimeError(
+            f"Modo offline e asset ausente do cache ({path}). Rode "
+            f"`python modificador_relatorio.py --baixar-assets` com acesso à rede e versione {ASSET_CACHE_DIR}."
+        )
+
     try:
-        css = requests.get(BOOTSTRAP_CSS_URL).text
-        js = requests.get(BOOTSTRAP_JS_URL).text
-        return css, js
+        response = requests.get(url, timeout=ASSET_TIMEOUT)
+        response.raise_for_status()
     except requests.exceptions.RequestException as e:
-        print(f"Aviso: Não foi possível buscar os assets da CDN: {e}. O relatório não será estilizado.")
-        return "", ""
+        print(f"Aviso: Não foi possível buscar o asset da CDN: {e}. O relatório não será estilizado.")
+        return ""
+
+    content = response.content
+    if expected and _integrity(content, expected.split("-", 1)[0]) != expected:
+        print(f"Aviso: checksum do asset baixado não confere ({url}). Ignorando.")
+        return ""
+
+    ASSET_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+    if url not in ASSET_INTEGRITY:
+        integrity_path.write_text(_integrity(content), encoding="utf-8")
+    return content.decode("utf-8")
+
+
+def get_embedded_assets(offline: bool | None = None):
+    """Busca o CSS e JS do Bootstrap (do cache local sempre que possível)."""
+    if offline is None:
+        offline = _env_flag("REPORT_OFFLINE")
+    return load_asset(BOOTSTRAP_CSS_URL, offline), load_asset(BOOTSTRAP_JS_URL, offline)
+
+
+def baixar_assets() -> bool:
+    """Popula o cache local com os assets do relatório, conferindo o SRI. Retorna True se todos estão ok."""
+    ok = True
+    for url in (BOOTSTRAP_CSS_URL, BOOTSTRAP_JS_URL):
+        if load_asset(url):
+            print(f"OK: {_asset_cache_path(url)} ({ASSET_INTEGRITY.get(url, 'sem SRI publicado')})")
+        else:
+            ok = False
+    return ok
+
+
+def write_report_assets(output_dir: Path, css: str, js: str) -> tuple[str | None, str | None]:
+    """Grava os assets uma vez no diretório do relatório e retorna os caminhos relativos.
+
+    Se o arquivo já existir com o mesmo conteúdo, não é regravado.
+    """
+    assets_dir = output_dir / "assets"
+    links = []
+    for content, file_name in ((css, "bootstrap.min.css"), (js, "bootstrap.bundle.min.js")):
+        if not content:
+            links.append(None)
+            continue
+        target = assets_dir / file_name
+        data = content.encode("utf-8")
+        if not target.is_file() or target.stat().st_size != len(data) or target.read_bytes() != data:
+            assets_dir.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+        links.append(f"assets/{file_name}")
+    return links[0], links[1]
 
 def image_to_base64(image_path: Path) -> str | None:
     """Converte um arquivo de imagem para um data URI Base64."""
@@ -32,8 +136,15 @@ def image_to_base64(image_path: Path) -> str | None:
         encoded_string = base64.b64encode(f.read()).decode("utf-8")
     return f"data:{mime_type};base64,{encoded_string}"
 
-def process_test_data(data: dict, base_dir: Path) -> dict:
-    """Processa os dados do teste, embutindo imagens como Base64."""
+def process_test_data(data: dict, base_dir: Path, artifact_store: ArtifactStore | None = None,
+                      self_contained: bool = False) -> dict:
+    """Processa os dados do teste, resolvendo as imagens dos extras.
+
+    Com `artifact_store`, as imagens são deduplicadas e referenciadas pela
+    miniatura (`content`) e pelo original (`href`); no modo autônomo, ambos
+    são embutidos como data URIs e nada é gravado em `artifacts/`. Sem store,
+    embute o original em Base64.
+    """
     for test_id, test_results in data.get("tests", {}).items():
         for result in test_results:
             for extra in result.get("extras", []):
@@ -41,42 +152,61 @@ def process_test_data(data: dict, base_dir: Path) -> dict:
                     # O caminho no JSON é "screenshots\\arquivo.png". Pathlib lida com isso.
                     relative_path = Path(extra["content"])
                     full_path = base_dir / relative_path
-                    base64_uri = image_to_base64(full_path)
-                    if base64_uri:
-                        extra["content"] = base64_uri
+                    if artifact_store is None:
+                        base64_uri = image_to_base64(full_path)
+                        if base64_uri:
+                            extra["content"] = base64_uri
+                        continue
+
+                    # Autônomo: tudo embutido, nada gravado em artifacts/
+                    artifact = artifact_store.embed(full_path) if self_contained else artifact_store.add(full_path)
+                    if not artifact:
+                        continue
+                    extra["content"] = artifact["thumbnail"]
+                    extra["href"] = artifact["original"]
     return data
 
-def generate_modern_html(data: dict, embedded_css: str, embedded_js: str) -> str:
-    """Gera um novo relatório HTML moderno a partir dos dados processados."""
-    
-    # --- Funções auxiliares para o template ---
-    def get_status_badge(status):
-        status_map = {
-            "Passed": "success",
-            "Failed": "danger",
-            "Skipped": "secondary",
-            "Error": "danger",
-            "XFailed": "warning",
-            "XPassed": "info",
-        }
-        badge_class = status_map.get(status, "primary")
-        return f'<span class="badge bg-{badge_class}">{status}</span>'
-
-    def format_log(log_text):
-        # Escapa caracteres HTML para evitar problemas de renderização
-        escaped_log = (
-            log_text.replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-        )
-        # Destaca as linhas de erro (começando com 'E ' ou '> ')
-        highlighted_log = re.sub(
-            r"^(E .*|&gt; .*)$",
-            r'<span class="text-danger fw-bold">\1</span>',
-            escaped_log,
-            flags=re.MULTILINE,
-        )
-        return f'<pre class="bg-light p-3 rounded small"><code>{highlighted_log}</code></pre>'
+def _build_tests_payload(data: dict) -> str:
+    """Serializa os testes uma única vez num JSON compacto para o script do relatório.
+
+    Cada teste vira `[id, índice do status, duração, log, [[src, href], ...]]`;
+    os status distintos ficam numa lista à parte. `<` é escapado para que o
+    conteúdo nunca feche a tag `<script>` que o contém.
+    """
+    statuses = []
+    status_index = {}
+    rows = []
+    for test_id, test_results in data["tests"].items():
+        result = test_results[0]  # Assume um resultado por teste
+        status = result["result"]
+        if status not in status_index:
+            status_index[status] = len(statuses)
+            statuses.append(status)
+        images = [
+            [extra["content"], extra.get("href", extra["content"])]
+            for extra in result.get("extras", [])
+            if extra.get("format_type") == "image"
+        ]
+        rows.append([test_id, status_index[status], result.get("duration", ""), result.get("log") or "", images])
+
+    payload = json.dumps({"statuses": statuses, "tests": rows}, ensure_ascii=False, separators=(",", ":"))
+    return payload.replace("<", "\\u003c")
+
+
+def generate_modern_html(data: dict, embedded_css: str = "", embedded_js: str = "",
+                         css_href: str | None = None, js_src: str | None = None) -> str:
+    """Gera um novo relatório HTML moderno a partir dos dados processados.
+
+    Com `css_href`/`js_src`, referencia os assets gravados ao lado do relatório;
+    caso contrário, embute `embedded_css`/`embedded_js` (arquivo autônomo).
+
+    Os testes são embutidos uma única vez como JSON e renderizados por uma
+    lista virtualizada: apenas as linhas visíveis existem no DOM, e filtro e
+    busca operam sobre arrays em memória, então o relatório abre rápido
+    mesmo com dezenas de milhares de testes.
+    """
+    css_tag = f'<link rel="stylesheet" href="{css_href}">' if css_href else f"<style>{embedded_css}</style>"
+    js_tag = f'<script src="{js_src}"></script>' if js_src else f"<script>{embedded_js}</script>"
 
     # --- Calcula o Resumo ---
     all_tests = [result for results_list in data["tests"].values() for result in results_list]
@@ -96,44 +226,7 @@ def generate_modern_html(data: dict, embedded_css: str, embedded_js: str) -> str
             val_str = str(value)
         env_html += f"<tr><th class='w-25'>{key}</th><td>{val_str}</td></tr>"
 
-    # Accordion de Resultados dos Testes
-    tests_html = ""
-    for i, (test_id, test_results) in enumerate(data["tests"].items()):
-        result = test_results[0] # Assume um resultado por teste
-        status = result["result"]
-        
-        # Conteúdo do corpo do Accordion
-        body_content = ""
-        if result.get("log"):
-            body_content += f'<h6>Traceback & Log</h6>{format_log(result["log"])}'
-        
-        for extra in result.get("extras", []):
-            if extra["format_type"] == "image":
-                body_content += f'''
-                    <h6 class="mt-3">Screenshot da Falha</h6>
-                    <a href="{extra["content"]}" target="_blank" title="Clique para abrir em nova aba">
-                        <img src="{extra["content"]}" class="img-fluid rounded border" alt="Screenshot para {test_id}">
-                    </a>
-                '''
-
-        tests_html += f"""
-        <div class="accordion-item" data-status="{status}">
-            <h2 class="accordion-header" id="heading-{i}">
-                <button class="accordion-button {'collapsed' if status == 'Passed' else ''}" type="button" data-bs-toggle="collapse" data-bs-target="#collapse-{i}" aria-expanded="{'true' if status != 'Passed' else 'false'}" aria-controls="collapse-{i}">
-                    <div class="d-flex justify-content-between w-100 align-items-center pe-3">
-                        <span class="font-monospace text-truncate" style="max-width: 65%;">{test_id}</span>
-                        <span class="ms-auto me-3">{get_status_badge(status)}</span>
-                        <span class="text-muted small">{result['duration']}</span>
-                    </div>
-                </button>
-            </h2>
-            <div id="collapse-{i}" class="accordion-collapse collapse {'show' if status != 'Passed' else ''}" aria-labelledby="heading-{i}">
-                <div class="accordion-body">
-                    {body_content if body_content else "<p>Sem detalhes adicionais.</p>"}
-                </div>
-            </div>
-        </div>
-        """
+    tests_payload = _build_tests_payload(data)
 
     # --- Monta o HTML Final ---
     return f"""
@@ -143,8 +236,8 @@ def generate_modern_html(data: dict, embedded_css: str, embedded_js: str) -> str
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Relatório de Testes Moderno</title>
+        {css_tag}
         <style>
-            {embedded_css}
             body {{ padding-top: 2rem; padding-bottom: 2rem; background-color: #f8f9fa; }}
             .accordion-button:not(.collapsed) {{ background-color: #e9ecef; }}
             .accordion-button:focus {{ box-shadow: none; }}
@@ -161,6 +254,14 @@ def generate_modern_html(data: dict, embedded_css: str, embedded_js: str) -> str
             .filter-card.active {{
                 border: 3px solid #0d6efd; /* Cor primária do Bootstrap */
             }}
+            /* Lista virtualizada: só as linhas visíveis são renderizadas */
+            #test-list {{ position: relative; height: 60vh; overflow-y: auto; background-color: #fff; }}
+            #test-list-spacer {{ position: relative; }}
+            .test-row {{
+                position: absolute; left: 0; right: 0; height: 44px; padding: 0 1rem;
+                display: flex; align-items: center; border-bottom: 1px solid #dee2e6; cursor: pointer;
+            }}
+            .test-row:hover, .test-row.selected {{ background-color: #e9ecef; }}
         </style>
     </head>
     <body>
@@ -214,65 +315,144 @@ def generate_modern_html(data: dict, embedded_css: str, embedded_js: str) -> str
                 </div>
             </div>
 
-            <h2>Resultados dos Testes</h2>
-            <div class="accordion" id="testResultsAccordion">
-                {tests_html}
+            <div class="d-flex justify-content-between align-items-center mb-2">
+                <h2 class="mb-0">Resultados dos Testes</h2>
+                <input id="test-search" type="search" class="form-control w-50" placeholder="Buscar teste...">
+            </div>
+            <div id="test-list" class="border rounded">
+                <div id="test-list-spacer"></div>
             </div>
             <div id="no-tests-message" class="alert alert-info mt-3" style="display: none;">
                 Nenhum teste corresponde ao filtro selecionado.
             </div>
+            <div id="test-details" class="card mt-3" style="display: none;">
+                <div class="card-header font-monospace" id="test-details-title"></div>
+                <div class="card-body" id="test-details-body"></div>
+            </div>
         </main>
-        <script>
-            {embedded_js}
-        </script>
+        <script type="application/json" id="report-data">{tests_payload}</script>
+        {js_tag}
         <script>
         document.addEventListener('DOMContentLoaded', () => {{
+            const ROW_HEIGHT = 44;
+            const BUFFER_ROWS = 10;
+            const STATUS_BADGE = {{
+                Passed: 'success', Failed: 'danger', Skipped: 'secondary',
+                Error: 'danger', XFailed: 'warning', XPassed: 'info',
+            }};
+
+            const report = JSON.parse(document.getElementById('report-data').textContent);
+            const tests = report.tests;
+            const statuses = report.statuses;
+            const searchKeys = tests.map(test => test[0].toLowerCase());
+
+            const list = document.getElementById('test-list');
+            const spacer = document.getElementById('test-list-spacer');
+            const searchInput = document.getElementById('test-search');
             const filterCards = document.querySelectorAll('.filter-card');
-            const testItems = document.querySelectorAll('#testResultsAccordion .accordion-item');
             const noTestsMessage = document.getElementById('no-tests-message');
+            const details = document.getElementById('test-details');
+
+            let filter = 'all';
+            let visible = [];
+            let selected = -1;
+            let scheduled = false;
+
+            const escapeHtml = text => String(text)
+                .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+
+            function badge(status) {{
+                return `<span class="badge bg-${{STATUS_BADGE[status] || 'primary'}}">${{escapeHtml(status)}}</span>`;
+            }}
+
+            function matchesFilter(status) {{
+                // Considera 'Failed' e 'Error' como falhas
+                if (filter === 'all') return true;
+                if (filter === 'Failed') return status === 'Failed' || status === 'Error';
+                return status === filter;
+            }}
 
-            function updateActiveCard(activeCard) {{
-                filterCards.forEach(card => card.classList.remove('active'));
-                if (activeCard) {{
-                    activeCard.classList.add('active');
+            function applyFilter() {{
+                const term = searchInput.value.trim().toLowerCase();
+                visible = [];
+                for (let i = 0; i < tests.length; i++) {{
+                    if (matchesFilter(statuses[tests[i][1]]) && (!term || searchKeys[i].includes(term))) {{
+                        visible.push(i);
+                    }}
                 }}
+                spacer.style.height = `${{visible.length * ROW_HEIGHT}}px`;
+                noTestsMessage.style.display = visible.length === 0 ? 'block' : 'none';
+                list.scrollTop = 0;
+                render();
             }}
 
+            function render() {{
+                scheduled = false;
+                const first = Math.max(0, Math.floor(list.scrollTop / ROW_HEIGHT) - BUFFER_ROWS);
+                const last = Math.min(visible.length, Math.ceil((list.scrollTop + list.clientHeight) / ROW_HEIGHT) + BUFFER_ROWS);
+                const rows = [];
+                for (let position = first; position < last; position++) {{
+                    const index = visible[position];
+                    const [testId, statusIndex, duration] = tests[index];
+                    rows.push(
+                        `<div class="test-row${{index === selected ? ' selected' : ''}}" data-index="${{index}}" style="top: ${{position * ROW_HEIGHT}}px">` +
+                        `<span class="font-monospace text-truncate" style="max-width: 65%;">${{escapeHtml(testId)}}</span>` +
+                        `<span class="ms-auto me-3">${{badge(statuses[statusIndex])}}</span>` +
+                        `<span class="text-muted small">${{escapeHtml(duration)}}</span></div>`
+                    );
+                }}
+                spacer.innerHTML = rows.join('');
+            }}
+
+            function formatLog(log) {{
+                // Destaca as linhas de erro (começando com 'E ' ou '> ')
+                const highlighted = escapeHtml(log).replace(/^(E .*|&gt; .*)$/gm, '<span class="text-danger fw-bold">$1</span>');
+                return `<pre class="bg-light p-3 rounded small"><code>${{highlighted}}</code></pre>`;
+            }}
+
+            function showDetails(index) {{
+                selected = index;
+                const [testId, statusIndex, duration, log, images] = tests[index];
+                let body = '';
+                if (log) body += `<h6>Traceback & Log</h6>${{formatLog(log)}}`;
+                for (const [src, href] of images) {{
+                    body += `<h6 class="mt-3">Screenshot da Falha</h6>` +
+                        `<a href="${{escapeHtml(href)}}" target="_blank" title="Clique para abrir em nova aba">` +
+                        `<img src="${{escapeHtml(src)}}" loading="lazy" class="img-fluid rounded border" alt="Screenshot para ${{escapeHtml(testId)}}"></a>`;
+                }}
+                document.getElementById('test-details-title').innerHTML =
+                    `${{escapeHtml(testId)}} ${{badge(statuses[statusIndex])}} <span class="text-muted small">${{escapeHtml(duration)}}</span>`;
+                document.getElementById('test-details-body').innerHTML = body || '<p>Sem detalhes adicionais.</p>';
+                details.style.display = 'block';
+                render();
+            }}
+
+            list.addEventListener('scroll', () => {{
+                if (!scheduled) {{
+                    scheduled = true;
+                    requestAnimationFrame(render);
+                }}
+            }});
+            spacer.addEventListener('click', event => {{
+                const row = event.target.closest('.test-row');
+                if (row) showDetails(Number(row.dataset.index));
+            }});
+            searchInput.addEventListener('input', applyFilter);
+
             filterCards.forEach(card => {{
                 card.addEventListener('click', () => {{
-                    const filter = card.getAttribute('data-filter');
-                    let visibleCount = 0;
-
-                    updateActiveCard(card);
-
-                    testItems.forEach(item => {{
-                        const status = item.getAttribute('data-status');
-                        // Considera 'Failed' e 'Error' como falhas
-                        const isFailedOrError = status === 'Failed' || status === 'Error';
-
-                        let shouldShow = false;
-                        if (filter === 'all') {{
-                            shouldShow = true;
-                        }} else if (filter === 'Passed' && status === 'Passed') {{
-                            shouldShow = true;
-                        }} else if (filter === 'Failed' && isFailedOrError) {{
-                            shouldShow = true;
-                        }}
-
-                        if (shouldShow) {{
-                            item.style.display = 'block';
-                            visibleCount++;
-                        }} else {{
-                            item.style.display = 'none';
-                        }}
-                    }});
-
-                    noTestsMessage.style.display = visibleCount === 0 ? 'block' : 'none';
+                    filter = card.getAttribute('data-filter');
+                    filterCards.forEach(other => other.classList.remove('active'));
+                    card.classList.add('active');
+                    applyFilter();
                 }});
             }});
 
-            // Inicia com o filtro "Total" ativo por padrão
+            // Inicia com o filtro "Total" ativo e abre os detalhes da primeira falha
             document.getElementById('filter-all').classList.add('active');
+            applyFilter();
+            const firstFailure = tests.findIndex(test => ['Failed', 'Error'].includes(statuses[test[1]]));
+            if (firstFailure >= 0) showDetails(firstFailure);
         }});
         </script>
     </body>
@@ -286,11 +466,27 @@ from bs4 import BeautifulSoup
 
 def main():
     """Função principal para executar a transformação."""
+    parser = argparse.ArgumentParser(description="Gera o relatório moderno a partir do relatorio.html do pytest-html.")
+    parser.add_argument("input", nargs="?", default="relatorio.html", help="Relatório do pytest-html (padrão: relatorio.html)")
+    parser.add_argument("--offline", action="store_true", default=_env_flag("REPORT_OFFLINE"),
+                        help="Nunca acessa a rede; usa apenas o cache local de assets")
+    parser.add_argument("--inline-assets", action="store_true", default=_env_flag("REPORT_INLINE_ASSETS"),
+                        help="Embute CSS/JS no HTML")
+    parser.add_argument("--self-contained", action="store_true", default=_env_flag("REPORT_SELF_CONTAINED"),
+                        help="Arquivo HTML único: embute CSS/JS e as miniaturas dos screenshots")
+    parser.add_argument("--baixar-assets", action="store_true",
+                        help="Baixa e confere (SRI) os assets no cache local e sai; use antes de versionar assets/vendor")
+    args = parser.parse_args()
+
+    if args.baixar_assets:
+        if not baixar_assets():
+            raise SystemExit("Erro: não foi possível popular o cache de assets.")
+        return
 
     # Define a raiz do projeto como base_dir
     base_dir = Path(__file__).resolve().parent  
 
-    input_file = base_dir / "relatorio.html"
+    input_file = base_dir / args.input
 
     # Cria um diretório de saída único para esta execução
     reports_base_dir = base_dir / "reports"
@@ -312,15 +508,22 @@ def main():
         print("Erro: Não foi possível encontrar o bloco de dados JSON no relatório HTML.")
         return
 
-    print("Extraindo e processando dados dos testes (embutindo imagens)...")
+    print("Extraindo e processando dados dos testes (armazenando imagens)...")
     test_data = json.loads(data_container["data-jsonblob"])
-    processed_data = process_test_data(test_data, base_dir)
+    processed_data = process_test_data(test_data, base_dir, ArtifactStore(output_dir), args.self_contained)
 
-    print("Buscando assets para um relatório autônomo...")
-    css, js = get_embedded_assets()
+    print("Carregando assets do cache local...")
+    try:
+        css, js = get_embedded_assets(offline=args.offline)
+    except RuntimeError as e:
+        raise SystemExit(f"Erro: {e}")
 
     print("Gerando relatório HTML moderno...")
-    modern_html = generate_modern_html(processed_data, css, js)
+    if args.inline_assets or args.self_contained:
+        modern_html = generate_modern_html(processed_data, css, js)
+    else:
+        css_href, js_src = write_report_assets(output_dir, css, js)
+        modern_html = generate_modern_html(processed_data, css_href=css_href, js_src=js_src)
 
     print(f"Salvando novo relatório em {output_file}...")
     with open(output_file, "w", encoding="utf-8") as f:
@@ -1,9 +1,134 @@
 # pages/base_page.py
 
+import os
+import time
+import warnings
+import weakref
+
 from playwright.sync_api import Page, Locator, expect
-from playwright.sync_api import FrameLocator
+from playwright.sync_api import FrameLocator, Frame
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+from utils.session_cache import SessionCache
+from utils.spans import instrumentar_classe
+
+# Monitor instalado em cada documento: registra as XHR/fetch pendentes (URL e
+# início) e o instante da última mudança estrutural do DOM. Só contam elementos
+# inseridos/removidos e os atributos `disabled`/`hidden`: classes, estilos e
+# textos (spinners, animações, relógios) não impedem a página de ficar quieta.
+# É idempotente (pode ser injetado de novo).
+SCRIPT_MONITOR_ESTABILIZACAO = """
+(() => {
+    if (window.__monitorEstabilizacao) return;
+    const estado = { pendentes: new Map(), proximo: 0, ultimaMutacao: performance.now() };
+    window.__monitorEstabilizacao = estado;
+    const iniciar = url => {
+        const id = ++estado.proximo;
+        estado.pendentes.set(id, { url: String(url), inicio: performance.now() });
+        return id;
+    };
+    const concluir = id => { estado.pendentes.delete(id); };
+
+    const openOriginal = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (metodo, url, ...args) {
+        this.__urlMonitorada = url;
+        return openOriginal.call(this, metodo, url, ...args);
+    };
+    const sendOriginal = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (...args) {
+        const id = iniciar(this.__urlMonitorada);
+        this.addEventListener('loadend', () => concluir(id), { once: true });
+        try {
+            return sendOriginal.apply(this, args);
+        } catch (e) {
+            concluir(id);
+            throw e;
+        }
+    };
+
+    if (window.fetch) {
+        const fetchOriginal = window.fetch;
+        window.fetch = function (recurso, ...args) {
+            const id = iniciar(recurso && recurso.url ? recurso.url : recurso);
+            return fetchOriginal.call(this, recurso, ...args).finally(() => concluir(id));
+        };
+    }
+
+    const estrutural = registro => registro.type === 'attributes'
+        || [...registro.addedNodes, ...registro.removedNodes].some(no => no.nodeType === Node.ELEMENT_NODE);
+    new MutationObserver(registros => {
+        if (registros.some(estrutural)) estado.ultimaMutacao = performance.now();
+    }).observe(document, { subtree: true, childList: true, attributes: true, attributeFilter: ['disabled', 'hidden'] });
+})();
+"""
+
+# Requisições que o predicado considera: iniciadas há menos de `requisicaoLonga`
+# ms (long-polling e streams ficam de fora) e cujas URLs não casam com `ignorar`.
+_SCRIPT_REQUISICOES_ATIVAS = """
+const requisicoesAtivas = (estado, requisicaoLonga, ignorar) => {
+    const agora = performance.now();
+    const padroes = ignorar.map(padrao => new RegExp(padrao));
+    return [...estado.pendentes.values()].filter(({ url, inicio }) =>
+        agora - inicio < requisicaoLonga && !padroes.some(padrao => padrao.test(url)));
+};
+"""
+
+# Predicado avaliado no frame: instala o monitor se ainda não existir e
+# considera a página quieta sem requisições ativas e sem mutações na janela.
+_SCRIPT_PAGINA_QUIETA = """
+({ janela, requisicaoLonga, ignorar }) => {
+    if (!window.__monitorEstabilizacao) {
+        %s
+        return false;
+    }
+    %s
+    const estado = window.__monitorEstabilizacao;
+    return document.readyState === 'complete'
+        && requisicoesAtivas(estado, requisicaoLonga, ignorar).length === 0
+        && performance.now() - estado.ultimaMutacao >= janela;
+}
+""" % (SCRIPT_MONITOR_ESTABILIZACAO, _SCRIPT_REQUISICOES_ATIVAS)
+
+# Diagnóstico de um frame que não estabilizou: o que ainda estava acontecendo.
+_SCRIPT_DIAGNOSTICO = """
+({ requisicaoLonga, ignorar }) => {
+    const estado = window.__monitorEstabilizacao;
+    if (!estado) return null;
+    %s
+    return {
+        requisicoes: requisicoesAtivas(estado, requisicaoLonga, ignorar).map(({ url }) => url).slice(0, 5),
+        ms_desde_mutacao: Math.round(performance.now() - estado.ultimaMutacao),
+        pronto: document.readyState,
+    };
+}
+""" % _SCRIPT_REQUISICOES_ATIVAS
+
+# Medições de aguardar_estabilizar por página (compartilhadas entre os page objects
+# da mesma página e lidas pelo conftest ao fim do teste).
+_medicoes_por_pagina = weakref.WeakKeyDictionary()
+
+
+def medicoes_da_pagina(page: Page, limpar: bool = False) -> list[dict]:
+    """Medições de estabilização feitas na página; `limpar` as remove (página reaproveitada)."""
+    medicoes = _medicoes_por_pagina.get(page, [])
+    if limpar:
+        _medicoes_por_pagina.pop(page, None)
+    return medicoes
+
+
+# Modos aceitos por BasePage.digitar_caracteres (padrão global em MODO_DIGITACAO).
+MODOS_DIGITACAO = ("digitar", "rapido", "preencher")
+
+# Scripts de inicialização já registrados por contexto (evita duplicar add_init_script).
+_scripts_registrados = weakref.WeakKeyDictionary()
+
 
 class BasePage:
+    def __init_subclass__(cls, **kwargs):
+        # Cada page object tem seus métodos públicos medidos como spans (TRACE_SPANS=true)
+        super().__init_subclass__(**kwargs)
+        instrumentar_classe(cls)
+
     def __init__(self, page: Page):
         self.page = page
         self.base_url = "http://the-internet.herokuapp.com"
@@ -11,7 +136,18 @@ class BasePage:
 
         self.carregamento_overlay: Locator = self.frame_principal.locator('#DivProgressbar')
         self.tela_bugada: Locator = self.page.get_by_role("heading", name="Nenhum favorito ainda")
-        
+
+        self.medicoes_estabilizacao: list[dict] = _medicoes_por_pagina.setdefault(page, [])
+        self.modo_digitacao: str = os.getenv("MODO_DIGITACAO", "digitar").lower()
+        self._registrar_script_inicial("estabilizacao", SCRIPT_MONITOR_ESTABILIZACAO)
+
+    def _registrar_script_inicial(self, chave: str, script: str):
+        """Registra um script de inicialização uma única vez por contexto."""
+        context = self.page.context
+        registrados = _scripts_registrados.setdefault(context, set())
+        if chave not in registrados:
+            context.add_init_script(script)
+            registrados.add(chave)
     
     def recarregar_pagina(self):
         """Recarrega a página atual."""
@@ -31,6 +167,39 @@ class BasePage:
         except Exception as e:
             print(f"Erro ao verificar tela bugada: {e}")
 
+    def restaurar_sessao(self, cache: SessionCache, indicador_logado: Locator, indicador_login: Locator,
+                         timeout: int = 30000) -> bool:
+        """Tenta reaproveitar a sessão em cache em vez de refazer o login via UI.
+
+        Retorna True se o portal aceitou a sessão. Se a sessão for rejeitada
+        (tela de login exibida), o cache é invalidado e os cookies e o
+        localStorage são limpos para que o fluxo completo de login seja
+        executado. Sem o cookie marcador, o script de `SessionCache.aplicar`
+        deixa de semear o localStorage rejeitado no contexto.
+        """
+        if not cache.aplicar(self.page.context):
+            return False
+
+        self.navigate(self.base_url)
+        try:
+            expect(indicador_logado.or_(indicador_login)).to_be_visible(timeout=timeout)
+        except AssertionError:
+            pass
+
+        if indicador_logado.is_visible():
+            return True
+
+        print(f"Sessão em cache do {cache.portal} rejeitada pelo portal. Refazendo login.")
+        cache.invalidar()
+        self.page.context.clear_cookies()
+        for frame in self.page.frames:
+            try:
+                frame.evaluate("() => window.localStorage.clear()")
+            except PlaywrightError:
+                pass  # frame navegando ou sem acesso ao storage
+        self.navigate(self.base_url)
+        return False
+
     def navigate(self, path: str):
         """Navega para uma URL completa construída a partir da base_url e do path."""
         self.page.goto(f"{path}")
@@ -58,11 +227,104 @@ class BasePage:
         """Espera até que o overlay de carregamento desapareça."""
         expect(self.carregamento_overlay).to_be_hidden(timeout=120000)
 
-    def digitar_caracteres(self, locator: Locator, texto: str, delay: int = 50):
-        locator.click()
-        """Digita texto em um campo, simulando a digitação caractere por caractere."""
-        locator.type(texto, delay=delay)
-        # esperar até a pagina carregar os itens relacionados ao texto digitado
+    def _frames_monitorados(self) -> list[Frame]:
+        """Frame principal da página e, se existir, o iframe de conteúdo dos portais."""
+        frames = [self.page.main_frame]
+        frame_conteudo = self.page.frame(name="frame")
+        if frame_conteudo:
+            frames.append(frame_conteudo)
+        return frames
+
+    def aguardar_estabilizar(self, rotulo: str = "", janela_quieta: int = 500, timeout: int = 10000,
+                             requisicao_longa: int | None = None) -> float:
+        """Espera a página ficar quieta e retorna o tempo gasto, em segundos.
+
+        Quieta significa: nenhuma requisição XHR/fetch ativa, nenhuma mudança
+        estrutural do DOM (elementos inseridos/removidos, `disabled`/`hidden`)
+        durante `janela_quieta` ms e o overlay de carregamento oculto.
+        Requisições abertas há mais de `requisicao_longa` ms (long-polling;
+        padrão `ESTABILIZACAO_REQUISICAO_LONGA_MS`) ou com URL que casa com
+        `ESTABILIZACAO_IGNORAR_URLS` (regex separadas por vírgula) não contam.
+
+        Se o `timeout` estourar, segue em frente como faria a espera fixa, mas
+        emite um aviso (RuntimeWarning) com o que ainda estava pendente. Cada
+        medição fica em `self.medicoes_estabilizacao` e vai para o relatório do teste.
+        """
+        opcoes = {
+            "janela": janela_quieta,
+            "requisicaoLonga": requisicao_longa or int(os.getenv("ESTABILIZACAO_REQUISICAO_LONGA_MS", "5000")),
+            "ignorar": [p.strip() for p in os.getenv("ESTABILIZACAO_IGNORAR_URLS", "").split(",") if p.strip()],
+        }
+        inicio = time.perf_counter()
+        limite = inicio + timeout / 1000
+        estabilizou = True
+
+        try:
+            for frame in self._frames_monitorados():
+                restante = max(1, int((limite - time.perf_counter()) * 1000))
+                frame.wait_for_function(_SCRIPT_PAGINA_QUIETA, arg=opcoes, polling=100, timeout=restante)
+            restante = max(1, int((limite - time.perf_counter()) * 1000))
+            expect(self.carregamento_overlay).to_be_hidden(timeout=restante)
+        except (PlaywrightTimeoutError, AssertionError):
+            estabilizou = False
+
+        duracao = time.perf_counter() - inicio
+        medicao = {"rotulo": rotulo, "duracao": duracao, "estabilizou": estabilizou}
+        if estabilizou:
+            print(f"Estabilização '{rotulo}': {duracao:.2f}s")
+        else:
+            medicao["pendente"] = self._diagnosticar_estabilizacao(opcoes)
+            mensagem = f"página não estabilizou em '{rotulo}' após {duracao:.2f}s ({medicao['pendente']})"
+            print(f"Aviso: {mensagem}. Continuando.")
+            warnings.warn(mensagem, RuntimeWarning, stacklevel=2)
+        self.medicoes_estabilizacao.append(medicao)
+        return duracao
+
+    def _diagnosticar_estabilizacao(self, opcoes: dict) -> dict:
+        """O que impedia cada frame de ficar quieto (requisições ativas, última mutação)."""
+        diagnostico = {}
+        for frame in self._frames_monitorados():
+            try:
+                diagnostico[frame.name or "principal"] = frame.evaluate(
+                    _SCRIPT_DIAGNOSTICO, {"requisicaoLonga": opcoes["requisicaoLonga"], "ignorar": opcoes["ignorar"]}
+                )
+            except PlaywrightError:
+                continue
+        try:
+            diagnostico["overlay_visivel"] = self.carregamento_overlay.is_visible()
+        except PlaywrightError:
+            pass
+        return diagnostico
+
+    def digitar_caracteres(self, locator: Locator, texto: str, delay: int = 50, modo: str | None = None):
+        """Digita texto em um campo conforme o modo de digitação.
+
+        - "digitar": tecla a tecla, com `delay` ms entre caracteres (campos com
+          máscara ou que reagem a cada tecla).
+        - "rapido": preenche tudo menos o último caractere e digita só o último,
+          disparando os eventos de teclado (keydown/keyup) que o portal usa para
+          buscar/autocompletar.
+        - "preencher": `fill` do valor final seguido de blur (evento change).
+
+        O padrão vem de `MODO_DIGITACAO` (ou "digitar", que preserva os eventos
+        por tecla de que dependem as buscas por CNPJ e os autocompletes); `modo`
+        sobrepõe por chamada nos campos em que o atalho é seguro.
+        """
+        modo = modo or self.modo_digitacao
+        texto = str(texto)
+
+        if modo == "preencher":
+            locator.fill(texto)
+            locator.blur()
+        elif modo == "rapido":
+            locator.click()
+            locator.fill(texto[:-1])
+            locator.press_sequentially(texto[-1:], delay=delay)
+        elif modo == "digitar":
+            locator.click()
+            locator.press_sequentially(texto, delay=delay)
+        else:
+            raise ValueError(f"Modo de digitação inválido: {modo!r}. Use um de {MODOS_DIGITACAO}.")
 
     def scroll_ate_elemento(self, locator: Locator):
         """Rola a página até um elemento específico."""
@@ -98,3 +360,4 @@ class BasePage:
             return False
 
 
+instrumentar_classe(BasePage)
@@ -1,11 +1,49 @@
 from .base_page import BasePage
 from playwright.sync_api import Page, Locator
 
+# Mantém o atributo `data-modal-topo` no modal visível de maior z-index (o
+# primeiro, em caso de empate). Um MutationObserver recalcula a marcação sempre
+# que modais abrem/fecham, então o seletor abaixo vale sem consultas extras.
+SCRIPT_MODAL_TOPO = """
+(() => {
+    if (window.__modalTopo) return;
+    const ATRIBUTO = 'data-modal-topo';
+    const visivel = el => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden';
+    const atualizar = () => {
+        let topo = null;
+        let maiorZIndex = -1;
+        for (const modal of document.querySelectorAll('div[class*="modal fade show"]')) {
+            if (!visivel(modal)) continue;
+            const zIndex = parseInt(getComputedStyle(modal).zIndex) || 0;
+            if (zIndex > maiorZIndex) {
+                maiorZIndex = zIndex;
+                topo = modal;
+            }
+        }
+        for (const anterior of document.querySelectorAll('[' + ATRIBUTO + ']')) {
+            if (anterior !== topo) anterior.removeAttribute(ATRIBUTO);
+        }
+        if (topo && !topo.hasAttribute(ATRIBUTO)) topo.setAttribute(ATRIBUTO, '1');
+        return topo !== null;
+    };
+    window.__modalTopo = { atualizar };
+    new MutationObserver(atualizar).observe(document, {
+        subtree: true, childList: true, attributes: true, attributeFilter: ['class', 'style'],
+    });
+    atualizar();
+})();
+"""
+
+SELETOR_MODAL_TOPO = "//div[@data-modal-topo]"
+
+
 class BasePageMulti(BasePage):
 
     def __init__(self, page):
         super().__init__(page)
         self.processando_messenger: Locator = page.locator('//div[@class="blockUI blockMsg blockPage"]')
+        self._modal_topo_pronto = False
+        self._registrar_script_inicial("modal_topo", SCRIPT_MODAL_TOPO)
     
     
         
@@ -24,33 +62,21 @@ class BasePageMulti(BasePage):
     def obter_modal_atual(self, timeout: int = 10000) -> str:
         """
         Retorna o XPath do modal visível com o maior z-index.
-        Aguarda até que pelo menos um modal esteja visível na tela.
-        """
-        # Espera até que pelo menos um modal apareça
-        self.page.wait_for_selector("//div[contains(@class, 'modal fade show')]", timeout=timeout)
-
-        modais = self.page.locator("//div[contains(@class, 'modal fade show')]")
-        quantidade = modais.count()
 
-        maior_z_index = -1
-        index = 0
-
-        for i in range(quantidade):
-            modal_atual = self.page.locator(f"(//div[contains(@class, 'modal fade show')])[{i+1}]")
-
-            # Aguarda o modal estar realmente visível/renderizado
-            try:
-                modal_atual.wait_for(state="visible", timeout=2000)
-                z_index_atual = int(modal_atual.evaluate("el => parseInt(window.getComputedStyle(el).zIndex) || 0"))
-            except Exception as e:
-                print(f"Aviso: não foi possível obter z-index do modal {i+1}: {e}")
-                continue
-
-            if z_index_atual > maior_z_index:
-                maior_z_index = z_index_atual
-                index = i + 1
+        A resolução acontece no navegador: na primeira chamada, um único
+        `wait_for_function` garante o observador instalado e aguarda pelo menos
+        um modal visível. Depois disso o modal do topo fica marcado no DOM e é
+        atualizado a cada abertura/fechamento de modal, então as chamadas
+        seguintes não fazem nenhuma ida ao navegador.
+        """
+        if not self._modal_topo_pronto:
+            self.page.wait_for_function(
+                f"() => {{ {SCRIPT_MODAL_TOPO} return window.__modalTopo.atualizar(); }}",
+                timeout=timeout,
+            )
+            self._modal_topo_pronto = True
 
-        return f"(//div[contains(@class, 'modal fade show')])[{index}]"
+        return SELETOR_MODAL_TOPO
     
     def localizar_no_modal(self, seletor: str) -> Locator:
         """
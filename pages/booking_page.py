@@ -104,14 +104,14 @@ class BookingPage(BasePage):
         self.selecionar_opcao(self.select_porto_destino, porto_destino)
         self.selecionar_opcao(self.select_municipio_destino, municipio_destino)
         self.selecionar_opcao(self.select_tipo_container, tipo_container)
-        # agurdar 5 segundos para garantir que o select foi processado
-        self.page.wait_for_timeout(5000)
-        self.digitar_caracteres(self.input_qtde_containers, qtde_containers, delay=50)
+        # aguarda o portal processar o select (requisições e DOM estáveis)
+        self.aguardar_estabilizar("tipo_container")
+        self.digitar_caracteres(self.input_qtde_containers, qtde_containers, modo="preencher")
 
     def calcular_e_gravar_proposta(self):
         self.clicar(self.botao_calcular)
-        # esperar dois segundos para garantir que o cálculo foi processado
-        self.page.wait_for_timeout(2000)
+        # aguarda o cálculo ser processado antes de gravar
+        self.aguardar_estabilizar("calculo_booking")
         self.clicar(self.botao_gravar)
         self.esperar_estar_visivel(self.mensagem_inclusao_sucesso)
         self.clicar(self.mensagem_inclusao_sucesso)
@@ -147,8 +147,9 @@ class BookingPage(BasePage):
         from datetime import datetime
         data_atual = datetime.now().strftime("%d/%m/%Y")
         self.page.pause()
-        self.digitar_caracteres(self.input_data_inicio, data_atual, delay=50)
-        self.digitar_caracteres(self.input_hora, "08:00", delay=50)
+        # campos com máscara de data/hora: precisam receber tecla a tecla
+        self.digitar_caracteres(self.input_data_inicio, data_atual, delay=50, modo="digitar")
+        self.digitar_caracteres(self.input_hora, "08:00", delay=50, modo="digitar")
 
         self.clicar(self.botao_copiar)
         self.clicar(self.botao_gravar)
@@ -1,7 +1,8 @@
 from .base_page_multi import BasePageMulti
 from playwright.sync_api import Page, Locator, expect
 
-from utils.utils import DatabaseClient
+from utils.container_provider import ContainerProvider
+from utils.waiters import BackoffWaiter, Sonda, sonda_do_ambiente
 
 class CargasPage(BasePageMulti):
     def __init__(self, page):
@@ -10,6 +11,8 @@ class CargasPage(BasePageMulti):
         self.pesquisa_input: Locator = self.page.get_by_role("searchbox", name="Pesquisar um Formulário")
         self.cargas_button: Locator = self.page.locator('button[data-bind="click: ExibirFiltros.eventClick, id: ExibirFiltros.id"]')
         self.booking_input: Locator = self.page.get_by_role("textbox", name="Nº do Booking:")
+        # booking pesquisado, usado pelas sondas de integração (banco/HTTP)
+        self.numero_booking: str | None = None
 
         self.pesquisar_button_modal = '//button[@data-bind="click: Pesquisar.eventClick, attr : { id: Pesquisar.id }"]'
         self.atualizar_carga_button: Locator = self.page.get_by_role("button", name=" Atualizar as cargas")
@@ -182,7 +185,8 @@ class CargasPage(BasePageMulti):
         self.preencher(self.tara_container_input, tara)
 
     def preencher_numero_container_input(self):
-        container = DatabaseClient.buscar_primeiro_container_valido(batch_size=50)
+        # número pré-buscado em segundo plano e reservado só para este worker
+        container = ContainerProvider.compartilhado().obter()
         if container:
             self.preencher(self.numero_container_input, container)
 
@@ -232,26 +236,46 @@ class CargasPage(BasePageMulti):
     def clicar_atualizar_carga(self):
         self.clicar(self.atualizar_carga_button)
 
-    def wait_for_integration(self):
+    def wait_for_integration(self, waiter: BackoffWaiter | None = None, sonda: Sonda | None = None):
         """Waits for the background integration to complete.
 
-        The original implementation polled a button for visibility, retrying up
-        to ten times with one‑minute intervals. The name referenced a specific
-        service; here it is kept generic.
+        Each attempt waits for the first-step button for a backoff interval
+        (exponential, with jitter, capped by `INTEGRACAO_BACKOFF_MAXIMO`) and
+        refreshes the loads when it is still missing, until the total deadline
+        (`INTEGRACAO_PRAZO`). The button is caught as soon as it shows up.
+
+        With a probe (`INTEGRACAO_SONDA=banco|http`), the integration status is
+        polled out of band for the booking given to `preencher_numero_booking`,
+        and the UI is refreshed once, after the backend reports completion.
         """
-        for _ in range(10):
-            try:
+        waiter = waiter or BackoffWaiter.do_ambiente("INTEGRACAO", inicial=2.0)
+        sonda = sonda if sonda is not None else sonda_do_ambiente("INTEGRACAO")
+        fim = waiter.prazo_final()
+
+        if sonda is not None:
+            if self.numero_booking:
+                waiter.aguardar(lambda: sonda(self.numero_booking),
+                                f"Integração do booking {self.numero_booking}", fim=fim)
+                # Backend concluído: uma atualização e uma espera normal pela etapa na tela
+                self.clicar_atualizar_carga()
                 expect(self.primeira_etapa_button).to_be_visible(timeout=60000)
                 return
-            except:
+            print("Aviso: número do booking desconhecido; aguardando a integração pela tela.")
+
+        for espera in waiter.intervalos(fim):
+            try:
+                expect(self.primeira_etapa_button).to_be_visible(timeout=max(1, espera * 1000))
+                return
+            except AssertionError:
                 self.clicar_atualizar_carga()
 
-        raise Exception("Maximum wait time for integration exceeded.")
+        raise TimeoutError("Maximum wait time for integration exceeded.")
 
     def clicar_primeira_etapa(self):
         self.clicar(self.primeira_etapa_button)
 
     def preencher_numero_booking(self, numero:str):
+        self.numero_booking = numero
         self.preencher(self.booking_input, numero)
     
     def clicar_botao_carga(self): 
@@ -3,6 +3,7 @@ import os
 from playwright.sync_api import Page, Locator, expect
 
 from .base_page import BasePage
+from utils.session_cache import SessionCache
 
 from dotenv import load_dotenv
 
@@ -22,6 +23,7 @@ class LoginPage(BasePage):
         self.entrar_nsapp_button: Locator = self.page.get_by_role("button", name="Entrar com NsApps")
         # Locator para verificacao de login bem-sucedido
         self.main_menu: Locator = self.page.locator(".v-list.pt-0.v-list--dense.theme--light")
+        self.sessao = SessionCache("portal1")
 
     def go_to(self):
         self.page.goto(self.base_url)
@@ -44,6 +46,13 @@ class LoginPage(BasePage):
         self.clicar(self.entrar_nsapp_button)
 
     def fazer_login(self):
+        """Executa o login, reaproveitando a sessão em cache do worker quando válida."""
+        if self.restaurar_sessao(self.sessao, self.main_menu, self.entrar_nsapp_button):
+            return
+        self.fazer_login_ui()
+        self.sessao.salvar(self.page.context)
+
+    def fazer_login_ui(self):
         """Executa o fluxo completo de login."""
         self.clicar_entrar_nsapp()
         self.preencher_usuario(os.getenv("TEST_USERNAME"))
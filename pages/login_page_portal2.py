@@ -4,6 +4,7 @@ from playwright.sync_api import Page, Locator, expect
 
 
 from .base_page_multi import BasePageMulti
+from utils.session_cache import SessionCache
 import os
 from dotenv import load_dotenv
 
@@ -22,15 +23,14 @@ class LoginPage(BasePageMulti):
         self.entrar_nsapp_button: Locator = self.page.get_by_role("button", name="Entrar com NsApps")
         # Locator para verificacao de login bem-sucedido
         self.main_menu: Locator = self.page.locator(".v-list.pt-0.v-list--dense.theme--light")
+        self.pagina_inicial: Locator = self.page.locator("span.subheader-title", has_text="Seja bem-vindo")
+        self.sessao = SessionCache("portal2")
 
     def go_to(self):
         self.page.goto(self.base_url)
 
     def verificar_pagina_inicial(self):
-        self.page.locator(
-            "span.subheader-title",
-            has_text="Seja bem-vindo"
-        ).wait_for(state="visible", timeout=100000)
+        self.pagina_inicial.wait_for(state="visible", timeout=100000)
         
 
     def preencher_usuario(self, username: str):
@@ -51,6 +51,13 @@ class LoginPage(BasePageMulti):
         self.clicar(self.entrar_nsapp_button)
 
     def fazer_login(self):
+        """Executa o login, reaproveitando a sessão em cache do worker quando válida."""
+        if self.restaurar_sessao(self.sessao, self.pagina_inicial, self.username_input):
+            return
+        self.fazer_login_ui()
+        self.sessao.salvar(self.page.context)
+
+    def fazer_login_ui(self):
         """Executa o fluxo completo de login utilizando variáveis de ambiente genéricas."""
         self.preencher_usuario(os.getenv("TEST_USERNAME"))
         self.preencher_senha(os.getenv("TEST_PASSWORD"))
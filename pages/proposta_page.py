@@ -10,6 +10,7 @@ class PropostaPage(BasePage):
     Page Object para a página de Proposta Comercial.
     """
     def __init__(self, page: Page):
+        super().__init__(page)
         self.page = page
         # Localizadores da página principal
         self.caixa_busca: Locator = page.get_by_role("textbox", name="Procurar")
@@ -104,7 +105,7 @@ class PropostaPage(BasePage):
         
 
     def preencher_dados_proposta(self, nome_contato: str, valor_ponto_operacao: str, valor_tipo_proposta: str, valor_servico_transporte: str, valor_familia_produto: str, valor_tipo_pagamento: str):
-        self.digitar_caracteres(self.input_nome_contato, nome_contato, delay=100)
+        self.digitar_caracteres(self.input_nome_contato, nome_contato, modo="preencher")
         self.selecionar_opcao(self.select_ponto_operacao, valor_ponto_operacao)
         self.selecionar_opcao(self.select_tipo_proposta, valor_tipo_proposta)
         self.selecionar_opcao(self.select_servico_transporte, valor_servico_transporte)
@@ -114,7 +115,7 @@ class PropostaPage(BasePage):
 
 
     def salvar_proposta(self):
-        self.page.wait_for_timeout(2000)
+        self.aguardar_estabilizar("salvar_proposta")
         self.clicar(self.botao_gravar)
         self.esperar_estar_visivel(self.obter_localizador_mensagem_sucesso())
 
@@ -149,7 +150,7 @@ class PropostaPage(BasePage):
     def preencher_servicos_agregados_POxPO(self):
         self.clicar(self.link_servicos_agregados)
         self.marcar(self.radio_porto_a_porto)
-        self.page.wait_for_timeout(2000)
+        self.aguardar_estabilizar("servicos_agregados")
 
         self.clicar(self.botao_gravar)
         self.esperar_estar_visivel(self.mensagem_servicos_agregados_sucesso)
@@ -157,7 +158,7 @@ class PropostaPage(BasePage):
     def preencher_servicos_agregados_POxPO_com_carga_perigosa(self):
         self.clicar(self.link_servicos_agregados)
         self.marcar(self.radio_porto_a_porto)
-        self.page.wait_for_timeout(2000)
+        self.aguardar_estabilizar("servicos_agregados")
         self.marcar_carga_perigosa()
 
         self.clicar(self.botao_gravar)
@@ -198,7 +199,7 @@ class PropostaPage(BasePage):
         self.preencher(self.input_num_coletas, num_coletas)
 
         # Salvar
-        self.page.wait_for_timeout(2000)
+        self.aguardar_estabilizar("matriz_transporte")
 
         self.clicar(self.botao_gravar)
         self.esperar_estar_visivel(self.mensagem_matriz_sucesso)
@@ -216,6 +217,6 @@ class PropostaPage(BasePage):
         self.clicar(self.link_aceitacao)
         self.digitar_caracteres(self.input_responsavel_cliente, responsavel_busca)
         self._selecionar_item_no_iframe_de_busca(responsavel_lista)
-        self.digitar_caracteres(self.input_qtde_containers, qtde_containers)
+        self.digitar_caracteres(self.input_qtde_containers, qtde_containers, modo="preencher")
         self.clicar(self.botao_gravar_aceitacao)
         self.esperar_estar_visivel(self.mensagem_aceitacao_sucesso)
\ No newline at end of file
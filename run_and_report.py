@@ -1,15 +1,33 @@
 #!/usr/bin/env python3
+import argparse
+import hashlib
+import importlib.util
+import codecs
+import json
+import logging
 import os
+import platform
+import re
 import shutil
+import sqlite3
 import stat
 import subprocess
 import sys
+import time
 from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
 
 import gerar_relatorio  # seu gerador de relatório
+import run_history
 
 # --- Configurações ---
 REPORTS_BASE_DIR = 'execution_reports'
+REQUIREMENTS_FILE = 'requirements.txt'
+ENV_FINGERPRINT_FILE = os.path.join('.cache', 'env_fingerprint.json')
+PYTEST_LOG_NAME = 'pytest_output.log'
+PYTEST_LOG_MAX_BYTES = int(os.getenv('PYTEST_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+PYTEST_LOG_BACKUPS = int(os.getenv('PYTEST_LOG_BACKUPS', '3'))
 
 
 def _handle_remove_readonly(func, path, exc_info):
@@ -53,9 +71,122 @@ def prune_old_reports(base_dir, keep=10):
     return removed
 
 
-def run():
-    """Orquestra todo o processo: cria pastas, executa testes e gera o relatório."""
-    # Instala browsers e dependências (se necessário)
+def _hash_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _playwright_browsers_dir():
+    """Diretório onde o Playwright guarda os browsers (respeita PLAYWRIGHT_BROWSERS_PATH)."""
+    custom = os.getenv('PLAYWRIGHT_BROWSERS_PATH')
+    if custom and custom != '0':
+        return Path(custom)
+    if sys.platform.startswith('win'):
+        return Path(os.getenv('LOCALAPPDATA', Path.home() / 'AppData' / 'Local')) / 'ms-playwright'
+    if sys.platform == 'darwin':
+        return Path.home() / 'Library' / 'Caches' / 'ms-playwright'
+    return Path(os.getenv('XDG_CACHE_HOME', Path.home() / '.cache')) / 'ms-playwright'
+
+
+def _playwright_browsers():
+    """Revisões dos browsers exigidas pelo pacote playwright instalado e se já estão baixadas.
+
+    Lê o `browsers.json` do driver sem importar o playwright; retorna None se
+    o pacote não estiver instalado.
+    """
+    spec = importlib.util.find_spec('playwright')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+
+    package_dir = Path(list(spec.submodule_search_locations)[0])
+    try:
+        with open(package_dir / 'driver' / 'package' / 'browsers.json', encoding='utf-8') as f:
+            browsers = json.load(f).get('browsers', [])
+    except (OSError, ValueError):
+        return None
+
+    browsers_dir = _playwright_browsers_dir()
+    revisions = {}
+    for browser in browsers:
+        if not browser.get('installByDefault'):
+            continue
+        name, revision = browser['name'], browser['revision']
+        installed = (browsers_dir / f"{name.replace('-', '_')}-{revision}").is_dir()
+        revisions[name] = {'revision': revision, 'installed': installed}
+    return revisions
+
+
+def compute_env_fingerprint():
+    """Impressão digital do ambiente: requirements, versão do Python e browsers do Playwright."""
+    return {
+        'requirements': _hash_file(REQUIREMENTS_FILE),
+        'python': f"{platform.python_implementation()} {platform.python_version()} ({sys.executable})",
+        'playwright_browsers': _playwright_browsers(),
+    }
+
+
+def _load_env_fingerprint():
+    try:
+        with open(ENV_FINGERPRINT_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_env_fingerprint(fingerprint):
+    os.makedirs(os.path.dirname(ENV_FINGERPRINT_FILE), exist_ok=True)
+    tmp_path = ENV_FINGERPRINT_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprint, f, indent=2)
+    os.replace(tmp_path, ENV_FINGERPRINT_FILE)
+
+
+def _env_changes(saved, current):
+    """Lista legível das diferenças entre a impressão digital salva e a atual."""
+    if saved is None:
+        return ["nenhuma instalação anterior registrada"]
+
+    changes = []
+    if saved.get('requirements') != current['requirements']:
+        changes.append(f"{REQUIREMENTS_FILE} foi alterado")
+    if saved.get('python') != current['python']:
+        changes.append(f"Python mudou de {saved.get('python')} para {current['python']}")
+
+    browsers = current['playwright_browsers']
+    if browsers is None:
+        changes.append("pacote playwright não encontrado")
+    else:
+        for name, info in browsers.items():
+            if not info['installed']:
+                changes.append(f"browser {name} (revisão {info['revision']}) não está instalado")
+        if saved.get('playwright_browsers') != browsers and not changes:
+            changes.append("revisões dos browsers do Playwright mudaram")
+    return changes
+
+
+def prepare_environment(refresh=False):
+    """Roda `pip install` e `playwright install` apenas quando o ambiente mudou.
+
+    A impressão digital da última instalação bem-sucedida fica em
+    `.cache/env_fingerprint.json`; `refresh=True` força a reinstalação.
+    """
+    saved = _load_env_fingerprint()
+    changes = ["--refresh-env informado"] if refresh else _env_changes(saved, compute_env_fingerprint())
+
+    if not changes:
+        print("Ambiente inalterado desde a última instalação: pulando pip install e playwright install.")
+        return
+
+    print("Reinstalando dependências e browsers:")
+    for change in changes:
+        print(f"  - {change}")
+
+    # As dependências vêm primeiro: a versão do playwright define as revisões dos browsers
+    subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', REQUIREMENTS_FILE], check=True)
+
     try:
         subprocess.run([sys.executable, '-m', 'playwright', 'install'], check=True)
     except subprocess.CalledProcessError as e:
@@ -63,7 +194,121 @@ def run():
         print(e.stderr)
         sys.exit(1)
 
-    subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'], check=True)
+    _save_env_fingerprint(compute_env_fingerprint())
+
+
+def _pytest_output_logger(execution_path):
+    """Logger que grava a saída do pytest em arquivo rotativo dentro da execução."""
+    logger = logging.getLogger(f'run_and_report.pytest.{os.path.basename(execution_path)}')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = RotatingFileHandler(
+        os.path.join(execution_path, PYTEST_LOG_NAME),
+        maxBytes=PYTEST_LOG_MAX_BYTES,
+        backupCount=PYTEST_LOG_BACKUPS,
+        encoding='utf-8',
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    return logger
+
+
+def _format_elapsed(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+class _ProgressTracker:
+    """Acompanha as linhas de resultado do pytest e mostra o progresso acumulado."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.last_result = self.started
+        self.counts = {}
+
+    def feed(self, line):
+        match = run_history.match_result_line(line)
+        if not match:
+            return None
+
+        now = time.monotonic()
+        status = match.group('status')
+        self.counts[status] = self.counts.get(status, 0) + 1
+        test_elapsed, self.last_result = now - self.last_result, now
+
+        done = sum(count for name, count in self.counts.items() if name != 'RERUN')
+        summary = ', '.join(f"{count} {name.lower()}" for name, count in sorted(self.counts.items()))
+        return (f"    -> {done} teste(s) concluído(s) ({summary}) | "
+                f"último: {test_elapsed:.1f}s | decorrido: {_format_elapsed(now - self.started)}")
+
+
+def stream_pytest(pytest_command, execution_path):
+    """Executa o pytest exibindo a saída em tempo real e gravando-a em log rotativo.
+
+    stdout e stderr são unificados e lidos em blocos, então texto parcial (ex.:
+    o nome do teste em andamento no modo -v) aparece imediatamente e a memória
+    usada fica limitada à linha corrente. Retorna o código de saída do pytest.
+    """
+    logger = _pytest_output_logger(execution_path)
+    tracker = _ProgressTracker()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    env = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
+    process = subprocess.Popen(pytest_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
+
+    pending, shown = '', 0  # linha corrente e quanto dela já foi exibido
+    try:
+        while True:
+            chunk = process.stdout.read1(8192)
+            pending += decoder.decode(chunk, final=not chunk)
+            *lines, rest = pending.split('\n')
+            for line in lines:
+                sys.stdout.write(line[shown:] + '\n')
+                shown = 0
+                line = line.rstrip('\r')
+                logger.info(line)
+                progress = tracker.feed(line)
+                if progress:
+                    sys.stdout.write(progress + '\n')
+            if len(rest) > shown:
+                sys.stdout.write(rest[shown:])
+            sys.stdout.flush()
+            pending, shown = rest, len(rest)
+            if not chunk:
+                break
+    except KeyboardInterrupt:
+        process.terminate()
+        raise
+    finally:
+        if pending:
+            logger.info(pending.rstrip('\r'))
+        process.stdout.close()
+        return_code = process.wait()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+    print(f"\nPytest finalizado com código {return_code} em {_format_elapsed(time.monotonic() - tracker.started)}.")
+    return return_code
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Executa os testes e gera o relatório HTML customizado.")
+    parser.add_argument("test_target", nargs="?", help="Arquivo ou teste específico (ex.: tests/test_proposta.py::teste)")
+    parser.add_argument("--refresh-env", action="store_true",
+                        help="Reinstala dependências e browsers mesmo que o ambiente não tenha mudado")
+    parser.add_argument("--spans", action="store_true",
+                        help="Mede as ações dos page objects e inclui as etapas mais lentas no relatório")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    """Orquestra todo o processo: cria pastas, executa testes e gera o relatório."""
+    args = parse_args(argv)
+
+    # Instala dependências e browsers apenas se o ambiente mudou
+    prepare_environment(refresh=args.refresh_env)
 
     # ID único para a execução
     execution_id = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -78,7 +323,7 @@ def run():
     print(f"Diretório de saída: {execution_path}")
 
     # --- Verifica se o usuário passou um arquivo específico ---
-    test_target = sys.argv[1] if len(sys.argv) > 1 else None
+    test_target = args.test_target
 
     # --- Monta o comando do pytest ---
     pytest_command = [
@@ -88,22 +333,21 @@ def run():
         f'--screenshot=only-on-failure',
         f'--output={screenshots_path}',
         '--headed',
-        '--tracing=on'
+        '--tracing=on',
+        '-v',
     ]
 
     # Se o usuário informou um teste específico, adiciona ele ao comando
     if test_target:
         pytest_command.append(test_target)
 
-    print(f"\nExecutando comando: {' '.join(pytest_command)}\n")
+    if args.spans:
+        os.environ['TRACE_SPANS'] = 'true'
 
-    result = subprocess.run(pytest_command, capture_output=True, text=True)
+    print(f"\nExecutando comando: {' '.join(pytest_command)}\n")
 
-    print(result.stdout)
-    if result.stderr:
-        print("--- Erros do Pytest ---")
-        print(result.stderr)
-        print("-----------------------")
+    stream_pytest(pytest_command, execution_path)
+    print(f"Saída completa do pytest: {os.path.join(execution_path, PYTEST_LOG_NAME)}")
 
     print("\n--- Gerando Relatório HTML ---")
     try:
@@ -111,6 +355,12 @@ def run():
     except Exception as e:
         print(f"Ocorreu um erro ao gerar o relatório: {e}")
 
+    # Registra a execução no histórico antes da limpeza, que apaga os diretórios antigos
+    try:
+        run_history.ingest_all(REPORTS_BASE_DIR)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Aviso: não foi possível atualizar o histórico de execuções: {e}")
+
     removed_reports = prune_old_reports(REPORTS_BASE_DIR, keep=10)
     if removed_reports:
         print("\n--- Limpando relatórios antigos ---")
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Histórico das execuções em SQLite (sobrevive à limpeza de `execution_reports`).
+
+Cada execução finalizada tem seus resultados (duração, status, reruns) e o
+tamanho dos artefatos gravados em `execution_reports/historico.sqlite`, com
+índices por teste e data para consultar tendências rapidamente.
+
+Uso:
+    python run_history.py ingerir [execution_reports/<id> ...]
+    python run_history.py tendencia test_integracao_carga_com_sucesso --limite 30
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+REPORTS_BASE_DIR = 'execution_reports'
+HISTORY_DB = os.getenv('RUN_HISTORY_DB', os.path.join(REPORTS_BASE_DIR, 'historico.sqlite'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    id TEXT PRIMARY KEY,
+    iniciado_em REAL NOT NULL,
+    duracao REAL NOT NULL,
+    total INTEGER NOT NULL,
+    passaram INTEGER NOT NULL,
+    falharam INTEGER NOT NULL,
+    erros INTEGER NOT NULL,
+    pulados INTEGER NOT NULL,
+    reruns INTEGER NOT NULL,
+    tamanho_bytes INTEGER NOT NULL,
+    tamanho_artefatos_bytes INTEGER NOT NULL,
+    ingerido_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_execucoes_iniciado_em ON execucoes (iniciado_em);
+
+CREATE TABLE IF NOT EXISTS resultados (
+    execucao_id TEXT NOT NULL REFERENCES execucoes (id) ON DELETE CASCADE,
+    test_id TEXT NOT NULL,
+    iniciado_em REAL NOT NULL,
+    status TEXT NOT NULL,
+    duracao REAL NOT NULL,
+    reruns INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (execucao_id, test_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_resultados_teste_data ON resultados (test_id, iniciado_em);
+"""
+
+_STATUS = r'(?P<status>PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS|RERUN)\b'
+# Linhas de resultado do pytest -v: "tests/x.py::test_y PASSED   [ 50%]" e,
+# com pytest-xdist (-n), "[gw0] [ 50%] PASSED tests/x.py::test_y".
+# Usadas também pelo progresso do run_and_report.
+RESULT_LINES = (
+    re.compile(r'^(?P<nodeid>\S+::\S+)\s+' + _STATUS),
+    re.compile(r'^(?:\[gw\d+\]\s+)?\[\s*\d+%\]\s+' + _STATUS + r'\s+(?P<nodeid>\S+::\S+)'),
+)
+# Elementos de rerun no formato JUnit estendido (Surefire / pytest-rerunfailures)
+_RERUN_TAGS = ('rerunFailure', 'rerunError', 'flakyFailure', 'flakyError')
+
+
+@contextmanager
+def _connect(db_path=None):
+    db_path = db_path or HISTORY_DB
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    with closing(sqlite3.connect(db_path, timeout=30)) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(_SCHEMA)
+        yield conn
+
+
+def _test_id(classname, name):
+    """Identificador estável do teste: `tests.test_proposta::test_x[chromium]`."""
+    return f"{classname}::{name}" if classname else name
+
+
+def match_result_line(line):
+    """Casa uma linha de resultado do pytest -v (com ou sem xdist); None se não for resultado."""
+    return next((match for match in (pattern.match(line) for pattern in RESULT_LINES) if match), None)
+
+
+def _nodeid_to_test_id(nodeid):
+    path, _, name = nodeid.partition('::')
+    if path.endswith('.py'):
+        path = path[:-3]
+    return _test_id(path.replace('/', '.').replace('\\', '.'), name.replace('::', '.'))
+
+
+def _count_reruns_from_log(execution_path):
+    """Conta os reruns por teste na saída gravada pelo run_and_report."""
+    reruns = {}
+    log_path = os.path.join(execution_path, 'pytest_output.log')
+    try:
+        with open(log_path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                match = match_result_line(line)
+                if match and match.group('status') == 'RERUN':
+                    test_id = _nodeid_to_test_id(match.group('nodeid'))
+                    reruns[test_id] = reruns.get(test_id, 0) + 1
+    except FileNotFoundError:
+        pass
+    return reruns
+
+
+def _iter_results(xml_path):
+    """Lê os <testcase> do JUnit com iterparse: (test_id, status, duração, reruns)."""
+    for _, elem in ET.iterparse(xml_path, events=('end',)):
+        if elem.tag != 'testcase':
+            continue
+
+        children = {child.tag for child in elem}
+        if 'error' in children:
+            status = 'error'
+        elif 'failure' in children:
+            status = 'failed'
+        elif 'skipped' in children:
+            status = 'skipped'
+        else:
+            status = 'passed'
+
+        reruns = sum(1 for child in elem if child.tag in _RERUN_TAGS)
+        yield _test_id(elem.get('classname'), elem.get('name')), status, float(elem.get('time') or 0), reruns
+        elem.clear()
+
+
+def _directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for file_name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file_name))
+            except OSError:
+                pass
+    return total
+
+
+def _execution_start(execution_path, xml_path):
+    """Data da execução: nome do diretório (`%Y%m%d_%H%M%S`), senão o JUnit, senão o mtime."""
+    try:
+        return datetime.strptime(os.path.basename(execution_path), '%Y%m%d_%H%M%S').timestamp()
+    except ValueError:
+        pass
+
+    for _, elem in ET.iterparse(xml_path, events=('start',)):
+        if elem.tag == 'testsuite' and elem.get('timestamp'):
+            try:
+                return datetime.fromisoformat(elem.get('timestamp')).timestamp()
+            except ValueError:
+                break
+    return os.path.getmtime(xml_path)
+
+
+def _suite_duration(xml_path):
+    """Duração real (wall time) da suíte: atributo `time` dos <testsuite>; None se ausente."""
+    duration = None
+    for _, elem in ET.iterparse(xml_path, events=('start',)):
+        if elem.tag == 'testsuite' and elem.get('time'):
+            try:
+                duration = (duration or 0.0) + float(elem.get('time'))
+            except ValueError:
+                pass
+    return duration
+
+
+def ingest_execution(execution_path, db_path=None):
+    """Grava (ou regrava) uma execução finalizada no histórico. Retorna o nº de testes."""
+    execution_path = os.path.abspath(execution_path)
+    xml_path = os.path.join(execution_path, 'report.xml')
+    if not os.path.isfile(xml_path):
+        print(f"Aviso: {xml_path} não encontrado; execução não registrada no histórico.")
+        return 0
+
+    execution_id = os.path.basename(execution_path)
+    started = _execution_start(execution_path, xml_path)
+    log_reruns = _count_reruns_from_log(execution_path)
+
+    rows = []
+    counts = {'passed': 0, 'failed': 0, 'error': 0, 'skipped': 0}
+    try:
+        for test_id, status, duration, reruns in _iter_results(xml_path):
+            reruns = max(reruns, log_reruns.get(test_id, 0))
+            counts[status] += 1
+            rows.append((execution_id, test_id, started, status, duration, reruns))
+        # Em paralelo (-n) a soma dos testes passa do tempo real: usa o da suíte
+        duration = _suite_duration(xml_path)
+    except ET.ParseError as exc:
+        print(f"Aviso: não foi possível ler {xml_path}: {exc}")
+        return 0
+    if duration is None:
+        duration = sum(row[4] for row in rows)
+
+    with _connect(db_path) as conn, conn:
+        conn.execute("DELETE FROM execucoes WHERE id = ?", [execution_id])
+        conn.execute(
+            """
+            INSERT INTO execucoes (id, iniciado_em, duracao, total, passaram, falharam, erros, pulados,
+                                   reruns, tamanho_bytes, tamanho_artefatos_bytes, ingerido_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                execution_id, started, duration, len(rows),
+                counts['passed'], counts['failed'], counts['error'], counts['skipped'],
+                sum(row[5] for row in rows), _directory_size(execution_path),
+                _directory_size(os.path.join(execution_path, 'artifacts')), time.time(),
+            ],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO resultados (execucao_id, test_id, iniciado_em, status, duracao, reruns) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+def ingest_all(base_dir=REPORTS_BASE_DIR, db_path=None, only_missing=True):
+    """Registra as execuções de `base_dir` (por padrão, apenas as ainda ausentes)."""
+    try:
+        entries = sorted(
+            entry for entry in os.listdir(base_dir)
+            if os.path.isdir(os.path.join(base_dir, entry))
+        )
+    except FileNotFoundError:
+        return 0
+
+    if only_missing:
+        with _connect(db_path) as conn:
+            known = {row[0] for row in conn.execute("SELECT id FROM execucoes")}
+        entries = [entry for entry in entries if entry not in known]
+
+    for entry in entries:
+        ingest_execution(os.path.join(base_dir, entry), db_path)
+    return len(entries)
+
+
+def trend_for_test(test_pattern, limit=20, db_path=None):
+    """Últimas execuções dos testes cujo id contém `test_pattern`, da mais recente para a mais antiga."""
+    with _connect(db_path) as conn:
+        test_ids = [
+            row[0] for row in conn.execute(
+                "SELECT DISTINCT test_id FROM resultados WHERE test_id = ? OR test_id LIKE ?",
+                [test_pattern, f"%{test_pattern}%"],
+            )
+        ]
+        trend = {}
+        for test_id in test_ids:
+            trend[test_id] = conn.execute(
+                """
+                SELECT execucao_id, iniciado_em, status, duracao, reruns FROM resultados
+                WHERE test_id = ? ORDER BY iniciado_em DESC LIMIT ?
+                """,
+                [test_id, limit],
+            ).fetchall()
+    return trend
+
+
+def _print_trend(trend):
+    if not trend:
+        print("Nenhum teste encontrado no histórico.")
+        return
+
+    for test_id, rows in trend.items():
+        durations = [row[3] for row in rows if row[2] != 'skipped']
+        average = sum(durations) / len(durations) if durations else 0
+        print(f"\n{test_id}  (média {average:.1f}s em {len(durations)} execuções)")
+        for execution_id, started, status, duration, reruns in rows:
+            when = datetime.fromtimestamp(started).strftime('%Y-%m-%d %H:%M')
+            rerun_info = f"  reruns={reruns}" if reruns else ""
+            print(f"  {when}  {execution_id:<16} {status:<8} {duration:8.1f}s{rerun_info}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Histórico das execuções de teste.")
+    parser.add_argument('--db', default=None, help=f"Banco do histórico (padrão: {HISTORY_DB})")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    ingest_parser = subparsers.add_parser('ingerir', help="Registra execuções no histórico")
+    ingest_parser.add_argument('execucoes', nargs='*',
+                               help=f"Diretórios de execução (padrão: os ainda ausentes em {REPORTS_BASE_DIR})")
+
+    trend_parser = subparsers.add_parser('tendencia', help="Mostra a evolução da duração de um teste")
+    trend_parser.add_argument('teste', help="Id do teste ou parte dele")
+    trend_parser.add_argument('--limite', type=int, default=20, help="Quantidade de execuções por teste")
+
+    args = parser.parse_args(argv)
+
+    if args.comando == 'ingerir':
+        if args.execucoes:
+            for execution_path in args.execucoes:
+                print(f"{execution_path}: {ingest_execution(execution_path, args.db)} testes registrados")
+        else:
+            print(f"{ingest_all(db_path=args.db)} execuções registradas")
+    else:
+        started = time.perf_counter()
+        _print_trend(trend_for_test(args.teste, args.limite, args.db))
+        print(f"\nConsulta em {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
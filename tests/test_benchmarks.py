@@ -0,0 +1,77 @@
+# tests/test_benchmarks.py
+#
+# Benchmarks das primitivas e fluxos dos page objects contra o portal local.
+# Só rodam com --benchmark (veja utils/pytest_benchmarks.py).
+
+import pytest
+from playwright.sync_api import Page
+
+from pages.base_page import BasePage
+from pages.base_page_multi import BasePageMulti
+from pages.booking_page import BookingPage
+from pages.cargas_page import CargasPage
+
+pytestmark = pytest.mark.benchmark
+
+
+def test_preencher(page: Page, portal_local, desempenho):
+    page.goto(f"{portal_local.url}/frame/booking")
+    pagina = BasePage(page)
+    campo = page.locator('input[name="txtdesc_viagem_navio"]')
+
+    desempenho.medir("BasePage.preencher", lambda: pagina.preencher(campo, "EXEMPLO_Navio/VOYAGE"))
+
+
+def test_localizar_no_modal(page: Page, portal_local, desempenho):
+    page.goto(f"{portal_local.url}/multi")
+    page.get_by_role("button", name="Abrir Pedido").click()
+    paginas = []
+
+    # Um page object novo por rodada: inclui a resolução inicial do modal do topo
+    desempenho.medir(
+        "BasePageMulti.localizar_no_modal",
+        lambda: paginas[-1].localizar_no_modal("//input[@name='tara']"),
+        preparar=lambda: paginas.append(BasePageMulti(page)),
+    )
+    desempenho.medir(
+        "BasePageMulti.preencher_elemento_no_modal",
+        lambda: paginas[-1].preencher_elemento_no_modal("//input[@name='tara']", "2200"),
+    )
+
+
+def test_preencher_dados_booking(page: Page, portal_local, desempenho):
+    portal_local.atraso = 0.05  # latência de servidor fixa para as chamadas de API
+    booking_page = BookingPage(page)
+
+    def abrir_booking():
+        page.goto(portal_local.url)
+        booking_page.navegar_pagina_booking()
+
+    desempenho.medir(
+        "BookingPage.preencher_dados_booking",
+        lambda: booking_page.preencher_dados_booking(
+            proposta_comercial="123456",
+            navio_viagem="EXEMPLO_Navio/VOYAGE",
+            porto_origem="SSZ",
+            municipio_origem="Santos - Terminal 2",
+            porto_destino="MAO",
+            municipio_destino="Manaus - Terminal 3",
+            tipo_container="20DC",
+            qtde_containers="4",
+        ),
+        preparar=abrir_booking,
+        rodadas=5,
+        aquecimento=1,
+    )
+
+
+def test_wait_for_integration(page: Page, portal_local, desempenho):
+    portal_local.atrasos["/api/integracao"] = 0.2  # integração conclui na primeira consulta, após 200 ms
+    cargas_page = CargasPage(page)
+
+    desempenho.medir(
+        "CargasPage.wait_for_integration",
+        cargas_page.wait_for_integration,
+        preparar=lambda: page.goto(f"{portal_local.url}/cargas"),
+        rodadas=10,
+    )
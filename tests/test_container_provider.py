@@ -0,0 +1,100 @@
+# tests/test_container_provider.py
+#
+# Reserva de números de container entre workers (SQLite compartilhado), sem
+# consultar os bancos: a busca de candidatos é injetada.
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from utils.container_provider import ContainerProvider
+
+CANDIDATOS = [f"ABCU{n:07d}" for n in range(6)]
+
+
+def _provider(tmp_path, worker, buscar=None, **kwargs):
+    return ContainerProvider(
+        reserva_path=str(tmp_path / "containers.sqlite"), worker_id=worker,
+        buscar=buscar or (lambda: iter(CANDIDATOS)), **kwargs
+    )
+
+
+def _reservas(tmp_path):
+    with sqlite3.connect(tmp_path / "containers.sqlite") as conn:
+        return dict(conn.execute("SELECT num_container, worker FROM reservas"))
+
+
+def test_workers_recebem_containers_diferentes(tmp_path):
+    gw0, gw1 = _provider(tmp_path, "gw0", lote=2), _provider(tmp_path, "gw1", lote=2)
+    try:
+        entregues = [gw0.obter(timeout=5), gw1.obter(timeout=5), gw0.obter(timeout=5), gw1.obter(timeout=5)]
+    finally:
+        gw0.parar()
+        gw1.parar()
+
+    assert None not in entregues
+    assert len(set(entregues)) == 4
+
+
+def test_reserva_vencida_e_liberada_e_a_recente_de_outro_worker_nao(tmp_path):
+    _provider(tmp_path, "gw0")._preparar_reservas()
+    with sqlite3.connect(tmp_path / "containers.sqlite") as conn:
+        conn.executemany(
+            "INSERT INTO reservas (num_container, worker, reservado_em) VALUES (?, ?, ?)",
+            [(CANDIDATOS[0], "gw9", time.time() - 7200), (CANDIDATOS[1], "gw9", time.time())],
+        )
+
+    provider = _provider(tmp_path, "gw0", ttl=3600)
+    try:
+        assert [provider.obter(timeout=5), provider.obter(timeout=5)] == [CANDIDATOS[0], CANDIDATOS[2]]
+    finally:
+        provider.parar()
+
+
+def test_parar_apaga_as_reservas_nao_consumidas(tmp_path):
+    provider = _provider(tmp_path, "gw0", lote=2)
+    consumido = provider.obter(timeout=5)
+    provider.parar()
+
+    assert _reservas(tmp_path) == {consumido: "gw0"}
+
+
+def test_obter_retorna_none_quando_os_candidatos_acabam(tmp_path):
+    provider = _provider(tmp_path, "gw0", buscar=lambda: iter(CANDIDATOS[:1]))
+    try:
+        assert provider.obter(timeout=5) == CANDIDATOS[0]
+        assert provider.obter(timeout=5) is None
+        assert provider.obter(timeout=5) is None
+    finally:
+        provider.parar()
+
+
+def test_obter_propaga_falha_da_busca(tmp_path):
+    def buscar():
+        raise ConnectionError("banco fora do ar")
+        yield
+
+    provider = _provider(tmp_path, "gw0", buscar=buscar)
+    try:
+        with pytest.raises(RuntimeError, match="banco fora do ar"):
+            provider.obter(timeout=5)
+    finally:
+        provider.parar()
+
+
+def test_obter_expira_com_timeout_claro(tmp_path):
+    liberar = threading.Event()
+
+    def buscar():
+        liberar.wait(5)
+        yield from CANDIDATOS
+
+    provider = _provider(tmp_path, "gw0", buscar=buscar)
+    try:
+        with pytest.raises(TimeoutError, match="Nenhum container válido"):
+            provider.obter(timeout=0.1)
+    finally:
+        liberar.set()
+        provider.parar()
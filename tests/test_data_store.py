@@ -0,0 +1,62 @@
+# tests/test_data_store.py
+#
+# Publicação e consumo de artefatos entre testes (SQLite em tmp_path): espera
+# pelo produtor, falha registrada, rerun e sobra de execução anterior.
+
+import threading
+import time
+
+from utils.data_store import TestDataStore
+
+
+def _store(tmp_path, run_id, worker="gw0"):
+    return TestDataStore(path=str(tmp_path / "dados.sqlite"), run_id=run_id, worker_id=worker)
+
+
+def test_consumir_entrega_cada_artefato_uma_vez_do_mais_antigo(tmp_path):
+    store = _store(tmp_path, "exec")
+    store.publicar("numero_booking", "BK000001")
+    store.publicar("numero_booking", "BK000002")
+
+    assert store.consumir("numero_booking", "test_a", timeout=0) == "BK000001"
+    assert store.consumir("numero_booking", "test_b", timeout=0) == "BK000002"
+    assert store.consumir("numero_booking", "test_c", timeout=0, aceitar_anteriores=False) is None
+
+
+def test_rerun_do_consumidor_recebe_o_mesmo_artefato(tmp_path):
+    store = _store(tmp_path, "exec")
+    store.publicar("numero_booking", "BK000001")
+    store.publicar("numero_booking", "BK000002")
+
+    assert store.consumir("numero_booking", "test_a", timeout=0) == "BK000001"
+    assert store.consumir("numero_booking", "test_a", timeout=0) == "BK000001"
+
+
+def test_consumir_espera_o_produtor_de_outro_worker(tmp_path):
+    consumidor, produtor = _store(tmp_path, "exec", "gw0"), _store(tmp_path, "exec", "gw1")
+    anterior = _store(tmp_path, "exec-anterior")
+    anterior.publicar("numero_booking", "BK_ANTIGO")
+    threading.Timer(0.3, produtor.publicar, ["numero_booking", "BK_NOVO"]).start()
+
+    # A sobra da execução anterior não é usada enquanto o produtor desta execução não terminar
+    assert consumidor.consumir("numero_booking", "test_a", timeout=10) == "BK_NOVO"
+
+
+def test_falha_do_produtor_encerra_a_espera_e_usa_a_sobra_mais_recente(tmp_path):
+    anterior = _store(tmp_path, "exec-anterior")
+    anterior.publicar("numero_booking", "BK_MAIS_ANTIGO")
+    anterior.publicar("numero_booking", "BK_ANTIGO")
+    store = _store(tmp_path, "exec")
+    store.registrar_falha("numero_booking")
+
+    inicio = time.monotonic()
+    assert store.consumir("numero_booking", "test_a", timeout=60) == "BK_ANTIGO"
+    assert time.monotonic() - inicio < 5
+
+
+def test_sem_fallback_nao_usa_sobra_de_execucao_anterior(tmp_path, monkeypatch):
+    _store(tmp_path, "exec-anterior").publicar("numero_booking", "BK_ANTIGO")
+    monkeypatch.setenv("DATA_STORE_FALLBACK", "false")
+    store = _store(tmp_path, "exec")
+
+    assert store.consumir("numero_booking", "test_a", timeout=0) is None
@@ -0,0 +1,280 @@
+# tests/test_database_client.py
+#
+# Pool de conexões e helpers de consulta do DatabaseClient, sem banco real:
+# as conexões do pyodbc são substituídas por stubs que registram o uso.
+
+import pyodbc
+import pytest
+
+from utils import utils
+from utils.utils import ConnectionPool, DatabaseClient
+
+
+class CursorFalso:
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.description = None
+        self.arraysize = 1
+        self.fechado = False
+        self._linhas = []
+
+    def execute(self, query, params=None):
+        if self.conexao.quebrada:
+            raise pyodbc.Error("conexão perdida")
+        self.conexao.queries.append((" ".join(query.split()), list(params or [])))
+        colunas, self._linhas = self.conexao.responder(query, list(params or []))
+        self.description = [(coluna,) for coluna in colunas] if colunas else None
+        self.rowcount = len(self._linhas)
+
+    def fetchone(self):
+        return self._linhas.pop(0) if self._linhas else None
+
+    def fetchall(self):
+        linhas, self._linhas = self._linhas, []
+        return linhas
+
+    def fetchmany(self, tamanho):
+        lote, self._linhas = self._linhas[:tamanho], self._linhas[tamanho:]
+        return lote
+
+    def close(self):
+        self.fechado = True
+
+
+class ConexaoFalsa:
+    def __init__(self, responder=None):
+        self.responder = responder or (lambda query, params: (["valor"], [(1,)]))
+        self.quebrada = False
+        self.fechada = False
+        self.queries = []
+        self.cursores = []
+        self.cursores_abertos_no_rollback = []
+
+    def cursor(self):
+        cursor = CursorFalso(self)
+        self.cursores.append(cursor)
+        return cursor
+
+    def rollback(self):
+        self.cursores_abertos_no_rollback.append(sum(not c.fechado for c in self.cursores))
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.fechada = True
+
+
+class BancoFalso:
+    """Substituto de pyodbc.connect: cada conexão aberta é uma ConexaoFalsa registrada."""
+
+    def __init__(self):
+        self.conexoes = []
+        self.responder = None
+
+    def connect(self, connection_string, timeout=None):
+        conexao = ConexaoFalsa(self.responder)
+        self.conexoes.append(conexao)
+        return conexao
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    banco = BancoFalso()
+    monkeypatch.setattr(utils.pyodbc, "connect", banco.connect)
+    monkeypatch.setattr(utils, "_pools", {})
+    return banco
+
+
+@pytest.fixture
+def conexoes(banco):
+    return banco.conexoes
+
+
+@pytest.fixture
+def cliente(monkeypatch, conexoes):
+    for nome, valor in {"T_DRIVER": "ODBC Driver 18", "T_SERVER": "srv", "T_DATABASE": "db",
+                        "T_USERNAME": "u", "T_PASSWORD": "p"}.items():
+        monkeypatch.setenv(nome, valor)
+    return DatabaseClient("T_DRIVER", "T_SERVER", "T_DATABASE", "T_USERNAME", "T_PASSWORD")
+
+
+# ========================
+# ConnectionPool
+# ========================
+
+def test_pool_reaproveita_a_conexao_devolvida(conexoes):
+    pool = ConnectionPool("dsn", timeout=5)
+
+    with pool.connection() as primeira:
+        pass
+    with pool.connection() as segunda:
+        pass
+
+    assert primeira is segunda
+    assert len(conexoes) == 1
+
+
+def test_pool_descarta_conexao_que_falha_no_health_check(conexoes):
+    pool = ConnectionPool("dsn", timeout=5, health_check_interval=0)
+    with pool.connection() as quebrada:
+        pass
+    quebrada.quebrada = True
+
+    with pool.connection() as nova:
+        pass
+
+    assert nova is not quebrada
+    assert quebrada.fechada
+    assert all(cursor.fechado for cursor in quebrada.cursores)
+
+
+def test_pool_descarta_conexao_ociosa_demais(conexoes):
+    pool = ConnectionPool("dsn", timeout=5, max_idle=0, health_check=False)
+    with pool.connection() as antiga:
+        pass
+
+    with pool.connection() as nova:
+        pass
+
+    assert nova is not antiga
+    assert antiga.fechada
+
+
+def test_pool_descarta_conexao_apos_erro_no_uso(conexoes):
+    pool = ConnectionPool("dsn", timeout=5)
+
+    with pytest.raises(pyodbc.Error):
+        with pool.connection() as conexao:
+            raise pyodbc.Error("falhou no meio da query")
+
+    assert conexao.fechada
+    with pool.connection() as nova:
+        assert nova is not conexao
+
+
+def test_pool_bloqueia_quando_todas_as_conexoes_estao_em_uso(conexoes):
+    pool = ConnectionPool("dsn", timeout=5, max_size=1, acquire_timeout=0.05)
+    emprestada = pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+    pool.release(emprestada)
+    pool.release(pool.acquire())
+
+
+def test_pool_encerrado_fecha_as_devolvidas_e_recusa_novos_emprestimos(conexoes):
+    pool = ConnectionPool("dsn", timeout=5)
+    ociosa = pool.acquire()
+    em_uso = pool.acquire()
+    pool.release(ociosa)
+
+    pool.close()
+    pool.release(em_uso)
+
+    assert ociosa.fechada and em_uso.fechada
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+# ========================
+# DatabaseClient
+# ========================
+
+@pytest.mark.parametrize("chamada", [
+    lambda db: db.fetch_one("SELECT 1"),
+    lambda db: db.fetch_all("SELECT 1"),
+    lambda db: db.execute("UPDATE t SET x = 1"),
+])
+def test_cursor_fechado_antes_de_a_conexao_voltar_ao_pool(cliente, conexoes, chamada):
+    chamada(cliente)
+
+    (conexao,) = conexoes
+    assert conexao.cursores_abertos_no_rollback == [0]
+    assert all(cursor.fechado for cursor in conexao.cursores)
+
+
+# ========================
+# Busca de containers válidos (paginação por chave + anti-join em lote)
+# ========================
+
+@pytest.fixture
+def bases_de_containers(monkeypatch, banco):
+    """DB1 com 2500 candidatos em ordem; DB2 já tem alguns deles (com caixa/espaços diferentes)."""
+    for prefixo in ("DB1", "DB2"):
+        for sufixo, valor in {"DRIVER": "ODBC Driver 18", "SERVER": prefixo, "DATABASE": "db",
+                              "USERNAME": "u", "PASSWORD": "p"}.items():
+            monkeypatch.setenv(f"{prefixo}_{sufixo}", valor)
+
+    candidatos = [f"ABCU{n:07d}" for n in range(2500)]
+    existentes = {"ABCU0000000", "ABCU0000001", "ABCU0002000"}
+
+    def responder(query, params):
+        if "FROM container" in query:
+            top, ultimo = params
+            return ["num_container"], [(c,) for c in candidatos if c > ultimo][:top]
+        if "FROM t_container" in query:
+            return ["ctr_descricao"], [(f" {c.lower()} ",) for c in params if c in existentes]
+        raise AssertionError(f"query inesperada: {query}")
+
+    banco.responder = responder
+    return candidatos, existentes
+
+
+def _queries(banco, tabela):
+    return [params for conexao in banco.conexoes for query, params in conexao.queries if f"FROM {tabela}" in query]
+
+
+def test_containers_validos_paginam_por_chave_e_respeitam_o_limite_de_parametros(banco, bases_de_containers):
+    candidatos, existentes = bases_de_containers
+
+    validos = list(DatabaseClient.iterar_containers_validos(batch_size=5000))
+
+    assert validos == [c for c in candidatos if c not in existentes]
+    # batch_size é limitado a 2000: duas páginas, a segunda a partir do último visto
+    assert _queries(banco, "container") == [[2000, ""], [2000, candidatos[1999]]]
+    assert [len(params) for params in _queries(banco, "t_container")] == [2000, 500]
+
+
+def test_primeiro_container_valido_consulta_so_a_primeira_pagina(banco, bases_de_containers):
+    assert DatabaseClient.buscar_primeiro_container_valido(batch_size=10) == "ABCU0000002"
+    assert len(_queries(banco, "container")) == 1
+    assert len(_queries(banco, "t_container")) == 1
+
+
+# ========================
+# Leitura em lotes (fetch_batches / iter_rows)
+# ========================
+
+@pytest.fixture
+def tabela_grande(banco):
+    banco.responder = lambda query, params: (["id", "nome"], [(n, f"linha {n}") for n in range(7)])
+
+
+def test_fetch_batches_gera_lotes_de_arraysize(cliente, tabela_grande):
+    lotes = list(cliente.fetch_batches("SELECT id, nome FROM t", arraysize=3))
+
+    assert [len(lote) for lote in lotes] == [3, 3, 1]
+    assert lotes[0][0] == (0, "linha 0")
+
+
+def test_fetch_batches_com_tuplas_compartilha_o_indice_de_colunas(cliente, tabela_grande):
+    lotes = list(cliente.fetch_batches("SELECT id, nome FROM t", arraysize=5, as_tuples=True))
+
+    assert lotes[0][0] == {"id": 0, "nome": 1}
+    assert lotes[0][0] is lotes[1][0]
+    assert lotes[1][1] == [(5, "linha 5"), (6, "linha 6")]
+
+
+def test_iter_rows_interrompido_fecha_o_cursor_e_devolve_a_conexao(cliente, conexoes, tabela_grande):
+    linhas = cliente.iter_rows("SELECT id, nome FROM t", arraysize=2)
+    assert next(linhas) == (0, "linha 0")
+    linhas.close()
+
+    (conexao,) = conexoes
+    assert conexao.cursores_abertos_no_rollback == [0]
+    assert not conexao.fechada
+    # A conexão voltou ao pool e é reaproveitada
+    assert [linha[0] for linha in cliente.iter_rows("SELECT id, nome FROM t")] == list(range(7))
+    assert len(conexoes) == 1
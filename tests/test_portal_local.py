@@ -0,0 +1,81 @@
+# tests/test_portal_local.py
+#
+# Exercita os page objects contra o portal local (utils/portal_local.py):
+# esperas, resolução de modais e preenchimento de formulários sem os portais reais.
+
+import re
+
+from playwright.sync_api import Page, expect
+from pages.base_page_multi import BasePageMulti
+from pages.booking_page import BookingPage
+from pages.cargas_page import CargasPage
+from utils.waiters import BackoffWaiter, SondaHttp
+
+
+def test_booking_local_com_atraso(page: Page, portal_local):
+    portal_local.atraso = 0.3  # cada chamada de API leva 300 ms
+
+    page.goto(portal_local.url)
+    booking_page = BookingPage(page)
+    booking_page.navegar_pagina_booking()
+
+    booking_page.preencher_dados_booking(
+        proposta_comercial="123456",
+        navio_viagem="EXEMPLO_Navio/VOYAGE",
+        porto_origem="SSZ",
+        municipio_origem="Santos - Terminal 2",
+        porto_destino="MAO",
+        municipio_destino="Manaus - Terminal 3",
+        tipo_container="20DC",
+        qtde_containers="4"
+    )
+    booking_page.calcular_e_gravar_proposta()
+
+    assert re.fullmatch(r"BK\d{6}", booking_page.obter_numero_booking())
+    assert portal_local.requisicoes["/api/terminais"] == 2
+
+
+def test_falha_injetada_exibe_erro(page: Page, portal_local):
+    portal_local.falhar_proximas(1)
+
+    page.goto(portal_local.url)
+    booking_page = BookingPage(page)
+    booking_page.navegar_pagina_booking()
+    booking_page.digitar_caracteres(booking_page.campo_proposta_comercial, "123456")
+
+    expect(booking_page.frame_principal.get_by_text("Erro: HTTP 500")).to_be_visible()
+    expect(booking_page.input_cnpj_embarcador).to_have_value("")
+
+
+def test_modal_do_topo_e_banner_de_processamento(page: Page, portal_local):
+    portal_local.atrasos["/api/processar"] = 1.0
+
+    page.goto(f"{portal_local.url}/multi")
+    pagina = BasePageMulti(page)
+
+    pagina.clicar(page.get_by_role("button", name="Abrir Pedido"))
+    expect(pagina.localizar_no_modal("//h4")).to_have_text("Atualizar Pedido")
+
+    pagina.clicar_no_elemento_no_modal("//button[@id='abrir-pessoas']")
+    expect(pagina.localizar_no_modal("//h4")).to_have_text("Pesquisar Pessoas")
+
+    pagina.clicar_no_elemento_no_modal("//button[contains(@class, 'fechar')]")
+    expect(pagina.localizar_no_modal("//h4")).to_have_text("Atualizar Pedido")
+
+    pagina.clicar(page.get_by_role("button", name="Processar"))
+    pagina.aguardar_mensagem_processando()
+    expect(pagina.processando_messenger).to_have_count(0)
+
+
+def test_integracao_aguardada_pela_sonda_http(page: Page, portal_local):
+    portal_local.consultas_ate_integrar = 3
+
+    page.goto(f"{portal_local.url}/cargas")
+    cargas_page = CargasPage(page)
+    cargas_page.numero_booking = "BK000001"
+    sonda = SondaHttp(f"{portal_local.url}/api/integracao?booking={{booking}}", campo="concluida")
+
+    cargas_page.wait_for_integration(BackoffWaiter(inicial=0.05, maximo=0.5, prazo=10), sonda=sonda)
+
+    expect(cargas_page.primeira_etapa_button).to_be_visible()
+    assert portal_local.requisicoes["/api/integracao"] >= 4
@@ -1,7 +1,6 @@
 # tests/test_login.py
 
 import pytest
-import json
 
 from playwright.sync_api import Page, expect
 from pages.login_page_portal1 import LoginPage as login_portal1
@@ -13,29 +12,6 @@ import random
 import string
 
 
-#preciso de uma funcao para ler o arquivo json com os dados da proposta
-def carregar_dados_proposta():
-    try:
-        with open("dados.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError:
-        return {}
-
-
-
-
-@pytest.fixture(scope="session")
-def dados_proposta():
-    return carregar_dados_proposta()
-
-#preciso salvar os dados_proposta em um arquivo json após cada teste
-#e carregar os dados_proposta do arquivo json antes de cada teste
-def salvar_dados_proposta(dados_proposta):
-    with open("dados.json", "w", encoding="utf-8") as f:
-        json.dump(dados_proposta, f, indent=4, ensure_ascii=False)
-
 def gerar_string_aleatoria(tamanho=15):
     caracteres = string.ascii_uppercase + string.digits
     return ''.join(random.choices(caracteres, k=tamanho))
@@ -43,7 +19,12 @@ def gerar_string_aleatoria(tamanho=15):
 
 
 
-def test_criar_booking_com_sucesso(page: Page, dados_proposta):
+@pytest.mark.produz("numero_booking")
+def test_criar_booking_com_sucesso(page: Page, data_store):
+    numero_proposta = data_store.ultimo("numero_proposta")
+    if not numero_proposta:
+        pytest.skip("Nenhuma proposta comercial publicada no data store.")
+
     # as credenciais são lidas diretamente das variáveis de ambiente pelo
     # objeto de página durante o login
     login_page = login_portal1(page)
@@ -56,8 +37,6 @@ def test_criar_booking_com_sucesso(page: Page, dados_proposta):
     booking_page.navegar_pagina_booking()
 
     # 2. Preenche os dados do booking, usando a proposta do teste anterior
-    numero_proposta = dados_proposta.get("numero_proposta")
-
     booking_page.preencher_dados_booking(
         proposta_comercial=numero_proposta,
         navio_viagem="EXEMPLO_Navio/VOYAGE",
@@ -71,18 +50,19 @@ def test_criar_booking_com_sucesso(page: Page, dados_proposta):
 
     # 3. Calcula, grava o booking e confirma a inclusão
     booking_page.calcular_e_gravar_proposta()
-    print(booking_page.obter_numero_booking())
-    dados_proposta["numero_booking"] = booking_page.obter_numero_booking()
-    print(dados_proposta["numero_booking"])
-    
-    #salvar o dados_proposta em um arquivo json
-    with open("dados.json", "w", encoding="utf-8") as f:
-        json.dump(dados_proposta, f, indent=4, ensure_ascii=False)
+    numero_booking = booking_page.obter_numero_booking()
+    print(numero_booking)
+
+    # publica o booking para o teste de integração de carga (pode rodar em outro worker)
+    data_store.publicar("numero_booking", numero_booking)
 
 
    
 
-def test_integracao_carga_com_sucesso(page: Page, dados_proposta):  
+def test_integracao_carga_com_sucesso(page: Page, data_store, request):  
+    numero_booking = data_store.consumir("numero_booking", consumidor=request.node.nodeid)
+    if not numero_booking:
+        pytest.skip("Nenhum booking disponível no data store.")
 
     login_page = login_portal2(page)
     login_page.go_to()
@@ -92,7 +72,7 @@ def test_integracao_carga_com_sucesso(page: Page, dados_proposta):
     
     cargas_page.acessar_pagina()
     cargas_page.clicar_botao_carga()
-    cargas_page.preencher_numero_booking(dados_proposta['numero_booking'])
+    cargas_page.preencher_numero_booking(numero_booking)
 
     cargas_page.clicar_botao_pesquisar()
     
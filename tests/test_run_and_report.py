@@ -0,0 +1,34 @@
+# tests/test_run_and_report.py
+#
+# Progresso exibido pelo run_and_report a partir da saída do pytest -v,
+# com e sem pytest-xdist.
+
+import pytest
+
+from run_and_report import _ProgressTracker
+
+
+@pytest.mark.parametrize("linha, status", [
+    ("tests/test_proposta.py::test_criar_booking_com_sucesso[chromium] PASSED                [ 50%]", "PASSED"),
+    ("[gw0] [ 12%] PASSED tests/test_proposta.py::test_criar_booking_com_sucesso[chromium] ", "PASSED"),
+    ("[gw1] [100%] FAILED tests/test_proposta.py::test_integracao_carga_com_sucesso[chromium] ", "FAILED"),
+    ("[gw3] [ 66%] RERUN tests/test_proposta.py::test_integracao_carga_com_sucesso[chromium] ", "RERUN"),
+])
+def test_progresso_reconhece_linhas_de_resultado(linha, status):
+    tracker = _ProgressTracker()
+
+    assert tracker.feed(linha) is not None
+    assert tracker.counts == {status: 1}
+
+
+def test_progresso_ignora_linhas_que_nao_sao_resultado():
+    tracker = _ProgressTracker()
+
+    for linha in (
+        "[gw0] linux Python 3.11.7 cwd: /repo",
+        "created: 4/4 workers",
+        "4 workers [12 items]",
+        "tests/test_proposta.py::test_criar_booking_com_sucesso[chromium] ",
+    ):
+        assert tracker.feed(linha) is None
+    assert tracker.counts == {}
@@ -0,0 +1,43 @@
+# tests/test_run_history.py
+#
+# Ingestão de uma execução no histórico SQLite: reruns lidos do log (com e
+# sem pytest-xdist) e duração real da suíte.
+
+import sqlite3
+
+import run_history
+
+REPORT_XML = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="pytest" tests="2" time="12.5">
+    <testcase classname="tests.test_proposta" name="test_criar_booking_com_sucesso[chromium]" time="10.0"/>
+    <testcase classname="tests.test_proposta" name="test_integracao_carga_com_sucesso[chromium]" time="9.0">
+      <failure message="falhou"/>
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+PYTEST_LOG = """\
+[gw1] [ 50%] RERUN tests/test_proposta.py::test_integracao_carga_com_sucesso[chromium]
+[gw1] [ 50%] RERUN tests/test_proposta.py::test_integracao_carga_com_sucesso[chromium]
+tests/test_proposta.py::test_criar_booking_com_sucesso[chromium] RERUN
+[gw0] [100%] PASSED tests/test_proposta.py::test_criar_booking_com_sucesso[chromium]
+"""
+
+
+def test_ingestao_conta_reruns_do_xdist_e_usa_o_tempo_da_suite(tmp_path):
+    execucao = tmp_path / "20260101_100000"
+    execucao.mkdir()
+    (execucao / "report.xml").write_text(REPORT_XML, encoding="utf-8")
+    (execucao / "pytest_output.log").write_text(PYTEST_LOG, encoding="utf-8")
+    banco = str(tmp_path / "historico.sqlite")
+
+    assert run_history.ingest_execution(str(execucao), banco) == 2
+
+    with sqlite3.connect(banco) as conn:
+        assert conn.execute("SELECT duracao, reruns, falharam FROM execucoes").fetchone() == (12.5, 3, 1)
+        assert dict(conn.execute("SELECT test_id, reruns FROM resultados")) == {
+            "tests.test_proposta::test_criar_booking_com_sucesso[chromium]": 1,
+            "tests.test_proposta::test_integracao_carga_com_sucesso[chromium]": 2,
+        }
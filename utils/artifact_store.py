@@ -0,0 +1,131 @@
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional: sem ele, o relatório usa a imagem original
+    Image = None
+
+mimetypes.add_type("image/webp", ".webp")
+
+
+class ArtifactStore:
+    """Armazena screenshots por conteúdo (SHA-256) ao lado do relatório.
+
+    Cada imagem é copiada uma única vez para `artifacts/<sha256>.<ext>` e ganha
+    uma miniatura de até `max_width` px de largura (WebP, ou JPEG se o Pillow
+    não tiver suporte a WebP; padrão `REPORT_THUMB_WIDTH` ou 480). Imagens
+    idênticas (ex.: a mesma tela de erro em vários testes) são gravadas uma vez
+    só. O relatório mostra a miniatura e referencia o original por caminho relativo.
+
+    Para um HTML autônomo, `embed` devolve miniatura e original como data URIs,
+    sem gravar nada em `artifacts/`.
+    """
+
+    def __init__(self, report_dir, max_width: Optional[int] = None, quality: int = 75) -> None:
+        self.report_dir = Path(report_dir)
+        self.artifacts_dir = self.report_dir / "artifacts"
+        self.max_width = max_width or int(os.getenv("REPORT_THUMB_WIDTH") or 480)
+        self.quality = quality
+        self._embedded: Dict[str, Dict[str, str]] = {}
+
+    @staticmethod
+    def _sha256(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _relative(self, path: Path) -> str:
+        return path.relative_to(self.report_dir).as_posix()
+
+    def _render_thumbnail(self, original: Path, fmt: str, target) -> None:
+        """Grava em `target` (caminho ou buffer) a miniatura de `original` no formato `fmt`."""
+        with Image.open(original) as img:
+            img.thumbnail((self.max_width, self.max_width * 4))
+            if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            img.save(target, format=fmt, quality=self.quality)
+
+    def _thumbnail(self, original: Path, sha: str) -> Path:
+        if Image is None:
+            return original
+
+        for fmt, ext in (("WEBP", "webp"), ("JPEG", "jpg")):
+            target = self.artifacts_dir / f"{sha}.thumb.{ext}"
+            if target.is_file():
+                return target
+            tmp = target.with_name(target.name + ".tmp")
+            try:
+                self._render_thumbnail(original, fmt, tmp)
+                os.replace(tmp, target)
+                return target
+            except (OSError, KeyError, ValueError) as exc:
+                tmp.unlink(missing_ok=True)  # save() pode falhar com o arquivo parcialmente escrito
+                print(f"Aviso: não foi possível gerar miniatura {fmt} de {original}: {exc}")
+        return original
+
+    def embed(self, image_path) -> Optional[Dict[str, str]]:
+        """Retorna miniatura e original como data URIs, sem gravar em disco (HTML autônomo)."""
+        source = Path(image_path)
+        if not source.is_file():
+            print(f"Aviso: Imagem não encontrada em {source}")
+            return None
+
+        try:
+            sha = self._sha256(source)
+            if sha in self._embedded:
+                return self._embedded[sha]
+            content = source.read_bytes()
+        except OSError as exc:
+            print(f"Aviso: não foi possível ler {source}: {exc}")
+            return None
+
+        mime_type = mimetypes.guess_type(source.name)[0] or "image/png"
+        original = f"data:{mime_type};base64,{base64.b64encode(content).decode('ascii')}"
+        thumbnail = original
+        if Image is not None:
+            for fmt in ("WEBP", "JPEG"):
+                buffer = io.BytesIO()
+                try:
+                    self._render_thumbnail(source, fmt, buffer)
+                except (OSError, KeyError, ValueError) as exc:
+                    print(f"Aviso: não foi possível gerar miniatura {fmt} de {source}: {exc}")
+                    continue
+                encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+                thumbnail = f"data:image/{fmt.lower()};base64,{encoded}"
+                break
+
+        self._embedded[sha] = {"sha256": sha, "original": original, "thumbnail": thumbnail}
+        return self._embedded[sha]
+
+    def add(self, image_path) -> Optional[Dict[str, str]]:
+        """Armazena a imagem e retorna os caminhos relativos do original e da miniatura."""
+        source = Path(image_path)
+        if not source.is_file():
+            print(f"Aviso: Imagem não encontrada em {source}")
+            return None
+
+        try:
+            sha = self._sha256(source)
+            self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+            original = self.artifacts_dir / f"{sha}{source.suffix.lower() or '.png'}"
+            if not original.is_file():
+                shutil.copyfile(source, original)
+            thumbnail = self._thumbnail(original, sha)
+        except OSError as exc:
+            print(f"Aviso: não foi possível armazenar {source}: {exc}")
+            return None
+
+        return {
+            "sha256": sha,
+            "original": self._relative(original),
+            "thumbnail": self._relative(thumbnail),
+        }
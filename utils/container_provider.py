@@ -0,0 +1,177 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+from utils.utils import DatabaseClient
+
+# Carrega variáveis do .env
+load_dotenv()
+
+_FIM = object()
+
+
+class ContainerProvider:
+    """Fornece números de container válidos, diferentes para cada chamada.
+
+    Uma thread em segundo plano percorre `DatabaseClient.iterar_containers_validos`
+    e mantém até `lote` números prontos. Cada número é reservado numa tabela
+    SQLite compartilhada antes de entrar na fila, então workers concorrentes do
+    pytest-xdist (ou execuções simultâneas) nunca recebem o mesmo container.
+    Reservas mais antigas que `ttl` segundos são liberadas, e as que nenhum
+    teste consumiu são apagadas em `parar`.
+    """
+
+    _compartilhado: Optional["ContainerProvider"] = None
+    _compartilhado_lock = threading.Lock()
+
+    def __init__(self, lote: Optional[int] = None, reserva_path: Optional[str] = None, ttl: Optional[int] = None,
+                 worker_id: Optional[str] = None,
+                 buscar: Optional[Callable[..., Iterator[str]]] = None) -> None:
+        self.lote = lote or int(os.getenv("CONTAINER_PREFETCH_SIZE", "20"))
+        self.reserva_path = Path(reserva_path or os.getenv("CONTAINER_RESERVA_DB", ".cache/containers.sqlite"))
+        self.ttl = ttl or int(os.getenv("CONTAINER_RESERVA_TTL", str(24 * 60 * 60)))
+        self.worker_id = worker_id or os.getenv("PYTEST_XDIST_WORKER", "master")
+        self._buscar = buscar or DatabaseClient.iterar_containers_validos
+
+        self._fila: "queue.Queue" = queue.Queue(maxsize=self.lote)
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._erro: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        # Reservados por este processo e ainda não entregues a nenhum teste
+        self._pendentes: set[str] = set()
+
+    @classmethod
+    def compartilhado(cls) -> "ContainerProvider":
+        """Instância única do processo (um por worker), criada sob demanda."""
+        with cls._compartilhado_lock:
+            if cls._compartilhado is None:
+                cls._compartilhado = cls()
+            return cls._compartilhado
+
+    @classmethod
+    def encerrar_compartilhado(cls) -> None:
+        with cls._compartilhado_lock:
+            if cls._compartilhado is not None:
+                cls._compartilhado.parar()
+                cls._compartilhado = None
+
+    # ========================
+    # Reserva entre workers
+    # ========================
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.reserva_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _preparar_reservas(self) -> None:
+        self.reserva_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._conectar()) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS reservas (
+                    num_container TEXT PRIMARY KEY,
+                    worker TEXT NOT NULL,
+                    reservado_em REAL NOT NULL
+                )
+            """)
+            conn.execute("DELETE FROM reservas WHERE reservado_em < ?", [time.time() - self.ttl])
+
+    def _reservar(self, conn: sqlite3.Connection, container: str) -> bool:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO reservas (num_container, worker, reservado_em) VALUES (?, ?, ?)",
+            [container, self.worker_id, time.time()],
+        )
+        return cursor.rowcount == 1
+
+    def _liberar(self, conn: sqlite3.Connection, containers) -> None:
+        conn.executemany(
+            "DELETE FROM reservas WHERE num_container = ? AND worker = ?",
+            [(container, self.worker_id) for container in containers],
+        )
+
+    # ========================
+    # Pré-busca em segundo plano
+    # ========================
+
+    def iniciar(self) -> "ContainerProvider":
+        """Inicia a pré-busca em segundo plano (idempotente)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._pre_buscar, name="container-prefetch", daemon=True)
+                self._thread.start()
+        return self
+
+    def _colocar(self, item) -> bool:
+        while not self._parar.is_set():
+            try:
+                self._fila.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _pre_buscar(self) -> None:
+        try:
+            self._preparar_reservas()
+            with closing(self._conectar()) as conn:
+                for container in self._buscar():
+                    if self._parar.is_set():
+                        return
+                    if not self._reservar(conn, container):
+                        continue
+                    with self._lock:
+                        self._pendentes.add(container)
+                    if not self._colocar(container):
+                        # Parado com a fila cheia: o container não será usado
+                        with self._lock:
+                            self._pendentes.discard(container)
+                        self._liberar(conn, [container])
+                        return
+        except BaseException as exc:
+            self._erro = exc
+        finally:
+            self._colocar(_FIM)
+
+    def obter(self, timeout: float = 120) -> Optional[str]:
+        """Entrega um container reservado para este chamador, ou None se não houver mais."""
+        self.iniciar()
+        try:
+            item = self._fila.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"Nenhum container válido disponível após {timeout:g}s (a consulta ao banco ainda não retornou)."
+            ) from None
+        if item is _FIM:
+            # Devolve o marcador para que as próximas chamadas também terminem
+            self._fila.put(_FIM)
+            if self._erro is not None:
+                raise RuntimeError(f"Falha ao pré-buscar containers válidos: {self._erro}") from self._erro
+            return None
+        with self._lock:
+            self._pendentes.discard(item)
+        return item
+
+    def parar(self) -> None:
+        """Para a pré-busca e apaga as reservas deste processo que nenhum teste consumiu."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+        with self._lock:
+            nao_usados, self._pendentes = list(self._pendentes), set()
+        if not nao_usados:
+            return
+        try:
+            with closing(self._conectar()) as conn:
+                self._liberar(conn, nao_usados)
+        except sqlite3.Error as exc:
+            print(f"Aviso: não foi possível liberar {len(nao_usados)} reserva(s) de container: {exc}")
+
@@ -0,0 +1,200 @@
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from playwright.sync_api import Browser, BrowserContext, Error as PlaywrightError, Page
+
+from utils.session_cache import SessionCache
+
+# Carrega variáveis do .env
+load_dotenv()
+
+# Limpa os storages pedidos no documento (cada frame limpa a sua própria origem)
+_SCRIPT_LIMPAR_STORAGE = """
+tipos => {
+    for (const tipo of tipos) {
+        try { window[tipo + 'Storage'].clear(); } catch (e) {}
+    }
+}
+"""
+
+
+# Timeout padrão do Playwright, restaurado se o teste mudou o do contexto
+_TIMEOUT_PADRAO_MS = 30000
+
+
+def _lista_env(nome: str, padrao: str = "") -> list[str]:
+    return [item.strip() for item in os.getenv(nome, padrao).split(",") if item.strip()]
+
+
+class ContextPool:
+    """Pool de contextos do navegador mantidos aquecidos no worker.
+
+    Cada contexto do pool já foi criado, semeado com as sessões salvas dos
+    portais (`SessionCache`) e, se `url_inicial` estiver definida, já está
+    estacionado nela. Os testes pegam uma página com `emprestar` e a
+    devolvem com `devolver`. Na devolução, o contexto é reiniciado:
+
+    - as rotas registradas pelo teste são removidas;
+    - os storages de `limpar_storage` ("local", "session") são limpos. O
+      localStorage da sessão salva volta a ser semeado no próximo carregamento;
+    - todas as páginas são fechadas e o próximo teste recebe uma página nova
+      (sem os listeners `page.on` e os timeouts definidos pelo teste);
+    - cabeçalhos extras, permissões, geolocalização, modo offline e timeouts
+      do contexto voltam aos valores de `context_args`;
+    - os cookies são mantidos (a sessão continua válida).
+
+    Contextos cujo reinício falha, com listeners `context.on` adicionados pelo
+    teste, ou devolvidos com `reutilizar=False` (ex.: teste que falhou), são
+    fechados e substituídos por novos no próximo empréstimo. O pool é por
+    processo: com pytest-xdist, cada worker tem o seu.
+    """
+
+    def __init__(self, browser: Browser, tamanho: Optional[int] = None,
+                 context_args: Optional[Dict[str, Any]] = None, portais: Optional[Iterable[str]] = None,
+                 url_inicial: Optional[str] = None, limpar_storage: Optional[Iterable[str]] = None) -> None:
+        self.browser = browser
+        self.tamanho = tamanho if tamanho is not None else int(os.getenv("CONTEXT_POOL_SIZE") or 2)
+        self.context_args = dict(context_args or {})
+        self.portais = list(portais if portais is not None else _lista_env("CONTEXT_POOL_PORTALS", "portal1,portal2"))
+        self.url_inicial = url_inicial if url_inicial is not None else os.getenv("CONTEXT_POOL_URL", "")
+        self.limpar_storage = list(
+            limpar_storage if limpar_storage is not None else _lista_env("CONTEXT_POOL_CLEAR_STORAGE", "local,session")
+        )
+        self._disponiveis: Deque[Page] = deque()
+        self._listeners: Dict[BrowserContext, List[str]] = {}
+        self.contadores: Dict[str, int] = {"criados": 0, "emprestados": 0, "reaproveitados": 0, "descartados": 0}
+
+    # ========================
+    # Ciclo de vida
+    # ========================
+
+    def aquecer(self) -> "ContextPool":
+        """Cria contextos até o pool ter `tamanho` disponíveis."""
+        while len(self._disponiveis) < self.tamanho:
+            self._disponiveis.append(self._criar())
+        return self
+
+    def emprestar(self) -> Page:
+        """Entrega a página de um contexto aquecido (ou de um novo, se o pool estiver vazio)."""
+        self.contadores["emprestados"] += 1
+        while self._disponiveis:
+            page = self._disponiveis.popleft()
+            if not page.is_closed():
+                self.contadores["reaproveitados"] += 1
+                return page
+            self._fechar(page)
+        return self._criar()
+
+    def devolver(self, page: Page, reutilizar: bool = True) -> None:
+        """Reinicia o contexto da página e o devolve ao pool (ou o fecha)."""
+        if not reutilizar:
+            self._descartar(page)
+            return
+        if len(self._disponiveis) >= self.tamanho:
+            self._fechar(page)
+            return
+        if self._listeners.get(page.context):
+            print(f"Aviso: contexto do pool descartado, o teste registrou listeners no contexto "
+                  f"({', '.join(sorted(set(self._listeners[page.context])))}).")
+            self._descartar(page)
+            return
+
+        try:
+            page = self._reiniciar(page)
+        except PlaywrightError as exc:
+            print(f"Aviso: contexto do pool descartado, não foi possível reiniciá-lo: {exc}")
+            self._descartar(page)
+            return
+        self._disponiveis.append(page)
+
+    def encerrar(self) -> None:
+        while self._disponiveis:
+            self._fechar(self._disponiveis.popleft())
+
+    @property
+    def estatisticas(self) -> Dict[str, int]:
+        stats = dict(self.contadores)
+        stats["disponiveis"] = len(self._disponiveis)
+        return stats
+
+    # ========================
+    # Criação e reinício
+    # ========================
+
+    def _criar(self) -> Page:
+        context = self.browser.new_context(**self.context_args)
+        for portal in self.portais:
+            SessionCache(portal).aplicar(context)
+        self._monitorar_listeners(context)
+
+        page = context.new_page()
+        self.contadores["criados"] += 1
+        self._estacionar(page)
+        return page
+
+    def _estacionar(self, page: Page) -> None:
+        if not self.url_inicial:
+            return
+        try:
+            page.goto(self.url_inicial)
+        except PlaywrightError as exc:
+            # O contexto continua útil: o teste navega por conta própria
+            print(f"Aviso: não foi possível abrir {self.url_inicial} no contexto do pool: {exc}")
+
+    def _reiniciar(self, page: Page) -> Page:
+        context = page.context
+        context.unroute_all(behavior="ignoreErrors")
+
+        if self.limpar_storage and not page.is_closed():
+            for frame in page.frames:
+                try:
+                    frame.evaluate(_SCRIPT_LIMPAR_STORAGE, self.limpar_storage)
+                except PlaywrightError:
+                    pass  # frame navegando ou já removido
+
+        # Página nova a cada empréstimo: listeners e timeouts da página não vazam
+        for outra in context.pages:
+            outra.close()
+        self._restaurar_configuracao(context)
+        page = context.new_page()
+
+        if self.url_inicial:
+            self._estacionar(page)
+        return page
+
+    def _restaurar_configuracao(self, context: BrowserContext) -> None:
+        """Desfaz set_extra_http_headers, grant_permissions, set_geolocation, set_offline e timeouts."""
+        context.set_extra_http_headers(self.context_args.get("extra_http_headers") or {})
+        context.clear_permissions()
+        if self.context_args.get("permissions"):
+            context.grant_permissions(self.context_args["permissions"])
+        context.set_geolocation(self.context_args.get("geolocation"))
+        context.set_offline(bool(self.context_args.get("offline")))
+        context.set_default_timeout(_TIMEOUT_PADRAO_MS)
+        context.set_default_navigation_timeout(_TIMEOUT_PADRAO_MS)
+
+    def _monitorar_listeners(self, context: BrowserContext) -> None:
+        """Registra os eventos de `context.on`/`context.once` chamados pelos testes."""
+        eventos = self._listeners[context] = []
+        for metodo in ("on", "once"):
+            original = getattr(context, metodo)
+
+            def registrar(evento, f, _original=original):
+                eventos.append(evento)
+                return _original(evento, f)
+
+            setattr(context, metodo, registrar)
+
+    def _descartar(self, page: Page) -> None:
+        """Fecha um contexto rejeitado (teste que falhou, listeners ou reinício com erro)."""
+        self.contadores["descartados"] += 1
+        self._fechar(page)
+
+    def _fechar(self, page: Page) -> None:
+        self._listeners.pop(page.context, None)
+        try:
+            page.context.close()
+        except PlaywrightError:
+            pass
@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Optional
+
+
+def _habilitado_no_ambiente(nome: str, padrao: str) -> bool:
+    return os.getenv(nome, padrao).lower() in ("1", "true", "yes")
+
+
+class TestDataStore:
+    """Armazena os artefatos que um teste produz para outro (proposta, booking...).
+
+    Substitui o `dados.json` compartilhado: cada artefato é uma linha num SQLite
+    em modo WAL, identificada por execução (`run_id`), worker e tipo. Publicar e
+    consumir são transacionais, então testes em workers diferentes do
+    pytest-xdist (ou execuções sobrepostas) não corrompem nem disputam dados.
+    """
+
+    __test__ = False  # não é uma classe de teste para o pytest
+
+    def __init__(self, path: Optional[str] = None, run_id: Optional[str] = None,
+                 worker_id: Optional[str] = None, espera_padrao: float = 0) -> None:
+        self.path = Path(path or os.getenv("TEST_DATA_STORE", ".cache/test_data.sqlite"))
+        self.run_id = run_id or os.getenv("TEST_RUN_ID") or uuid.uuid4().hex
+        self.worker_id = worker_id or os.getenv("PYTEST_XDIST_WORKER", "master")
+        self.espera_padrao = espera_padrao
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conexao() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS artefatos (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
+                    worker TEXT NOT NULL,
+                    tipo TEXT NOT NULL,
+                    valor TEXT NOT NULL,
+                    publicado_em REAL NOT NULL,
+                    consumido_em REAL,
+                    consumido_por TEXT,
+                    consumido_run TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_artefatos_tipo ON artefatos (tipo, consumido_em, run_id)")
+            # Produtores que falharam nesta execução: consumidores param de esperar por eles
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS falhas_produtor (
+                    run_id TEXT NOT NULL,
+                    tipo TEXT NOT NULL,
+                    registrado_em REAL NOT NULL,
+                    PRIMARY KEY (run_id, tipo)
+                )
+            """)
+
+    @contextmanager
+    def _conexao(self):
+        with closing(sqlite3.connect(self.path, timeout=30, isolation_level=None)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+
+    def publicar(self, tipo: str, valor: str) -> int:
+        """Publica um artefato produzido por este worker. Retorna o id gerado."""
+        with self._conexao() as conn:
+            cursor = conn.execute(
+                "INSERT INTO artefatos (run_id, worker, tipo, valor, publicado_em) VALUES (?, ?, ?, ?, ?)",
+                [self.run_id, self.worker_id, tipo, str(valor), time.time()],
+            )
+            return cursor.lastrowid
+
+    def registrar_falha(self, tipo: str) -> None:
+        """Registra que o produtor do tipo falhou nesta execução (nada será publicado)."""
+        with self._conexao() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO falhas_produtor (run_id, tipo, registrado_em) VALUES (?, ?, ?)",
+                [self.run_id, tipo, time.time()],
+            )
+
+    def ultimo(self, tipo: str) -> Optional[str]:
+        """Retorna o artefato mais recente do tipo, sem consumi-lo (dados de referência)."""
+        with self._conexao() as conn:
+            row = conn.execute(
+                "SELECT valor FROM artefatos WHERE tipo = ? ORDER BY id DESC LIMIT 1", [tipo]
+            ).fetchone()
+        return row[0] if row else None
+
+    def consumir(self, tipo: str, consumidor: str, timeout: Optional[float] = None,
+                 aceitar_anteriores: Optional[bool] = None) -> Optional[str]:
+        """Reserva atomicamente um artefato ainda não consumido e retorna seu valor.
+
+        Usa apenas artefatos desta execução (o mais antigo primeiro), aguardando
+        até `timeout` segundos por um produtor em outro worker; a espera termina
+        antes se o produtor registrar falha (`registrar_falha`). Só depois disso,
+        e se `aceitar_anteriores` (padrão: `DATA_STORE_FALLBACK`, ligado), pega a
+        sobra mais recente de uma execução anterior. Se o mesmo `consumidor` já
+        consumiu um artefato do tipo nesta execução (ex.: rerun do teste),
+        devolve o mesmo valor. Retorna None se não houver artefato.
+        """
+        timeout = self.espera_padrao if timeout is None else timeout
+        if aceitar_anteriores is None:
+            aceitar_anteriores = _habilitado_no_ambiente("DATA_STORE_FALLBACK", "true")
+        limite = time.monotonic() + timeout
+
+        while True:
+            valor, produtor_falhou = self._reservar(tipo, consumidor, apenas_desta_execucao=True)
+            if valor is not None:
+                return valor
+            if produtor_falhou or time.monotonic() >= limite:
+                break
+            time.sleep(1)
+
+        if not aceitar_anteriores:
+            return None
+        valor, _ = self._reservar(tipo, consumidor, apenas_desta_execucao=False)
+        if valor is not None:
+            print(f"Aviso: nenhum '{tipo}' publicado nesta execução; usando uma sobra de execução anterior.")
+        return valor
+
+    def _reservar(self, tipo: str, consumidor: str, apenas_desta_execucao: bool):
+        """Uma tentativa de reserva. Retorna `(valor ou None, produtor desta execução falhou)`."""
+        with self._conexao() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, valor FROM artefatos WHERE tipo = ? AND consumido_run = ? AND consumido_por = ?",
+                    [tipo, self.run_id, consumidor],
+                ).fetchone()
+                if row is None:
+                    if apenas_desta_execucao:
+                        row = conn.execute("""
+                            SELECT id, valor FROM artefatos
+                            WHERE tipo = ? AND consumido_em IS NULL AND run_id = ?
+                            ORDER BY id LIMIT 1
+                        """, [tipo, self.run_id]).fetchone()
+                    else:
+                        row = conn.execute("""
+                            SELECT id, valor FROM artefatos
+                            WHERE tipo = ? AND consumido_em IS NULL AND run_id <> ?
+                            ORDER BY id DESC LIMIT 1
+                        """, [tipo, self.run_id]).fetchone()
+                    if row is not None:
+                        conn.execute(
+                            "UPDATE artefatos SET consumido_em = ?, consumido_por = ?, consumido_run = ? WHERE id = ?",
+                            [time.time(), consumidor, self.run_id, row[0]],
+                        )
+                falhou = conn.execute(
+                    "SELECT 1 FROM falhas_produtor WHERE run_id = ? AND tipo = ?", [self.run_id, tipo]
+                ).fetchone() is not None
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        return (row[1] if row is not None else None), falhou
+
+    def importar_json(self, json_path: str) -> int:
+        """Importa o antigo `dados.json` (se existir) para tipos ainda sem artefato."""
+        conteudo = None
+        for encoding in ("utf-8-sig", "utf-16"):
+            try:
+                with open(json_path, "r", encoding=encoding) as f:
+                    conteudo = json.load(f)
+                break
+            except FileNotFoundError:
+                return 0
+            except (UnicodeError, json.JSONDecodeError):
+                continue
+
+        if not isinstance(conteudo, dict):
+            return 0
+
+        importados = 0
+        for tipo, valor in conteudo.items():
+            if valor and self.ultimo(tipo) is None:
+                self.publicar(tipo, valor)
+                importados += 1
+        return importados
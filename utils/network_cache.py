@@ -0,0 +1,201 @@
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+from playwright.sync_api import BrowserContext, Error as PlaywrightError, Request, Route
+
+# Carrega variáveis do .env
+load_dotenv()
+
+# Cabeçalhos que não podem ser repassados ao servir o corpo já decodificado do disco
+_CABECALHOS_DESCARTADOS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def _lista_env(nome: str, padrao: str = "") -> list[str]:
+    return [item.strip() for item in os.getenv(nome, padrao).split(",") if item.strip()]
+
+
+class NetworkCache:
+    """Camada de rotas no contexto: bloqueia recursos dispensáveis e serve estáticos do disco.
+
+    - Requisições de tipos em `bloquear_tipos` (ex.: image, media) ou cujas URLs
+      casem com `bloquear_padroes` (globs, ex.: `*google-analytics*`) são abortadas.
+    - GETs de `tipos_cache` (scripts, CSS, fontes...) são guardados em disco por
+      URL e ETag. Enquanto o `Cache-Control` (max-age/immutable) garantir que
+      estão frescos, são servidos sem rede; depois disso, são revalidados com
+      `If-None-Match` e, num 304, o corpo vem do disco.
+
+    O cache é compartilhado entre testes, workers e execuções (gravações
+    atômicas). `estatisticas` traz as requisições e bytes economizados desde o
+    último `reiniciar_contadores`.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, bloquear_tipos: Optional[Iterable[str]] = None,
+                 bloquear_padroes: Optional[Iterable[str]] = None, tipos_cache: Optional[Iterable[str]] = None) -> None:
+        self.cache_dir = Path(cache_dir or os.getenv("NETWORK_CACHE_DIR", ".cache/assets"))
+        self.bloquear_tipos = set(bloquear_tipos if bloquear_tipos is not None else _lista_env("NETWORK_BLOCK_TYPES"))
+        self.bloquear_padroes = list(
+            bloquear_padroes if bloquear_padroes is not None else _lista_env("NETWORK_BLOCK_PATTERNS")
+        )
+        self.tipos_cache = set(
+            tipos_cache if tipos_cache is not None
+            else _lista_env("NETWORK_CACHE_TYPES", "script,stylesheet,font,image")
+        )
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.reiniciar_contadores()
+
+    # ========================
+    # Contadores
+    # ========================
+
+    def reiniciar_contadores(self) -> None:
+        self.contadores: Dict[str, int] = {
+            "bloqueadas": 0,
+            "servidas_do_cache": 0,
+            "revalidadas": 0,
+            "baixadas": 0,
+            "bytes_economizados": 0,
+        }
+
+    @property
+    def estatisticas(self) -> Dict[str, int]:
+        stats = dict(self.contadores)
+        stats["requisicoes_economizadas"] = stats["bloqueadas"] + stats["servidas_do_cache"]
+        return stats
+
+    # ========================
+    # Armazenamento em disco
+    # ========================
+
+    @staticmethod
+    def _hash(texto: str) -> str:
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    def _meta_path(self, url: str) -> Path:
+        return self.cache_dir / f"{self._hash(url)}.json"
+
+    def _ler_entrada(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(url), "r", encoding="utf-8") as f:
+                entrada = json.load(f)
+            corpo = (self.cache_dir / entrada["corpo"]).read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+        entrada["_corpo"] = corpo
+        return entrada
+
+    def _gravar_atomico(self, path: Path, dados: bytes) -> None:
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(dados)
+        os.replace(tmp_path, path)
+
+    def _gravar_entrada(self, url: str, status: int, headers: Dict[str, str], corpo: bytes) -> None:
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-store" in cache_control:
+            return
+
+        etag = headers.get("etag", "")
+        max_age = _MAX_AGE.search(cache_control)
+        if "immutable" in cache_control:
+            validade = 365 * 24 * 60 * 60
+        elif max_age and "no-cache" not in cache_control:
+            validade = int(max_age.group(1))
+        elif etag or headers.get("last-modified"):
+            validade = 0  # só com revalidação
+        else:
+            return
+
+        nome_corpo = f"{self._hash(url + '|' + etag)}.body"
+        try:
+            self._gravar_atomico(self.cache_dir / nome_corpo, corpo)
+            entrada = {
+                "url": url,
+                "status": status,
+                "etag": etag,
+                "last_modified": headers.get("last-modified", ""),
+                "headers": {k: v for k, v in headers.items() if k.lower() not in _CABECALHOS_DESCARTADOS},
+                "expira_em": time.time() + validade,
+                "corpo": nome_corpo,
+            }
+            self._gravar_atomico(self._meta_path(url), json.dumps(entrada).encode("utf-8"))
+        except OSError as exc:
+            print(f"Aviso: não foi possível gravar {url} no cache de rede: {exc}")
+
+    def _renovar(self, url: str, entrada: Dict[str, Any], headers: Dict[str, str]) -> None:
+        """Atualiza a validade após um 304, sem regravar o corpo."""
+        entrada = {k: v for k, v in entrada.items() if k != "_corpo"}
+        max_age = _MAX_AGE.search(headers.get("cache-control", "").lower())
+        entrada["expira_em"] = time.time() + (int(max_age.group(1)) if max_age else 0)
+        try:
+            self._gravar_atomico(self._meta_path(url), json.dumps(entrada).encode("utf-8"))
+        except OSError:
+            pass
+
+    # ========================
+    # Roteamento
+    # ========================
+
+    def instalar(self, context: BrowserContext) -> "NetworkCache":
+        """Registra a rota no contexto: vale para todas as páginas e iframes dele."""
+        context.route("**/*", self._rotear)
+        return self
+
+    def _bloquear(self, request: Request) -> bool:
+        if request.resource_type in self.bloquear_tipos:
+            return True
+        return any(fnmatch.fnmatch(request.url, padrao) for padrao in self.bloquear_padroes)
+
+    def _rotear(self, route: Route, request: Request) -> None:
+        try:
+            if self._bloquear(request):
+                self.contadores["bloqueadas"] += 1
+                route.abort("blockedbyclient")
+                return
+
+            if request.method != "GET" or request.resource_type not in self.tipos_cache:
+                route.fallback()
+                return
+
+            self._servir_estatico(route, request)
+        except PlaywrightError as exc:
+            # Página/contexto fechados no meio da requisição: nada a fazer
+            print(f"Aviso: rota de {request.url} não concluída: {exc}")
+
+    def _servir_estatico(self, route: Route, request: Request) -> None:
+        url = request.url
+        entrada = self._ler_entrada(url)
+
+        if entrada and entrada["expira_em"] > time.time():
+            self.contadores["servidas_do_cache"] += 1
+            self.contadores["bytes_economizados"] += len(entrada["_corpo"])
+            route.fulfill(status=entrada["status"], headers=entrada["headers"], body=entrada["_corpo"])
+            return
+
+        headers = dict(request.headers)
+        if entrada and entrada.get("etag"):
+            headers["if-none-match"] = entrada["etag"]
+        elif entrada and entrada.get("last_modified"):
+            headers["if-modified-since"] = entrada["last_modified"]
+
+        response = route.fetch(headers=headers)
+        if response.status == 304 and entrada:
+            self.contadores["revalidadas"] += 1
+            self.contadores["bytes_economizados"] += len(entrada["_corpo"])
+            self._renovar(url, entrada, response.headers)
+            route.fulfill(status=entrada["status"], headers=entrada["headers"], body=entrada["_corpo"])
+            return
+
+        corpo = response.body()
+        self.contadores["baixadas"] += 1
+        if response.status == 200:
+            self._gravar_entrada(url, response.status, response.headers, corpo)
+        # O corpo já vem descomprimido: content-encoding/content-length originais o corromperiam
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _CABECALHOS_DESCARTADOS}
+        route.fulfill(status=response.status, headers=headers, body=corpo)
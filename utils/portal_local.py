@@ -0,0 +1,383 @@
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from dotenv import load_dotenv
+
+# Carrega variáveis do .env
+load_dotenv()
+
+# ====================================================
+# Páginas servidas (mesmos nomes, papéis e estruturas que os page objects usam).
+# Os marcadores {nome} são substituídos com str.replace (o CSS usa "%").
+# ====================================================
+
+_PAGINA_SHELL = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Portal Local</title>
+<style>
+  nav span, nav a { margin-right: 1rem; cursor: pointer; }
+  iframe[name="frame"] { width: 100%; height: 90vh; border: 0; }
+</style></head>
+<body>
+  <input type="text" aria-label="Procurar" placeholder="Procurar">
+  <nav>
+    <span>Comercial</span>
+    <span>Customer Service</span>
+    <a href="/frame/booking" target="frame">Booking</a>
+  </nav>
+  <iframe name="frame" src="/frame/inicio"></iframe>
+</body></html>
+"""
+
+_SCRIPT_API = """
+const overlay = document.getElementById('DivProgressbar');
+let pendentes = 0;
+async function api(url, opcoes) {
+    pendentes++;
+    overlay.style.display = 'block';
+    try {
+        const resposta = await fetch(url, opcoes);
+        if (!resposta.ok) throw new Error('HTTP ' + resposta.status);
+        return await resposta.json();
+    } catch (e) {
+        document.getElementById('erro').textContent = 'Erro: ' + e.message;
+        throw e;
+    } finally {
+        if (--pendentes === 0) overlay.style.display = 'none';
+    }
+}
+"""
+
+_PAGINA_INICIO = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"></head>
+<body><div id="DivProgressbar" style="display:none">Carregando...</div><p>Bem-vindo</p></body></html>
+"""
+
+_PAGINA_BOOKING = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8">
+<style>
+  #DivProgressbar { position: fixed; inset: 0; background: rgba(0,0,0,.3); }
+  #ISelGer { width: 100%; height: 120px; border: 1px solid #ccc; }
+</style></head>
+<body>
+  <div id="DivProgressbar" style="display:none">Carregando...</div>
+  <p id="erro"></p>
+  <form onsubmit="return false">
+    <label>Proposta <input name="txtTPC_Id_Sistema_Externo"></label>
+    <label>CNPJ Embarcador <input name="txtcgc_embarcador"></label>
+    <iframe id="ISelGer" name="ISelGer" src="about:blank"></iframe>
+    <p id="selecionado"></p>
+    <label>Navio/Viagem <input name="txtdesc_viagem_navio"></label>
+    <label>Porto Origem <select name="txtporto_origem_id">{portos}</select></label>
+    <label>Terminal Origem <select name="txtTerminalCheioOrigemID"><option value=""></option></select></label>
+    <label>Porto Destino <select name="txtporto_destino_id">{portos}</select></label>
+    <label>Terminal Destino <select name="txtTerminalCheioDestinoID"><option value=""></option></select></label>
+    <label>Tipo Container <select name="txttab_tipo_container_id">
+      <option value=""></option><option value="20DC">20DC</option><option value="40HC">40HC</option>
+    </select></label>
+    <label>Qtde <input name="txtqtde_container"></label>
+    <button type="button" id="calcular">Calcular</button>
+    <button type="button" id="gravar">Gravar</button>
+    <button type="button" name="Voltar">Voltar</button>
+    <p id="mensagem"></p>
+    <label>Nº Booking <input name="txtnum_booking" readonly></label>
+  </form>
+<script>
+{script_api}
+const campo = nome => document.querySelector('[name="' + nome + '"]');
+
+// Proposta -> CNPJ do embarcador (o portal busca no keyup)
+campo('txtTPC_Id_Sistema_Externo').addEventListener('keyup', async event => {
+    const numero = event.target.value;
+    if (numero.length < 3) return;
+    const dados = await api('/api/proposta?numero=' + encodeURIComponent(numero));
+    if (event.target.value === numero) campo('txtcgc_embarcador').value = dados.cnpj;
+});
+
+// CNPJ -> lista de seleção no iframe aninhado #ISelGer
+campo('txtcgc_embarcador').addEventListener('keyup', event => {
+    if (event.target.value.length >= 3) {
+        document.getElementById('ISelGer').src = '/frame/selecao?q=' + encodeURIComponent(event.target.value);
+    }
+});
+window.selecionarItem = nome => { document.getElementById('selecionado').textContent = 'Selecionado: ' + nome; };
+
+// Selects em cascata: porto -> terminais
+async function carregarTerminais(porto, destino) {
+    const select = campo(destino);
+    select.innerHTML = '<option value=""></option>';
+    if (!porto) return;
+    for (const terminal of await api('/api/terminais?porto=' + encodeURIComponent(porto))) {
+        select.add(new Option(terminal, terminal));
+    }
+}
+campo('txtporto_origem_id').addEventListener('change', e => carregarTerminais(e.target.value, 'txtTerminalCheioOrigemID'));
+campo('txtporto_destino_id').addEventListener('change', e => carregarTerminais(e.target.value, 'txtTerminalCheioDestinoID'));
+
+document.getElementById('calcular').addEventListener('click', async () => {
+    await api('/api/calcular', { method: 'POST' });
+    document.getElementById('mensagem').textContent = 'Cálculo efetuado';
+});
+document.getElementById('gravar').addEventListener('click', async () => {
+    const dados = await api('/api/booking', { method: 'POST' });
+    campo('txtnum_booking').value = dados.numero;
+    document.getElementById('mensagem').textContent = 'Inclusão do booking realizada com sucesso';
+});
+</script>
+</body></html>
+"""
+
+_PAGINA_SELECAO = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"></head>
+<body><table>{linhas}</table>
+<script>
+for (const celula of document.querySelectorAll('td')) {
+    celula.addEventListener('click', () => parent.selecionarItem(celula.textContent));
+}
+</script></body></html>
+"""
+
+_PAGINA_MULTI = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Portal Local 2</title>
+<style>
+  .modal { display: none; position: fixed; inset: 10%; background: #fff; border: 1px solid #333; }
+  .modal.show { display: block; }
+  .blockUI.blockPage { position: fixed; top: 40%; left: 40%; z-index: 2000; background: #ffc; }
+</style></head>
+<body>
+  <h1>Seja bem-vindo</h1>
+  <button type="button" id="abrir-pedido">Abrir Pedido</button>
+  <button type="button" id="processar">Processar</button>
+
+  <div class="modal fade" id="knoutModalAdicionarPedidoVinculado" style="z-index: 1050">
+    <div class="modal-content">
+      <div><h4>Atualizar Pedido</h4></div>
+      <input name="tara">
+      <button type="button" id="abrir-pessoas">Pesquisar Destinatário</button>
+    </div>
+  </div>
+  <div class="modal fade" id="modalPesquisarPessoas" style="z-index: 1060">
+    <div class="modal-content">
+      <div><h4>Pesquisar Pessoas</h4></div>
+      <input name="nome">
+      <button type="button" class="fechar">Fechar</button>
+    </div>
+  </div>
+<script>
+const abrir = id => document.getElementById(id).classList.add('show');
+document.getElementById('abrir-pedido').addEventListener('click', () => abrir('knoutModalAdicionarPedidoVinculado'));
+document.getElementById('abrir-pessoas').addEventListener('click', () => abrir('modalPesquisarPessoas'));
+for (const botao of document.querySelectorAll('.fechar')) {
+    botao.addEventListener('click', () => botao.closest('.modal').classList.remove('show'));
+}
+
+// Banner de processamento do blockUI: inserido e removido (detached) ao fim da requisição
+document.getElementById('processar').addEventListener('click', async () => {
+    const banner = document.createElement('div');
+    banner.className = 'blockUI blockMsg blockPage';
+    banner.textContent = 'Processando...';
+    document.body.appendChild(banner);
+    try { await fetch('/api/processar', { method: 'POST' }); } finally { banner.remove(); }
+});
+</script>
+</body></html>
+"""
+
+_PAGINA_CARGAS = """<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>Portal Local 2 - Cargas</title></head>
+<body>
+  <button type="button" id="atualizar-cargas">Atualizar as cargas</button>
+  <ul><li id="tabTMS" hidden>Primeiro</li></ul>
+<script>
+// As etapas da carga só aparecem depois que a integração em segundo plano conclui
+async function consultarIntegracao() {
+    const resposta = await fetch('/api/integracao');
+    if (resposta.ok && (await resposta.json()).concluida) document.getElementById('tabTMS').hidden = false;
+}
+document.getElementById('atualizar-cargas').addEventListener('click', consultarIntegracao);
+consultarIntegracao();
+</script>
+</body></html>
+"""
+
+PORTOS: Dict[str, list] = {
+    "SSZ": ["Santos - Terminal 1", "Santos - Terminal 2"],
+    "RIG": ["Rio Grande - Terminal 1"],
+    "MAO": ["Manaus - Terminal 1", "Manaus - Terminal 2", "Manaus - Terminal 3"],
+}
+
+CLIENTES = ["Cliente Exemplo Ltda", "Cliente Teste S.A.", "Embarcador Local ME"]
+
+
+class PortalLocal:
+    """Servidor HTTP local que reproduz as estruturas de UI de que os page objects dependem.
+
+    Serve o shell com `iframe[name="frame"]`, o formulário de booking (overlay
+    `#DivProgressbar`, iframe aninhado `#ISelGer`, selects de porto -> terminal
+    em cascata), uma página do portal 2 com pilha de modais `modal fade show`
+    e banner `blockUI blockMsg blockPage` e a tela de cargas (`/cargas`), cuja
+    etapa `#tabTMS` só aparece depois que `/api/integracao` for consultada
+    mais de `consultas_ate_integrar` vezes.
+
+    As respostas de `/api/*` e `/frame/selecao` podem ser atrasadas (`atraso`,
+    em segundos, ou `atrasos` por prefixo de caminho) e falhar com HTTP 500
+    (`taxa_falha` aleatória com semente fixa, ou `falhar_proximas(n)`). Os
+    atributos podem ser alterados durante o teste.
+    """
+
+    def __init__(self, atraso: Optional[float] = None, taxa_falha: Optional[float] = None,
+                 semente: int = 0, host: str = "127.0.0.1", porta: int = 0) -> None:
+        self.atraso = atraso if atraso is not None else float(os.getenv("PORTAL_LOCAL_ATRASO_MS") or 0) / 1000
+        self.taxa_falha = taxa_falha if taxa_falha is not None else float(os.getenv("PORTAL_LOCAL_TAXA_FALHA") or 0)
+        self._configuracao_inicial = (self.atraso, self.taxa_falha)
+        self.atrasos: Dict[str, float] = {}
+        self.consultas_ate_integrar = 0
+        self.requisicoes: Dict[str, int] = {}
+        self._falhas_pendentes = 0
+        self._aleatorio = random.Random(semente)
+        self._proximo_booking = 1
+        self._lock = threading.Lock()
+
+        self._servidor = ThreadingHTTPServer((host, porta), self._criar_handler())
+        self._servidor.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def iniciar(self) -> "PortalLocal":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._servidor.serve_forever, name="portal-local", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def falhar_proximas(self, quantidade: int = 1) -> None:
+        """As próximas `quantidade` chamadas de API respondem HTTP 500."""
+        with self._lock:
+            self._falhas_pendentes += quantidade
+
+    def reiniciar(self) -> None:
+        """Volta à configuração inicial de atraso e falhas e zera os contadores."""
+        with self._lock:
+            self.atraso, self.taxa_falha = self._configuracao_inicial
+            self.atrasos.clear()
+            self.consultas_ate_integrar = 0
+            self.requisicoes.clear()
+            self._falhas_pendentes = 0
+
+    # ========================
+    # Regras de atraso e falha
+    # ========================
+
+    def _registrar(self, caminho: str) -> None:
+        with self._lock:
+            self.requisicoes[caminho] = self.requisicoes.get(caminho, 0) + 1
+
+    def _atraso_para(self, caminho: str) -> float:
+        for prefixo, atraso in self.atrasos.items():
+            if caminho.startswith(prefixo):
+                return atraso
+        return self.atraso
+
+    def _deve_falhar(self) -> bool:
+        with self._lock:
+            if self._falhas_pendentes:
+                self._falhas_pendentes -= 1
+                return True
+            return self.taxa_falha > 0 and self._aleatorio.random() < self.taxa_falha
+
+    def _novo_booking(self) -> str:
+        with self._lock:
+            numero, self._proximo_booking = self._proximo_booking, self._proximo_booking + 1
+        return f"BK{numero:06d}"
+
+    # ========================
+    # Rotas
+    # ========================
+
+    def _responder(self, caminho: str, query: Dict[str, list]):
+        """Retorna `(status, content_type, corpo)` para o caminho pedido."""
+        valor = lambda nome: (query.get(nome) or [""])[0]
+
+        if caminho == "/":
+            return 200, "text/html", _PAGINA_SHELL
+        if caminho == "/frame/inicio":
+            return 200, "text/html", _PAGINA_INICIO
+        if caminho == "/frame/booking":
+            portos = '<option value=""></option>' + "".join(f'<option value="{p}">{p}</option>' for p in PORTOS)
+            return 200, "text/html", _PAGINA_BOOKING.replace("{portos}", portos).replace("{script_api}", _SCRIPT_API)
+        if caminho == "/multi":
+            return 200, "text/html", _PAGINA_MULTI
+        if caminho == "/cargas":
+            return 200, "text/html", _PAGINA_CARGAS
+        if caminho == "/frame/selecao":
+            termo = valor("q")
+            if termo.isdigit():
+                # busca por CNPJ: a linha traz o próprio CNPJ e o cliente
+                linhas = f"<tr><td>{termo}</td><td>{CLIENTES[0]}</td></tr>"
+            else:
+                linhas = "".join(
+                    f"<tr><td>{cliente}</td></tr>" for cliente in CLIENTES if termo[:3].lower() in cliente.lower()
+                )
+            return 200, "text/html", _PAGINA_SELECAO.replace("{linhas}", linhas)
+        if caminho == "/api/proposta":
+            return 200, "application/json", json.dumps({"numero": valor("numero"), "cnpj": "12345678000199"})
+        if caminho == "/api/terminais":
+            return 200, "application/json", json.dumps(PORTOS.get(valor("porto"), []))
+        if caminho in ("/api/calcular", "/api/processar"):
+            return 200, "application/json", json.dumps({"ok": True})
+        if caminho == "/api/booking":
+            return 200, "application/json", json.dumps({"numero": self._novo_booking()})
+        if caminho == "/api/integracao":
+            concluida = self.requisicoes.get(caminho, 0) > self.consultas_ate_integrar
+            return 200, "application/json", json.dumps({"concluida": concluida})
+        return 404, "text/plain", "Não encontrado"
+
+    def _criar_handler(self):
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _tratar(self):
+                url = urlparse(self.path)
+                portal._registrar(url.path)
+
+                if url.path.startswith("/api/") or url.path == "/frame/selecao":
+                    atraso = portal._atraso_para(url.path)
+                    if atraso > 0:
+                        time.sleep(atraso)
+                    if portal._deve_falhar():
+                        self._enviar(500, "application/json", json.dumps({"erro": "falha injetada"}))
+                        return
+
+                self._enviar(*portal._responder(url.path, parse_qs(url.query)))
+
+            def _enviar(self, status, content_type, corpo):
+                dados = corpo.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(dados)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(dados)
+
+            do_GET = _tratar
+            do_POST = _tratar
+
+            def log_message(self, format, *args):
+                pass  # silencioso: a saída dos testes fica limpa
+
+        return Handler
@@ -0,0 +1,276 @@
+"""Benchmarks das primitivas e fluxos dos page objects, com baseline e barreira de regressão.
+
+Os testes marcados com `@pytest.mark.benchmark` só rodam com `--benchmark`
+(em execuções normais são pulados). Cada um usa a fixture `desempenho`, que
+repete uma ação N vezes e registra:
+
+- p50, p95 e máximo da latência (ms);
+- idas e voltas ao driver do Playwright por execução (mensagens que o
+  cliente envia e cuja resposta aguarda; mediana das rodadas), e o total
+  por método do protocolo somado em todas as rodadas medidas.
+
+Os resultados são comparados com a baseline (`benchmarks/baseline.json`): o
+teste falha se p50 ou p95 piorarem mais que `--benchmark-threshold` (e mais
+que `BENCHMARK_FOLGA_MS`, para ignorar ruído em ações de poucos ms), ou se as
+idas e voltas aumentarem. A baseline depende da máquina: grave-a no mesmo
+ambiente em que a comparação vai rodar, e rode os benchmarks sem `-n`.
+
+Uso:
+    pytest tests/test_benchmarks.py --benchmark                  # mede e compara
+    pytest tests/test_benchmarks.py --benchmark --benchmark-save # (re)grava a baseline
+"""
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+FOLGA_MS = float(os.getenv("BENCHMARK_FOLGA_MS") or 5)
+METRICAS_DE_TEMPO = ("p50_ms", "p95_ms")
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark", "benchmarks dos page objects")
+    group.addoption("--benchmark", action="store_true", default=False,
+                    help="Roda os testes marcados com @pytest.mark.benchmark")
+    group.addoption("--benchmark-save", action="store_true", default=False,
+                    help="Grava os resultados como nova baseline em vez de comparar")
+    group.addoption("--benchmark-baseline", default=os.getenv("BENCHMARK_BASELINE", "benchmarks/baseline.json"),
+                    help="Arquivo JSON da baseline (padrão: benchmarks/baseline.json)")
+    group.addoption("--benchmark-threshold", type=float, default=float(os.getenv("BENCHMARK_THRESHOLD") or 0.25),
+                    help="Piora relativa tolerada em p50/p95 antes de falhar (padrão: 0.25 = 25%%)")
+    group.addoption("--benchmark-rounds", type=int, default=int(os.getenv("BENCHMARK_ROUNDS") or 20),
+                    help="Execuções medidas por benchmark (padrão: 20)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: benchmark de page object (só roda com --benchmark)")
+    config.pluginmanager.register(Benchmarks(config), "benchmarks")
+
+
+def ambiente() -> Dict[str, str]:
+    """Identifica onde a medição foi feita (a baseline só vale para o mesmo ambiente)."""
+    try:
+        versao_playwright = metadata.version("playwright")
+    except metadata.PackageNotFoundError:
+        versao_playwright = "?"
+    return {
+        "python": platform.python_version(),
+        "playwright": versao_playwright,
+        "plataforma": f"{sys.platform}-{platform.machine()}",
+        "maquina": platform.node(),
+    }
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil pelo método nearest-rank (sempre um valor observado)."""
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def comparar(atual: Dict[str, Any], base: Dict[str, Any], limite: float, folga_ms: float = FOLGA_MS) -> List[str]:
+    """Lista as métricas de `atual` que regrediram em relação à `base`."""
+    regressoes = []
+    for metrica in METRICAS_DE_TEMPO:
+        antes, agora = base.get(metrica), atual[metrica]
+        if antes is None:
+            continue
+        if agora > antes * (1 + limite) and agora - antes > folga_ms:
+            variacao = f" (+{(agora / antes - 1) * 100:.0f}%)" if antes > 0 else ""
+            regressoes.append(f"{metrica}: {antes:.1f} -> {agora:.1f} ms{variacao}")
+
+    antes = base.get("idas_e_voltas")
+    if antes is not None and atual["idas_e_voltas"] > antes:
+        regressoes.append(f"idas_e_voltas: {antes} -> {atual['idas_e_voltas']}")
+    return regressoes
+
+
+class ContadorProtocolo:
+    """Conta as mensagens enviadas ao driver do Playwright que aguardam resposta.
+
+    Envolve `_send_message_to_server` da conexão da página: cada chamada da API
+    síncrona (click, fill, expect...) vira uma ou mais dessas mensagens, então
+    o total é o número de idas e voltas ao navegador.
+
+    Depende de API privada do Playwright (`page._impl_obj._connection.
+    _send_message_to_server`): uma atualização do Playwright pode quebrá-la.
+    Revise este contador ao subir a versão do pacote.
+    """
+
+    def __init__(self, page) -> None:
+        self._connection = page._impl_obj._connection
+        self._original: Optional[Callable] = None
+        self.por_metodo: Counter = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.por_metodo.values())
+
+    def zerar(self) -> None:
+        self.por_metodo = Counter()
+
+    def instalar(self) -> "ContadorProtocolo":
+        original = self._original = self._connection._send_message_to_server
+
+        def contar(objeto, metodo, params, no_reply=False, *args, **kwargs):
+            if not no_reply:
+                self.por_metodo[metodo] += 1
+            return original(objeto, metodo, params, no_reply, *args, **kwargs)
+
+        self._connection._send_message_to_server = contar
+        return self
+
+    def remover(self) -> None:
+        if self._original is not None:
+            self._connection._send_message_to_server = self._original
+            self._original = None
+
+
+class Benchmarks:
+    """Guarda os resultados da sessão, compara com a baseline e a regrava com `--benchmark-save`."""
+
+    def __init__(self, config) -> None:
+        self.habilitado = config.getoption("benchmark")
+        self.salvar = config.getoption("benchmark_save")
+        self.limite = config.getoption("benchmark_threshold")
+        self.rodadas = config.getoption("benchmark_rounds")
+        self.caminho_baseline = Path(config.getoption("benchmark_baseline"))
+        self.resultados: Dict[str, Dict[str, Any]] = {}
+        self.baseline = self._carregar_baseline() if self.habilitado else {}
+
+    def _carregar_baseline(self) -> Dict[str, Any]:
+        try:
+            with open(self.caminho_baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as exc:
+            print(f"Aviso: baseline de benchmarks ilegível ({self.caminho_baseline}): {exc}")
+            return {}
+
+        if not self.salvar and baseline.get("ambiente") != ambiente():
+            print(f"Aviso: a baseline {self.caminho_baseline} foi gravada em outro ambiente "
+                  f"({baseline.get('ambiente')}); as comparações de tempo podem não ser significativas.")
+        return baseline
+
+    def metricas_da_baseline(self, nome: str) -> Optional[Dict[str, Any]]:
+        return self.baseline.get("metricas", {}).get(nome)
+
+    def pytest_collection_modifyitems(self, config, items):
+        if self.habilitado:
+            return
+        pular = pytest.mark.skip(reason="benchmark: rode com --benchmark")
+        for item in items:
+            if item.get_closest_marker("benchmark"):
+                item.add_marker(pular)
+
+    def pytest_sessionfinish(self, session):
+        if not self.salvar or not self.resultados:
+            return
+
+        # Mescla com a baseline existente: benchmarks não executados agora são mantidos
+        metricas = dict(self.baseline.get("metricas", {}))
+        metricas.update(self.resultados)
+        baseline = {
+            "ambiente": ambiente(),
+            "gravada_em": datetime.now().isoformat(timespec="seconds"),
+            "metricas": dict(sorted(metricas.items())),
+        }
+        self.caminho_baseline.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.caminho_baseline.with_name(f"{self.caminho_baseline.name}.tmp")
+        tmp_path.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        os.replace(tmp_path, self.caminho_baseline)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.resultados:
+            return
+
+        terminalreporter.section("benchmarks")
+        largura = max(len(nome) for nome in self.resultados)
+        terminalreporter.write_line(
+            f"{'benchmark':<{largura}}  {'p50 ms':>9}  {'p95 ms':>9}  {'max ms':>9}  {'idas':>5}  baseline p50/p95/idas"
+        )
+        for nome, r in sorted(self.resultados.items()):
+            base = self.metricas_da_baseline(nome)
+            referencia = (f"{base['p50_ms']:.1f} / {base['p95_ms']:.1f} / {base['idas_e_voltas']}"
+                          if base else "-")
+            terminalreporter.write_line(
+                f"{nome:<{largura}}  {r['p50_ms']:>9.1f}  {r['p95_ms']:>9.1f}  {r['max_ms']:>9.1f}  "
+                f"{r['idas_e_voltas']:>5}  {referencia}"
+            )
+        if self.salvar:
+            terminalreporter.write_line(f"Baseline gravada em {self.caminho_baseline}")
+        elif not self.baseline:
+            terminalreporter.write_line(
+                f"Sem baseline em {self.caminho_baseline}: rode com --benchmark-save para gravá-la."
+            )
+
+
+class MedidorDesempenho:
+    """Mede ações repetidas numa página: latência e idas e voltas ao driver."""
+
+    def __init__(self, page, benchmarks: Benchmarks, request) -> None:
+        self.page = page
+        self._benchmarks = benchmarks
+        self._request = request
+
+    def medir(self, nome: str, acao: Callable[[], Any], preparar: Optional[Callable[[], Any]] = None,
+              rodadas: Optional[int] = None, aquecimento: int = 2) -> Dict[str, Any]:
+        """Executa `acao` `aquecimento + rodadas` vezes e registra as métricas das rodadas medidas.
+
+        `preparar` roda antes de cada execução, fora da medição (ex.: recarregar
+        a página ou reabrir um modal). Falha o teste se houver regressão em
+        relação à baseline (exceto com `--benchmark-save`).
+        """
+        rodadas = rodadas or self._benchmarks.rodadas
+        tempos: List[float] = []
+        idas: List[int] = []
+        por_metodo: Counter = Counter()
+        contador = ContadorProtocolo(self.page).instalar()
+        try:
+            for rodada in range(aquecimento + rodadas):
+                if preparar:
+                    preparar()
+                contador.zerar()
+                inicio = time.perf_counter()
+                acao()
+                duracao = time.perf_counter() - inicio
+                if rodada >= aquecimento:
+                    tempos.append(duracao * 1000)
+                    idas.append(contador.total)
+                    por_metodo.update(contador.por_metodo)
+        finally:
+            contador.remover()
+
+        resultado = {
+            "rodadas": rodadas,
+            "p50_ms": round(percentil(tempos, 50), 2),
+            "p95_ms": round(percentil(tempos, 95), 2),
+            "max_ms": round(max(tempos), 2),
+            "idas_e_voltas": int(statistics.median_high(idas)),
+            "por_metodo": dict(por_metodo.most_common()),  # soma das rodadas medidas
+        }
+        self._benchmarks.resultados[nome] = resultado
+        self._request.node.user_properties.append(("benchmark", {nome: resultado}))
+
+        base = self._benchmarks.metricas_da_baseline(nome)
+        if base and not self._benchmarks.salvar:
+            regressoes = comparar(resultado, base, self._benchmarks.limite)
+            if regressoes:
+                pytest.fail(f"Regressão em {nome}: " + "; ".join(regressoes), pytrace=False)
+        return resultado
+
+
+@pytest.fixture
+def desempenho(request, page):
+    """Medidor de benchmarks da página do teste (veja `MedidorDesempenho.medir`)."""
+    return MedidorDesempenho(page, request.config.pluginmanager.get_plugin("benchmarks"), request)
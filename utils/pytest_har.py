@@ -0,0 +1,74 @@
+"""Gravação e reprodução de HAR por teste, para rodar os fluxos sem os portais.
+
+- `--har record`: grava o tráfego de cada teste em `<har-dir>/<teste>.zip`
+  (`context.route_from_har(update=True)`; o arquivo é escrito quando o
+  contexto fecha).
+- `--har replay`: serve as respostas gravadas a partir do disco, sem rede.
+  Requisições não gravadas são abortadas; testes sem gravação são pulados.
+- `--har-latency MS`: no replay, atrasa cada resposta em MS milissegundos para
+  simular a rede de forma determinística. As respostas são atrasadas em
+  sequência, pois o handler roda na thread do teste.
+
+A rota é registrada no contexto, então cobre também os iframes aninhados dos
+portais (`iframe[name="frame"]`, `#ISelGer`).
+
+Uso:
+    pytest tests/test_proposta.py --har record
+    pytest tests/test_proposta.py --har replay --har-latency 50
+"""
+import os
+import time
+from pathlib import Path
+
+import pytest
+from slugify import slugify
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("har", "gravação e reprodução de tráfego (HAR)")
+    group.addoption("--har", choices=("record", "replay"), default=os.getenv("HAR_MODE") or None,
+                    help="Grava (record) ou reproduz (replay) o tráfego de cada teste")
+    group.addoption("--har-dir", default=os.getenv("HAR_DIR", "hars"),
+                    help="Diretório dos arquivos HAR (padrão: hars)")
+    group.addoption("--har-latency", type=float, default=float(os.getenv("HAR_LATENCY_MS") or 0),
+                    help="Latência (ms) injetada em cada resposta no modo replay")
+    group.addoption("--har-url", default=os.getenv("HAR_URL_FILTER", "**/*"),
+                    help="Glob das URLs gravadas/reproduzidas (padrão: todas)")
+
+
+def har_path(har_dir: str, nodeid: str) -> Path:
+    """Arquivo HAR do teste; `.zip` guarda os corpos como arquivos separados (menor)."""
+    return Path(har_dir) / f"{slugify(nodeid)}.zip"
+
+
+@pytest.fixture(autouse=True)
+def har_do_teste(request):
+    """Liga a gravação ou a reprodução de HAR no contexto do teste, conforme `--har`."""
+    mode = request.config.getoption("har")
+    if not mode or "page" not in request.fixturenames:
+        yield None
+        return
+
+    path = har_path(request.config.getoption("har_dir"), request.node.nodeid)
+    url = request.config.getoption("har_url")
+    context = request.getfixturevalue("context")
+
+    if mode == "record":
+        path.parent.mkdir(parents=True, exist_ok=True)
+        context.route_from_har(path, url=url, update=True, update_content="attach", update_mode="full")
+        print(f"Gravando HAR em {path}")
+    else:
+        if not path.is_file():
+            pytest.skip(f"HAR não gravado para este teste: {path} (rode com --har record)")
+        context.route_from_har(path, url=url, not_found="abort")
+
+        latency = request.config.getoption("har_latency") / 1000
+        if latency > 0:
+            # Registrada depois do HAR, esta rota roda primeiro e repassa para ele
+            def atrasar(route):
+                time.sleep(latency)
+                route.fallback()
+
+            context.route(url, atrasar)
+
+    yield path
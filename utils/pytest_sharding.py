@@ -0,0 +1,179 @@
+"""Distribuição dos testes entre workers pela duração histórica (LPT).
+
+Lê as durações já gravadas em `execution_reports/*/report.xml` e atribui os
+testes a N partes com a heurística "longest processing time first": do teste
+mais longo para o mais curto, cada um vai para a parte com menor carga
+acumulada. Testes sem histórico recebem a duração padrão (mediana do
+histórico, ou `--default-duration`).
+
+Dentro de cada parte a ordem original de coleta é mantida, pois há testes
+que dependem de outros do mesmo arquivo (proposta -> booking -> carga).
+
+Uso:
+    pytest --shards 3 --shard-id 1          # roda apenas a parte 1 de 3 (ex.: um job de CI)
+    pytest -n 3 --dist loadgroup --lpt-groups  # uma parte por worker do pytest-xdist
+
+Ao final, o resumo mostra o makespan previsto (maior parte) e o real.
+"""
+import glob
+import os
+import statistics
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+import pytest
+
+HISTORY_RUNS = 10
+FALLBACK_DURATION = 60.0
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("sharding", "distribuição de testes por duração histórica")
+    group.addoption("--shards", type=int, default=None,
+                    help="Divide os testes em N partes balanceadas pela duração histórica")
+    group.addoption("--shard-id", type=int, default=None,
+                    help="Parte a executar (1..N), usada com --shards")
+    group.addoption("--lpt-groups", action="store_true", default=False,
+                    help="Com pytest-xdist (--dist loadgroup), marca cada teste com o xdist_group da sua parte")
+    group.addoption("--durations-history", default="execution_reports",
+                    help="Diretório com as execuções anteriores (*/report.xml)")
+    group.addoption("--default-duration", type=float, default=None,
+                    help="Duração (s) assumida para testes sem histórico (padrão: mediana do histórico)")
+
+
+def pytest_configure(config):
+    shards, shard_id = config.getoption("shards"), config.getoption("shard_id")
+    if shards is not None and (shards < 1 or shard_id is None or not 1 <= shard_id <= shards):
+        raise pytest.UsageError("--shards N exige --shard-id entre 1 e N")
+    config.pluginmanager.register(LPTSharding(config), "lpt-sharding")
+
+
+def _test_key(classname: Optional[str], name: Optional[str]) -> str:
+    """Mesmo identificador usado pelo JUnit do pytest: `tests.test_proposta::test_x[chromium]`."""
+    return f"{classname}::{name}" if classname else (name or "")
+
+
+def _item_key(item) -> str:
+    path, _, name = item.nodeid.partition("::")
+    if path.endswith(".py"):
+        path = path[:-3]
+    return _test_key(path.replace("/", ".").replace("\\", "."), name.replace("::", "."))
+
+
+def load_durations(history_dir: str, runs: int = HISTORY_RUNS) -> Dict[str, float]:
+    """Mediana das durações de cada teste nas `runs` execuções mais recentes.
+
+    Testes pulados são ignorados; arquivos ilegíveis (ex.: execução interrompida)
+    são descartados sem interromper a coleta.
+    """
+    reports = sorted(glob.glob(os.path.join(history_dir, "*", "report.xml")), reverse=True)[:runs]
+    samples: Dict[str, List[float]] = {}
+
+    for report in reports:
+        try:
+            for _, elem in ET.iterparse(report, events=("end",)):
+                if elem.tag != "testcase":
+                    continue
+                if elem.find("skipped") is None:
+                    key = _test_key(elem.get("classname"), elem.get("name"))
+                    samples.setdefault(key, []).append(float(elem.get("time") or 0))
+                elem.clear()
+        except (OSError, ET.ParseError, ValueError) as exc:
+            print(f"Aviso: histórico de duração ignorado ({report}): {exc}")
+
+    return {key: statistics.median(values) for key, values in samples.items()}
+
+
+def assign_lpt(durations: List[float], parts: int) -> List[int]:
+    """Atribui cada duração a uma parte (0..parts-1) pela heurística LPT."""
+    loads = [0.0] * parts
+    assignment = [0] * len(durations)
+    for index in sorted(range(len(durations)), key=lambda i: (-durations[i], i)):
+        part = min(range(parts), key=lambda p: (loads[p], p))
+        assignment[index] = part
+        loads[part] += durations[index]
+    return assignment
+
+
+def _parts_count(config) -> Optional[int]:
+    if config.getoption("shards"):
+        return config.getoption("shards")
+    if config.getoption("lpt_groups"):
+        workerinput = getattr(config, "workerinput", None)
+        if workerinput is not None:
+            return int(workerinput.get("workercount") or 1)
+    return None
+
+
+class LPTSharding:
+    """Aplica a distribuição LPT na coleta e compara o makespan previsto com o real."""
+
+    def __init__(self, config) -> None:
+        self.config = config
+        self.predicted: Dict[str, float] = {}   # parte -> duração prevista (s)
+        self.actual: Dict[str, float] = {}      # worker -> soma das durações reais (s)
+        self.started = time.monotonic()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        # tryfirst: o pytest-xdist lê o xdist_group no seu próprio modifyitems
+        parts = _parts_count(config)
+        if not parts or not items:
+            return
+
+        history = load_durations(config.getoption("durations_history"))
+        default = config.getoption("default_duration")
+        if default is None:
+            default = statistics.median(history.values()) if history else FALLBACK_DURATION
+
+        durations = [history.get(_item_key(item), default) for item in items]
+        assignment = assign_lpt(durations, parts)
+
+        self.predicted = {str(part + 1): 0.0 for part in range(parts)}
+        for duration, part in zip(durations, assignment):
+            self.predicted[str(part + 1)] += duration
+
+        if config.getoption("shards"):
+            shard_id = config.getoption("shard_id")
+            deselected = [item for item, part in zip(items, assignment) if part + 1 != shard_id]
+            if deselected:
+                config.hook.pytest_deselected(items=deselected)
+            items[:] = [item for item, part in zip(items, assignment) if part + 1 == shard_id]
+        else:
+            for item, part in zip(items, assignment):
+                item.add_marker(pytest.mark.xdist_group(name=f"lpt{part + 1}"))
+
+        workeroutput = getattr(config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput["lpt_predicted"] = dict(self.predicted)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        """No controlador do xdist, recebe a previsão calculada pelos workers."""
+        predicted = getattr(node, "workeroutput", {}).get("lpt_predicted")
+        if predicted:
+            self.predicted = predicted
+
+    def pytest_runtest_logreport(self, report):
+        # Soma setup + call + teardown por worker (no controlador, report.node é o worker)
+        node = getattr(report, "node", None)
+        worker = getattr(node, "workerinput", {}).get("workerid", "master") if node is not None else "master"
+        self.actual[worker] = self.actual.get(worker, 0.0) + report.duration
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.predicted:
+            return
+
+        terminalreporter.write_sep("=", "distribuição por duração (LPT)")
+        for part, seconds in sorted(self.predicted.items(), key=lambda entry: int(entry[0])):
+            terminalreporter.write_line(f"parte {part}: previsto {seconds:.1f}s")
+        terminalreporter.write_line(f"makespan previsto: {max(self.predicted.values()):.1f}s")
+
+        if self.actual:
+            for worker, seconds in sorted(self.actual.items()):
+                terminalreporter.write_line(f"{worker}: real {seconds:.1f}s")
+            terminalreporter.write_line(
+                f"makespan real: {max(self.actual.values()):.1f}s "
+                f"(tempo total da sessão: {time.monotonic() - self.started:.1f}s)"
+            )
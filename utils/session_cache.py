@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from playwright.sync_api import BrowserContext
+
+# Carrega variáveis do .env
+load_dotenv()
+
+# Script executado em cada documento para restaurar o localStorage salvo
+# para a origem correspondente (equivalente ao storage_state de um contexto novo).
+# Só age enquanto o cookie marcador da sessão estiver no contexto: limpar os
+# cookies (sessão rejeitada) ou aplicar outra sessão desliga o script.
+_SCRIPT_LOCAL_STORAGE = """
+((marcador, origens) => {
+    if (!document.cookie.split('; ').includes(marcador)) return;
+    const itens = origens[window.location.origin];
+    if (!itens) return;
+    try {
+        for (const { name, value } of itens) {
+            if (window.localStorage.getItem(name) === null) {
+                window.localStorage.setItem(name, value);
+            }
+        }
+    } catch (e) {}
+})(%s, %s);
+"""
+
+# Scripts de localStorage já registrados por contexto: um contexto reaproveitado
+# (pool de contextos) não acumula cópias do mesmo add_init_script.
+_scripts_registrados = weakref.WeakKeyDictionary()
+
+
+class SessionCache:
+    """Cache em disco da sessão autenticada (storage_state) de um portal.
+
+    Cada worker do pytest-xdist mantém seu próprio arquivo, de modo que o
+    login via UI acontece uma única vez por portal e por worker. Os demais
+    testes apenas semeiam o contexto com os cookies e o localStorage salvos.
+    """
+
+    def __init__(self, portal: str, worker_id: Optional[str] = None, base_dir: Optional[str] = None) -> None:
+        self.portal = portal
+        self.worker_id = worker_id or os.getenv("PYTEST_XDIST_WORKER", "master")
+        self.base_dir = Path(base_dir or os.getenv("SESSION_CACHE_DIR", ".auth"))
+        self.max_age = int(os.getenv("SESSION_CACHE_MAX_AGE", str(8 * 60 * 60)))
+        self.habilitado = os.getenv("SESSION_CACHE_DISABLED", "false").lower() not in ("1", "true", "yes")
+
+    @property
+    def path(self) -> Path:
+        return self.base_dir / f"{self.portal}-{self.worker_id}.json"
+
+    def carregar(self) -> Optional[Dict[str, Any]]:
+        """Retorna o storage_state salvo, ou None se ausente, expirado ou corrompido."""
+        if not self.habilitado or not self.path.is_file():
+            return None
+
+        if time.time() - self.path.stat().st_mtime > self.max_age:
+            print(f"Sessão em cache do {self.portal} expirou por idade. Refazendo login.")
+            self.invalidar()
+            return None
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.invalidar()
+            return None
+
+        agora = time.time()
+        expirados = [
+            cookie["name"]
+            for cookie in state.get("cookies", [])
+            if 0 < cookie.get("expires", -1) < agora
+        ]
+        if expirados:
+            print(f"Sessão em cache do {self.portal} com cookies expirados ({', '.join(expirados)}). Refazendo login.")
+            self.invalidar()
+            return None
+
+        return state
+
+    def aplicar(self, context: BrowserContext) -> bool:
+        """Semeia o contexto com a sessão salva. Retorna True se havia sessão válida."""
+        state = self.carregar()
+        if not state:
+            return False
+
+        cookies = list(state.get("cookies", []))
+        origens = {
+            origem["origin"]: origem.get("localStorage", [])
+            for origem in state.get("origins", [])
+            if origem.get("localStorage")
+        }
+        if origens:
+            dados = json.dumps(origens)
+            nome, valor = f"__sessao_cache_{self.portal}", hashlib.sha256(dados.encode()).hexdigest()[:16]
+            cookies += [{"name": nome, "value": valor, "url": origem} for origem in origens]
+        if cookies:
+            context.add_cookies(cookies)
+
+        if origens:
+            script = _SCRIPT_LOCAL_STORAGE % (json.dumps(f"{nome}={valor}"), dados)
+            registrados = _scripts_registrados.setdefault(context, set())
+            if script not in registrados:
+                context.add_init_script(script)
+                registrados.add(script)
+
+        return True
+
+    def salvar(self, context: BrowserContext) -> None:
+        """Grava o storage_state atual do contexto de forma atômica."""
+        if not self.habilitado:
+            return
+
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        context.storage_state(path=str(tmp_path))
+        os.replace(tmp_path, self.path)
+
+    def invalidar(self) -> None:
+        """Remove a sessão salva (ex.: quando o portal rejeita os cookies)."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
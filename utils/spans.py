@@ -0,0 +1,122 @@
+import functools
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Carrega variáveis do .env
+load_dotenv()
+
+_SELETOR = re.compile(r"selector='(.*)'>$")
+
+
+def _habilitado_no_ambiente() -> bool:
+    return os.getenv("TRACE_SPANS", "false").lower() in ("1", "true", "yes")
+
+
+class SpanRecorder:
+    """Registra a duração das ações dos page objects (spans) do teste em andamento.
+
+    Desligado por padrão (`TRACE_SPANS=true` liga): quando desligado, cada
+    chamada instrumentada custa apenas a verificação de um booleano. Os spans
+    ficam num buffer em memória por teste e são gravados como JSONL no
+    teardown, uma linha por span.
+    """
+
+    def __init__(self) -> None:
+        self.habilitado = _habilitado_no_ambiente()
+        self._local = threading.local()
+        self._teste: Optional[str] = None
+        self._buffer: List[Dict[str, Any]] = []
+
+    def iniciar_teste(self, teste: str) -> None:
+        self._teste = teste
+        self._buffer = []
+
+    def registrar(self, nome: str, alvo: str, duracao: float, resultado: str, profundidade: int) -> None:
+        self._buffer.append({
+            "teste": self._teste,
+            "nome": nome,
+            "alvo": alvo,
+            "duracao": round(duracao, 4),
+            "resultado": resultado,
+            "profundidade": profundidade,
+        })
+
+    def finalizar_teste(self, destino) -> int:
+        """Grava os spans do teste em `destino` (append) e esvazia o buffer."""
+        spans, self._buffer, self._teste = self._buffer, [], None
+        if not spans:
+            return 0
+
+        destino = Path(destino)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        with open(destino, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(span, ensure_ascii=False) + "\n" for span in spans))
+        return len(spans)
+
+    @property
+    def profundidade(self) -> int:
+        return getattr(self._local, "profundidade", 0)
+
+    @profundidade.setter
+    def profundidade(self, valor: int) -> None:
+        self._local.profundidade = valor
+
+
+recorder = SpanRecorder()
+
+
+def descrever_alvo(args: tuple) -> str:
+    """Descrição curta do primeiro Locator dos argumentos (o seletor), se houver."""
+    for arg in args:
+        if type(arg).__name__ in ("Locator", "FrameLocator"):
+            descricao = repr(arg)
+            match = _SELETOR.search(descricao)
+            return match.group(1) if match else descricao
+    return ""
+
+
+def span(nome: Optional[str] = None) -> Callable:
+    """Decorator que mede a chamada como um span (nome, alvo, duração, resultado)."""
+    def decorator(func: Callable) -> Callable:
+        nome_span = nome or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.habilitado or recorder._teste is None:
+                return func(*args, **kwargs)
+
+            profundidade = recorder.profundidade
+            recorder.profundidade = profundidade + 1
+            resultado = "ok"
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException as exc:
+                resultado = type(exc).__name__
+                raise
+            finally:
+                recorder.profundidade = profundidade
+                recorder.registrar(nome_span, descrever_alvo(args[1:]), time.perf_counter() - inicio,
+                                   resultado, profundidade)
+
+        wrapper.__span__ = True
+        return wrapper
+    return decorator
+
+
+def instrumentar_classe(cls: type) -> type:
+    """Envolve em spans os métodos públicos definidos diretamente em `cls`."""
+    for nome, atributo in list(vars(cls).items()):
+        if nome.startswith("_") or not callable(atributo) or getattr(atributo, "__span__", False):
+            continue
+        if isinstance(atributo, (staticmethod, classmethod, property)):
+            continue
+        setattr(cls, nome, span(f"{cls.__name__}.{nome}")(atributo))
+    return cls
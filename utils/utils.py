@@ -1,12 +1,163 @@
+import atexit
 import os
+import threading
+import time
 import pyodbc
-from typing import Any, Dict, List, Optional, Sequence
-from contextlib import contextmanager
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from contextlib import closing, contextmanager
 from dotenv import load_dotenv
 
 # Carrega variáveis do .env
 load_dotenv()
 
+
+class ConnectionPool:
+    """Pool limitado e thread-safe de conexões pyodbc para uma connection string.
+
+    Reaproveita conexões já autenticadas (evitando handshake TLS + login a cada
+    query), valida a conexão no checkout, descarta conexões ociosas há mais de
+    `max_idle` segundos e bloqueia quando `max_size` conexões estão em uso.
+    """
+
+    def __init__(self, connection_string: str, timeout: int, max_size: int = 5, max_idle: float = 300,
+                 health_check: bool = True, health_check_interval: float = 5, acquire_timeout: float = 30) -> None:
+        self._connection_string = connection_string
+        self.timeout = timeout
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check = health_check
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: Deque[Tuple[pyodbc.Connection, float]] = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+
+    def _is_healthy(self, conn: pyodbc.Connection) -> bool:
+        try:
+            with closing(conn.cursor()) as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            return True
+        except pyodbc.Error:
+            return False
+
+    @staticmethod
+    def _discard(conn: pyodbc.Connection) -> None:
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+    def acquire(self) -> pyodbc.Connection:
+        """Retira uma conexão do pool, abrindo uma nova se não houver ociosa válida."""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"Nenhuma conexão livre no pool após {self.acquire_timeout}s (max_size={self.max_size}).")
+
+        try:
+            while True:
+                with self._lock:
+                    if self._closed:
+                        raise RuntimeError("Pool de conexões já foi encerrado.")
+                    item = self._idle.pop() if self._idle else None
+
+                if item is None:
+                    return pyodbc.connect(self._connection_string, timeout=self.timeout)
+
+                conn, last_used = item
+                idle_for = time.monotonic() - last_used
+                if idle_for > self.max_idle:
+                    self._discard(conn)
+                    continue
+                if self.health_check and idle_for > self.health_check_interval and not self._is_healthy(conn):
+                    self._discard(conn)
+                    continue
+                return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: pyodbc.Connection, discard: bool = False) -> None:
+        """Devolve a conexão ao pool (ou a fecha, se `discard` ou pool encerrado)."""
+        try:
+            with self._lock:
+                discard = discard or self._closed
+            if not discard:
+                try:
+                    # Garante que nenhuma transação/lock fique pendurado na conexão ociosa
+                    conn.rollback()
+                except pyodbc.Error:
+                    discard = True
+            if not discard:
+                with self._lock:
+                    # close() pode ter rodado durante o rollback
+                    discard = self._closed
+                    if not discard:
+                        self._idle.append((conn, time.monotonic()))
+            if discard:
+                self._discard(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        ok = False
+        try:
+            yield conn
+            ok = True
+        except GeneratorExit:
+            # Consumidor de um gerador (ex.: iter_rows) parou antes do fim: a conexão continua íntegra
+            ok = True
+            raise
+        finally:
+            self.release(conn, discard=not ok)
+
+    def close(self) -> None:
+        """Fecha todas as conexões ociosas; as em uso são fechadas ao serem devolvidas."""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(connection_string: str, timeout: int) -> ConnectionPool:
+    """Retorna o pool compartilhado para a connection string (mesmo servidor/banco/usuário)."""
+    with _pools_lock:
+        pool = _pools.get(connection_string)
+        if pool is None:
+            pool = ConnectionPool(
+                connection_string,
+                timeout=timeout,
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", "5")),
+                max_idle=float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+                health_check=os.getenv("DB_POOL_HEALTH_CHECK", "true").lower() in ("1", "true", "yes"),
+                health_check_interval=float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "5")),
+                acquire_timeout=float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "30")),
+            )
+            _pools[connection_string] = pool
+        return pool
+
+
+def close_all_pools() -> None:
+    """Encerra todos os pools (chamado no fim da sessão de testes e na saída do processo)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_all_pools)
+
 class DatabaseClient:
     """Helper para executar queries no SQL Server usando pyodbc."""
 
@@ -19,6 +170,7 @@ class DatabaseClient:
         self.trust_server_cert = os.getenv("DB_TRUST_SERVER_CERT", "yes").lower() in ("1", "true", "yes")
         self.trusted_connection = os.getenv("DB_TRUSTED_CONNECTION", "false").lower() in ("1", "true", "yes")
         self.timeout = int(os.getenv("DB_CONNECT_TIMEOUT", "30"))
+        self.arraysize = int(os.getenv("DB_FETCH_ARRAYSIZE", "500"))
 
         # Validações
         if not all([self.server, self.database]):
@@ -48,12 +200,9 @@ class DatabaseClient:
 
     @contextmanager
     def connection(self):
-        """Contexto de conexão segura."""
-        conn = pyodbc.connect(self._connection_string(), timeout=self.timeout)
-        try:
+        """Contexto de conexão segura, emprestada do pool compartilhado."""
+        with get_pool(self._connection_string(), self.timeout).connection() as conn:
             yield conn
-        finally:
-            conn.close()
 
     # ========================
     # Métodos de execução
@@ -61,18 +210,58 @@ class DatabaseClient:
 
     def fetch_all(self, query: str, params: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
         """Executa SELECT e retorna todas as linhas como lista de dicionários."""
-        with self.connection() as conn:
-            cursor = conn.cursor()
+        with self.connection() as conn, closing(conn.cursor()) as cursor:
             cursor.execute(query, params or [])
             if not cursor.description:
                 return []
             columns = [col[0] for col in cursor.description]
             return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
+    def fetch_batches(self, query: str, params: Optional[Sequence[Any]] = None, arraysize: Optional[int] = None,
+                      as_tuples: bool = False) -> Iterator[Union[List[pyodbc.Row], Tuple[Dict[str, int], List[tuple]]]]:
+        """Executa SELECT e gera as linhas em lotes de `arraysize` via `cursor.fetchmany`.
+
+        Por padrão cada lote é uma lista de `pyodbc.Row` (acesso por índice ou
+        por nome de coluna). Com `as_tuples=True`, gera `(colunas, lote)`, onde
+        `colunas` é o mesmo dicionário nome -> posição para todos os lotes.
+        Se o consumidor interromper a iteração, o cursor é fechado e a conexão
+        volta ao pool.
+        """
+        arraysize = arraysize or self.arraysize
+        with self.connection() as conn, closing(conn.cursor()) as cursor:
+            cursor.arraysize = arraysize
+            cursor.execute(query, params or [])
+            if not cursor.description:
+                return
+            columns = {col[0]: index for index, col in enumerate(cursor.description)}
+            while True:
+                batch = cursor.fetchmany(arraysize)
+                if not batch:
+                    return
+                if as_tuples:
+                    yield columns, [tuple(row) for row in batch]
+                else:
+                    yield batch
+
+    def iter_rows(self, query: str, params: Optional[Sequence[Any]] = None, arraysize: Optional[int] = None,
+                  as_tuples: bool = False) -> Iterator[Union[pyodbc.Row, Tuple[Dict[str, int], tuple]]]:
+        """Executa SELECT e gera uma linha por vez, sem carregar o resultado inteiro.
+
+        Gera `pyodbc.Row` ou, com `as_tuples=True`, `(colunas, tupla)` com o
+        índice de colunas compartilhado. Ver `fetch_batches`.
+        """
+        with closing(self.fetch_batches(query, params, arraysize, as_tuples)) as batches:
+            for batch in batches:
+                if as_tuples:
+                    columns, rows = batch
+                    for row in rows:
+                        yield columns, row
+                else:
+                    yield from batch
+
     def fetch_one(self, query: str, params: Optional[Sequence[Any]] = None) -> Optional[Dict[str, Any]]:
         """Executa SELECT e retorna apenas a primeira linha."""
-        with self.connection() as conn:
-            cursor = conn.cursor()
+        with self.connection() as conn, closing(conn.cursor()) as cursor:
             cursor.execute(query, params or [])
             row = cursor.fetchone()
             if not row:
@@ -82,25 +271,35 @@ class DatabaseClient:
 
     def execute(self, query: str, params: Optional[Sequence[Any]] = None) -> int:
         """Executa INSERT/UPDATE/DELETE, retorna número de linhas afetadas."""
-        with self.connection() as conn:
-            cursor = conn.cursor()
+        with self.connection() as conn, closing(conn.cursor()) as cursor:
             cursor.execute(query, params or [])
             conn.commit()
             return cursor.rowcount
 
     def execute_many(self, query: str, param_list: Sequence[Sequence[Any]]) -> int:
         """Executa vários INSERT/UPDATE/DELETE em lote."""
-        with self.connection() as conn:
-            cursor = conn.cursor()
+        with self.connection() as conn, closing(conn.cursor()) as cursor:
             cursor.fast_executemany = True
             cursor.executemany(query, param_list)
             conn.commit()
             return cursor.rowcount
 
 
-    def buscar_primeiro_container_valido(batch_size: int = 20):
-        
+    # Filtro dos números de container candidatos no DB1
+    _FILTRO_CONTAINER_VALIDO = """
+        tab_tipo_container_id = 55
+        AND num_container IS NOT NULL
+        AND LTRIM(RTRIM(num_container)) <> ''
+        AND CHARINDEX(CHAR(9), num_container) = 0
+        AND num_container NOT LIKE '% %'
+        AND num_container LIKE '[A-Z][A-Z][A-Z][A-Z][0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
+    """
+
+    # O SQL Server aceita no máximo 2100 parâmetros por comando
+    _MAX_PARAMS_IN = 2000
 
+    @staticmethod
+    def _clientes_container() -> Tuple["DatabaseClient", "DatabaseClient"]:
         # --- First database connection (generic names) ---
         db_ecargo = DatabaseClient(
             db_driver='DB1_DRIVER',
@@ -118,50 +317,60 @@ class DatabaseClient:
             db_username="DB2_USERNAME",
             db_password="DB2_PASSWORD"
         )
+        return db_ecargo, db_multi
+
+    @staticmethod
+    def iterar_containers_validos(batch_size: int = 500, apos: Optional[str] = None):
+        """Gera, em ordem, os containers do DB1 que ainda não existem no DB2.
+
+        A paginação é por chave (`num_container > último visto`), então cada
+        página custa o mesmo independentemente da profundidade. Cada página de
+        candidatos é conferida no DB2 com uma única query `IN (...)` (anti-join
+        em lote): são duas idas ao banco por página, não uma por candidato.
+        """
+        batch_size = max(1, min(batch_size, DatabaseClient._MAX_PARAMS_IN))
+        db_ecargo, db_multi = DatabaseClient._clientes_container()
+        ultimo = apos or ""
 
-        # --- Total de linhas na tabela container ---
-        result = db_ecargo.fetch_all("""
-            SELECT SUM(row_count) AS total_linhas
-            FROM sys.dm_db_partition_stats
-            WHERE object_id = OBJECT_ID('container')
-            AND (index_id = 0 OR index_id = 1);
-        """)
-        max_count = result[0]['total_linhas']
-        print(f"📊 Total de linhas na tabela container: {max_count}")
-
-        # --- Loop paginado ---
-        count = 0
-        while count < max_count:
-            query = f"""
-                SELECT num_container
+        while True:
+            rows = db_ecargo.fetch_all(f"""
+                SELECT TOP (?) num_container
                 FROM container
-                WHERE tab_tipo_container_id = 55
-                AND num_container IS NOT NULL
-                AND LTRIM(RTRIM(num_container)) <> ''
-                AND CHARINDEX(CHAR(9), num_container) = 0
-                AND num_container NOT LIKE '% %'
-                AND num_container LIKE '[A-Z][A-Z][A-Z][A-Z][0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
-                ORDER BY num_container
-                OFFSET {count} ROWS
-                FETCH NEXT {batch_size} ROWS ONLY;
-            """
-            rows = db_ecargo.fetch_all(query)
+                WHERE {DatabaseClient._FILTRO_CONTAINER_VALIDO}
+                AND num_container > ?
+                ORDER BY num_container;
+            """, [batch_size, ultimo])
 
             if not rows:
-                break
+                return
 
-            for row in rows:
-                if not db_multi.fetch_all(f"select ctr_descricao from t_container where ctr_descricao = '{row['num_container']}'"):
+            candidatos = [row['num_container'] for row in rows]
+            placeholders = ", ".join("?" for _ in candidatos)
+            existentes = {
+                row['ctr_descricao'].strip().upper()
+                for row in db_multi.fetch_all(
+                    f"SELECT ctr_descricao FROM t_container WHERE ctr_descricao IN ({placeholders})",
+                    candidatos,
+                )
+                if row['ctr_descricao']
+            }
 
-                    return row['num_container']
+            for container in candidatos:
+                if container.strip().upper() not in existentes:
+                    yield container
 
-            count += batch_size
+            if len(rows) < batch_size:
+                return
+            ultimo = candidatos[-1]
 
-        return None
+    @staticmethod
+    def buscar_primeiro_container_valido(batch_size: int = 500) -> Optional[str]:
+        """Retorna o primeiro container do DB1 que ainda não existe no DB2."""
+        return next(DatabaseClient.iterar_containers_validos(batch_size=batch_size), None)
 
 
 if __name__ == "__main__":
-    container = DatabaseClient.buscar_primeiro_container_valido(batch_size=50)
+    container = DatabaseClient.buscar_primeiro_container_valido()
     if container:
         print(f"🚢 Primeiro container válido encontrado: {container}")
     else:
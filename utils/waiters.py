@@ -0,0 +1,170 @@
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Callable, Iterator, Optional
+
+import pyodbc
+from dotenv import load_dotenv
+
+from utils.utils import DatabaseClient
+
+# Carrega variáveis do .env
+load_dotenv()
+
+# Sonda: recebe o número do booking e diz se o backend já concluiu a integração
+Sonda = Callable[[str], bool]
+
+
+class BackoffWaiter:
+    """Espera com backoff exponencial, jitter e prazo total.
+
+    As esperas começam em `inicial` segundos e são multiplicadas por `fator`
+    a cada tentativa, até `maximo`. Cada uma varia aleatoriamente em
+    ±`jitter` (fração), para que workers paralelos não consultem o backend em
+    sincronia. A última espera é cortada para terminar no prazo.
+    """
+
+    def __init__(self, inicial: float = 1.0, maximo: float = 60.0, fator: float = 2.0, jitter: float = 0.2,
+                 prazo: float = 600.0, aleatorio: Optional[random.Random] = None,
+                 relogio: Callable[[], float] = time.monotonic, dormir: Callable[[float], None] = time.sleep) -> None:
+        self.inicial = inicial
+        self.maximo = maximo
+        self.fator = fator
+        self.jitter = jitter
+        self.prazo = prazo
+        self._aleatorio = aleatorio or random.Random()
+        self._relogio = relogio
+        self._dormir = dormir
+
+    @classmethod
+    def do_ambiente(cls, prefixo: str, **padroes) -> "BackoffWaiter":
+        """Lê `<prefixo>_BACKOFF_INICIAL`, `_BACKOFF_MAXIMO`, `_BACKOFF_FATOR`, `_JITTER` e `_PRAZO` (segundos).
+
+        `padroes` valem apenas para as variáveis não definidas no ambiente.
+        """
+        kwargs = dict(padroes)
+        for parametro, variavel in (("inicial", "BACKOFF_INICIAL"), ("maximo", "BACKOFF_MAXIMO"),
+                                    ("fator", "BACKOFF_FATOR"), ("jitter", "JITTER"), ("prazo", "PRAZO")):
+            valor = os.getenv(f"{prefixo}_{variavel}")
+            if valor:
+                kwargs[parametro] = float(valor)
+        return cls(**kwargs)
+
+    def prazo_final(self) -> float:
+        """Instante (no relógio do waiter) em que o prazo total se esgota, a partir de agora."""
+        return self._relogio() + self.prazo
+
+    def intervalos(self, fim: Optional[float] = None) -> Iterator[float]:
+        """Gera as esperas da sequência de backoff até o prazo (`fim`)."""
+        fim = fim if fim is not None else self.prazo_final()
+        base = self.inicial
+        while True:
+            restante = fim - self._relogio()
+            if restante <= 0:
+                return
+            espera = base * (1 + self._aleatorio.uniform(-self.jitter, self.jitter))
+            yield max(0.0, min(espera, restante))
+            base = min(base * self.fator, self.maximo)
+
+    def aguardar(self, condicao: Callable[[], bool], descricao: str = "condição",
+                 fim: Optional[float] = None) -> float:
+        """Consulta `condicao` até ela ser verdadeira e retorna o tempo gasto, em segundos.
+
+        Levanta TimeoutError se o prazo se esgotar antes.
+        """
+        inicio = self._relogio()
+        if condicao():
+            return 0.0
+
+        tentativas = 1
+        for espera in self.intervalos(fim):
+            self._dormir(espera)
+            tentativas += 1
+            if condicao():
+                return self._relogio() - inicio
+        raise TimeoutError(f"{descricao} não concluída após {self._relogio() - inicio:.0f}s ({tentativas} consultas).")
+
+
+class SondaBanco:
+    """Consulta no banco se a integração do booking concluiu.
+
+    `query` recebe o número do booking como único parâmetro (`?`); a
+    integração está concluída quando a primeira coluna da primeira linha é
+    verdadeira. O banco é o definido pelas variáveis `<prefixo_db>_*` (as
+    mesmas do `DatabaseClient`).
+    """
+
+    def __init__(self, query: str, prefixo_db: str = "DB2", cliente: Optional[DatabaseClient] = None) -> None:
+        self.query = query
+        self.prefixo_db = prefixo_db
+        self._cliente = cliente
+
+    @property
+    def cliente(self) -> DatabaseClient:
+        if self._cliente is None:
+            self._cliente = DatabaseClient(
+                db_driver=f"{self.prefixo_db}_DRIVER",
+                db_server=f"{self.prefixo_db}_SERVER",
+                db_database=f"{self.prefixo_db}_DATABASE",
+                db_username=f"{self.prefixo_db}_USERNAME",
+                db_password=f"{self.prefixo_db}_PASSWORD",
+            )
+        return self._cliente
+
+    def __call__(self, numero_booking: str) -> bool:
+        try:
+            linha = self.cliente.fetch_one(self.query, [numero_booking])
+        except pyodbc.Error as exc:
+            print(f"Aviso: falha ao consultar o status da integração no banco: {exc}")
+            return False
+        return bool(linha) and bool(next(iter(linha.values())))
+
+
+class SondaHttp:
+    """Consulta um endpoint HTTP leve para saber se a integração do booking concluiu.
+
+    `url` pode conter `{booking}`. Sem `campo`, qualquer resposta 2xx indica
+    conclusão; com `campo`, a resposta deve ser JSON com esse campo verdadeiro.
+    """
+
+    def __init__(self, url: str, campo: Optional[str] = None, timeout: float = 10.0) -> None:
+        self.url = url
+        self.campo = campo
+        self.timeout = timeout
+
+    def __call__(self, numero_booking: str) -> bool:
+        url = self.url.replace("{booking}", urllib.parse.quote(numero_booking, safe=""))
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as resposta:
+                if not self.campo:
+                    return True
+                return bool(json.load(resposta).get(self.campo))
+        except urllib.error.HTTPError as exc:
+            if exc.code >= 500:
+                print(f"Aviso: sonda de integração respondeu HTTP {exc.code}.")
+            return False
+        except (OSError, ValueError) as exc:
+            print(f"Aviso: falha ao consultar o status da integração em {url}: {exc}")
+            return False
+
+
+def sonda_do_ambiente(prefixo: str = "INTEGRACAO") -> Optional[Sonda]:
+    """Monta a sonda configurada em `<prefixo>_SONDA` ("banco" ou "http"); None se não houver."""
+    tipo = os.getenv(f"{prefixo}_SONDA", "").lower()
+    if not tipo:
+        return None
+    if tipo == "banco":
+        query = os.getenv(f"{prefixo}_SQL")
+        if not query:
+            raise RuntimeError(f"Define the environment variable {prefixo}_SQL.")
+        return SondaBanco(query, prefixo_db=os.getenv(f"{prefixo}_DB", "DB2"))
+    if tipo == "http":
+        url = os.getenv(f"{prefixo}_URL")
+        if not url:
+            raise RuntimeError(f"Define the environment variable {prefixo}_URL.")
+        return SondaHttp(url, campo=os.getenv(f"{prefixo}_URL_CAMPO") or None)
+    raise ValueError(f"{prefixo}_SONDA inválida: {tipo!r}. Use 'banco' ou 'http'.")